@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import TOPOLOGIES, generate
+from network.network_classes.HostMonitor import HostMonitor
+from network.network_classes.Ip import Ip
+from network.network_classes.NetworkExplorer import NetworkExplorer, DEFAULT_WORKERS
+from network.network_classes.Router import Router
+from network.network_classes.SessionManager import SessionManager
+from network.network_manager import NetworkManager
+
+DEFAULT_SIZES = (10, 100, 1000)
+COMMUNITY = 'rocom'
+# A result is a regression when it takes this many times its baseline, small timings are too noisy to compare
+DEFAULT_TOLERANCE = 1.5
+MIN_COMPARED_SECONDS = 0.01
+
+
+class Timer:
+    def __init__(self):
+        self.timings = {}
+
+    def measure(self, phase, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings[phase] = time.perf_counter() - start
+        return result
+
+
+def dead_routers(size, dead):
+    """Numbers of `dead` routers spread over the network, never the access router."""
+    if dead <= 0 or size < 2:
+        return set()
+    step = max(1, (size - 1) // dead)
+    return set(range(1, size, step)[:dead])
+
+
+def benchmark(kind, size, latency=0.0, workers=DEFAULT_WORKERS, full_tables=False, renderer=None, dead=0,
+              deadline=None):
+    """Discovers a synthetic topology through simulated agents and times each phase, returns a result dict."""
+    topology = generate(kind, size)
+    simulated = SimulatedNetwork(topology, latency, full_tables, dead_routers(size, dead))
+    timer = Timer()
+
+    sessions = SessionManager(max(workers, 64), simulated.session_factory, HostMonitor(deadline))
+    access_router = Router(Ip(topology.access_ip()), sessions)
+    access_router.get_name(COMMUNITY)
+    explorer = NetworkExplorer(access_router, COMMUNITY, workers, sessions)
+    routers = timer.measure('explore', explorer.explore)
+
+    network_manager = NetworkManager(topology.access_ip(), COMMUNITY, workers, routers=routers,
+                                     session_factory=simulated.session_factory)
+    timer.measure('set_networks', network_manager.set_networks)
+
+    router_ips = topology.router_ips()
+    origin, destination = router_ips[0], router_ips[len(router_ips) // 2]
+    timer.measure('get_shortest_path', network_manager.get_shortest_path, origin, destination)
+    timer.measure('get_shortest_path_cached', network_manager.get_shortest_path, origin, destination)
+
+    if renderer is not None:
+        timer.measure('draw_network_map', draw, network_manager, renderer)
+
+    return {
+        'topology': kind,
+        'size': size,
+        'routers': len(routers),
+        'unreachable': len(explorer.unreachable_ips) + sum(not router.reachable for router in routers),
+        'networks': len(network_manager.networks),
+        'pdus': simulated.statistics.pdus,
+        'timings': timer.timings,
+    }
+
+
+def draw(network_manager, renderer):
+    # The renderers write next to the working directory, keep the benchmark maps out of the tree
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            if renderer == 'graphviz':
+                from network.network_plot_maker.dot_renderer import render_network_map
+                render_network_map(network_manager, "")
+            else:
+                from network.network_plot_maker.plot_maker import draw_network_map
+                draw_network_map(network_manager, "")
+        finally:
+            os.chdir(working_directory)
+
+
+def regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns a line for every phase that got slower than its baseline by more than the tolerance."""
+    baseline_timings = {(result['topology'], result['size']): result['timings'] for result in baseline}
+    slower = []
+    for result in results:
+        previous = baseline_timings.get((result['topology'], result['size']), {})
+        for phase, seconds in result['timings'].items():
+            if phase in previous and seconds > MIN_COMPARED_SECONDS and seconds > previous[phase] * tolerance:
+                slower.append(f"{result['topology']} {result['size']} {phase}: "
+                              f"{seconds:.4f}s, baseline {previous[phase]:.4f}s")
+    return slower
+
+
+def print_result(result):
+    timings = '  '.join(f"{phase} {seconds * 1000:9.2f} ms" for phase, seconds in result['timings'].items())
+    print(f"{result['topology']:13} {result['size']:6} routers {result['routers']:6} "
+          f"unreachable {result['unreachable']:4} networks {result['networks']:6} PDUs {result['pdus']:8}  {timings}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times discovery and path finding on synthetic OSPF networks")
+    parser.add_argument('--topology', nargs='+', choices=TOPOLOGIES, default=list(TOPOLOGIES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES), metavar='N',
+                        help="Routers of each generated network (Default=10 100 1000)")
+    parser.add_argument('--latency', type=float, default=0.0, metavar='MS', help="Latency of every SNMP PDU")
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS, metavar='N')
+    parser.add_argument('--full-tables', action='store_true', help="Give every router a route to every network")
+    parser.add_argument('--dead', type=int, default=0, metavar='N', help="Routers of each network that never answer")
+    parser.add_argument('--deadline', type=float, metavar='SECONDS', help="Deadline of each discovery")
+    parser.add_argument('--draw', choices=('matplotlib', 'graphviz'), help="Also time drawing the network map")
+    parser.add_argument('--save', metavar='FILE', help="Write the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="Fail when a phase is slower than in these saved results")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = []
+    for kind in args.topology:
+        for size in args.sizes:
+            result = benchmark(kind, size, args.latency / 1000, args.workers, args.full_tables, args.draw, args.dead,
+                               args.deadline)
+            print_result(result)
+            results.append(result)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            slower = regressions(results, json.load(file), args.tolerance)
+        for line in slower:
+            print(f"Regression: {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+
+from network.interface_poller import (IF_HC_IN_OCTETS_OID, IF_HC_OUT_OCTETS_OID, IF_OPER_STATUS_OID, IF_IN_ERRORS_OID,
+                                      IF_OUT_ERRORS_OID)
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Router import (ROUTE_NETWORK_OID, ROUTE_MASK_OID, ROUTE_NEXT_HOP_OID, ROUTE_TYPE_OID,
+                                            IF_DESCR_OID, IF_TYPE_OID, IF_SPEED_OID, IP_MASK_OID, OSPF_NBR_IP_OID,
+                                            OSPF_NBR_RTR_ID_OID, OSPF_NBR_STATE_OID, OSPF_ROUTER_ID_OID, SYS_NAME_OID,
+                                            SYS_UPTIME_OID, IF_TABLE_LAST_CHANGE_OID, ROUTE_NUMBER_OID,
+                                            INTERFACE_INDEX_TO_ADDR_OID)
+
+IF_TYPE_ETHERNET = '6'
+ROUTE_TYPE_LOCAL = '3'
+ROUTE_TYPE_REMOTE = '4'
+NO_SUCH_OBJECT = 'NOSUCHOBJECT'
+# net-snmp defaults, used by sessions opened without a timeout
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_RETRIES = 3
+# Share of its speed every synthetic interface carries in each direction
+DEFAULT_LOAD = 0.25
+IF_OPER_STATUS_UP = '1'
+NBR_STATE_FULL = '8'
+
+
+class SimulatedVariable:
+    """Same attributes as an easysnmp SNMPVariable."""
+
+    __slots__ = ('oid', 'oid_index', 'value', 'snmp_type')
+
+    def __init__(self, oid, oid_index, value, snmp_type='OCTETSTR'):
+        self.oid = oid
+        self.oid_index = oid_index
+        self.value = value
+        self.snmp_type = snmp_type
+
+
+class SimulatedAgent:
+    """MIB contents of one synthetic router, as {column OID: {index: value}} plus {scalar OID: value}."""
+
+    def __init__(self, router, routes, uptime=100000, load=DEFAULT_LOAD):
+        self.name = router.name
+        self.load = load
+        self.started = time.monotonic()
+        self.scalars = {
+            SYS_NAME_OID: router.name,
+            OSPF_ROUTER_ID_OID: router.router_id,
+            SYS_UPTIME_OID: str(uptime),
+            IF_TABLE_LAST_CHANGE_OID: '0',
+            ROUTE_NUMBER_OID: str(len(routes)),
+        }
+        self.columns = {
+            INTERFACE_INDEX_TO_ADDR_OID: {interface.ip: str(interface.index) for interface in router.interfaces},
+            IP_MASK_OID: {interface.ip: interface.mask for interface in router.interfaces},
+            IF_DESCR_OID: {str(interface.index): f"GigabitEthernet{interface.index}/0"
+                           for interface in router.interfaces},
+            IF_SPEED_OID: {str(interface.index): str(interface.speed) for interface in router.interfaces},
+            IF_TYPE_OID: {str(interface.index): IF_TYPE_ETHERNET for interface in router.interfaces},
+            OSPF_NBR_IP_OID: {f"{neighbor_ip}.0": neighbor_ip for neighbor_ip, _ in router.neighbors()},
+            OSPF_NBR_RTR_ID_OID: {f"{neighbor_ip}.0": router_id for neighbor_ip, router_id in router.neighbors()},
+            OSPF_NBR_STATE_OID: {f"{neighbor_ip}.0": NBR_STATE_FULL for neighbor_ip, _ in router.neighbors()},
+            IF_OPER_STATUS_OID: {str(interface.index): IF_OPER_STATUS_UP for interface in router.interfaces},
+            IF_IN_ERRORS_OID: {str(interface.index): '0' for interface in router.interfaces},
+            IF_OUT_ERRORS_OID: {str(interface.index): '0' for interface in router.interfaces},
+            ROUTE_NETWORK_OID: {},
+            ROUTE_MASK_OID: {},
+            ROUTE_NEXT_HOP_OID: {},
+            ROUTE_TYPE_OID: {},
+        }
+        for destination, mask, next_hop, route_type in routes:
+            index = f"{destination}.{mask}.0.{next_hop}"
+            self.columns[ROUTE_NETWORK_OID][index] = destination
+            self.columns[ROUTE_MASK_OID][index] = mask
+            self.columns[ROUTE_NEXT_HOP_OID][index] = next_hop
+            self.columns[ROUTE_TYPE_OID][index] = route_type
+
+    def octets(self, index):
+        """ifHCInOctets and ifHCOutOctets of an interface, counting up at load times its speed."""
+        speed = self.columns[IF_SPEED_OID].get(index)
+        if speed is None:
+            return None
+        return str(int((time.monotonic() - self.started) * int(speed) * self.load / 8))
+
+
+class SimulatedSession:
+    """Fake easysnmp Session answering from a SimulatedAgent, every PDU sent waits latency seconds.
+
+    A GET costs one PDU whatever the number of OIDs, a walk one GETNEXT per row and a bulkwalk one
+    GETBULK per max_repetitions rows, like net-snmp would send them. Without an agent every request waits
+    for its timeout and all of its retries, then fails like a dead router does.
+    """
+
+    def __init__(self, agent: SimulatedAgent, latency=0.0, statistics=None, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES):
+        self.agent = agent
+        self.latency = latency
+        self.statistics = statistics
+        self.timeout = timeout
+        self.retries = retries
+
+    def _send(self, pdus=1):
+        if self.agent is None:
+            if self.statistics is not None:
+                self.statistics.count(self.retries + 1)
+            time.sleep(self.timeout * (self.retries + 1))
+            raise TimeoutError("timed out while connecting to remote host")
+        if self.statistics is not None:
+            self.statistics.count(pdus)
+        if self.latency:
+            time.sleep(self.latency * pdus)
+
+    def _get_one(self, oid):
+        if oid in self.agent.scalars:
+            return SimulatedVariable(oid.rsplit('.', 1)[0], '0', self.agent.scalars[oid])
+        column, _, index = oid.rpartition('.')
+        if column in (IF_HC_IN_OCTETS_OID, IF_HC_OUT_OCTETS_OID):
+            value = self.agent.octets(index)
+            if value is not None:
+                return SimulatedVariable(column, index, value, 'COUNTER64')
+        elif index in self.agent.columns.get(column, {}):
+            return SimulatedVariable(column, index, self.agent.columns[column][index])
+        return SimulatedVariable(oid, '', NO_SUCH_OBJECT, NO_SUCH_OBJECT)
+
+    def get(self, oids):
+        self._send()
+        if isinstance(oids, (list, tuple)):
+            return [self._get_one(oid) for oid in oids]
+        return self._get_one(oids)
+
+    def _column(self, oid):
+        return [SimulatedVariable(oid, index, value) for index, value in self.agent.columns.get(oid, {}).items()]
+
+    def walk(self, oid):
+        if self.agent is None:
+            self._send()
+        variables = self._column(oid)
+        self._send(len(variables) + 1)
+        return variables
+
+    def bulkwalk(self, oid, non_repeaters=0, max_repetitions=10):
+        if self.agent is None:
+            self._send()
+        variables = self._column(oid)
+        self._send(len(variables) // max_repetitions + 1)
+        return variables
+
+
+class Statistics:
+    def __init__(self):
+        self.pdus = 0
+        self.lock = threading.Lock()
+
+    def count(self, pdus):
+        with self.lock:
+            self.pdus += pdus
+
+
+def connected_routes(router):
+    return [(Ip.int_to_octets(Ip(interface.ip).value & Netmask(interface.mask).netmask), interface.mask, '0.0.0.0',
+             ROUTE_TYPE_LOCAL) for interface in router.interfaces]
+
+
+def full_routing_tables(topology):
+    """Connected routes plus a remote route to every other network through the first hop of a BFS, per router."""
+    owners = {}
+    networks = {}
+    for number, router in enumerate(topology.routers):
+        for interface in router.interfaces:
+            owners[interface.ip] = number
+            network = (Ip.int_to_octets(Ip(interface.ip).value & Netmask(interface.mask).netmask), interface.mask)
+            networks.setdefault(network, []).append(number)
+
+    tables = []
+    for source, router in enumerate(topology.routers):
+        # first_hops[router number] is the next hop IP towards it, None for the source itself
+        first_hops = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for neighbor_ip in topology.routers[current].neighbor_ips():
+                neighbor = owners[neighbor_ip]
+                if neighbor not in first_hops:
+                    first_hops[neighbor] = neighbor_ip if current == source else first_hops[current]
+                    queue.append(neighbor)
+
+        routes = connected_routes(router)
+        local = {(destination, mask) for destination, mask, _, _ in routes}
+        for (destination, mask), members in networks.items():
+            if (destination, mask) in local:
+                continue
+            next_hop = next((first_hops[member] for member in members if member in first_hops), None)
+            if next_hop is not None:
+                routes.append((destination, mask, next_hop, ROUTE_TYPE_REMOTE))
+        tables.append(routes)
+    return tables
+
+
+class SimulatedNetwork:
+    """Agents of every router of a synthetic topology, reachable on any of their interface IPs.
+
+    session_factory plugs into SessionManager (and NetworkManager) in place of easysnmp sessions. The routers
+    numbered in dead_routers never answer, as if they were down or filtering SNMP.
+    """
+
+    def __init__(self, topology, latency=0.0, full_tables=False, dead_routers=()):
+        self.topology = topology
+        self.latency = latency
+        self.statistics = Statistics()
+        if full_tables:
+            tables = full_routing_tables(topology)
+        else:
+            tables = [connected_routes(router) for router in topology.routers]
+
+        self.agents = {}
+        for number, (router, routes) in enumerate(zip(topology.routers, tables)):
+            if number in dead_routers:
+                continue
+            agent = SimulatedAgent(router, routes)
+            for interface in router.interfaces:
+                self.agents[interface.ip] = agent
+
+    def session_factory(self, hostname, community, version, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        return SimulatedSession(self.agents.get(str(hostname)), self.latency, self.statistics, timeout, retries)
@@ -0,0 +1,143 @@
+import math
+
+from network.network_classes.Ip import Ip
+
+TOPOLOGIES = ('ring', 'grid', 'multi-area', 'hub-and-spoke')
+# Point to point links are /30s out of 10.0.0.0/8, shared segments /24s out of 172.16.0.0/12
+LINK_BASE = Ip('10.0.0.0').value
+SEGMENT_BASE = Ip('172.16.0.0').value
+ROUTER_ID_BASE = Ip('1.0.0.0').value
+LINK_MASK = '255.255.255.252'
+SEGMENT_MASK = '255.255.255.0'
+LINK_SPEED = 100000000
+
+
+class SyntheticInterface:
+    def __init__(self, index, ip, mask, speed=LINK_SPEED):
+        self.index = index
+        self.ip = ip
+        self.mask = mask
+        self.speed = speed
+        self.neighbors = []
+
+
+class SyntheticRouter:
+    def __init__(self, name, router_id):
+        self.name = name
+        self.router_id = router_id
+        self.interfaces = []
+
+    def add_interface(self, ip, mask, speed=LINK_SPEED):
+        interface = SyntheticInterface(len(self.interfaces) + 1, ip, mask, speed)
+        self.interfaces.append(interface)
+        return interface
+
+    def neighbors(self):
+        """(IP, router-id) of every OSPF neighbor."""
+        return [neighbor for interface in self.interfaces for neighbor in interface.neighbors]
+
+    def neighbor_ips(self):
+        return [neighbor_ip for neighbor_ip, _ in self.neighbors()]
+
+
+class SyntheticTopology:
+    """Routers of a made up OSPF network, with the addresses of every link already allocated."""
+
+    def __init__(self, kind, size):
+        self.kind = kind
+        # Router-ids are 1.0.0.1, 1.0.0.2... like loopbacks would give them
+        self.routers = [SyntheticRouter(f"R{number}", Ip.int_to_octets(ROUTER_ID_BASE + number + 1))
+                        for number in range(size)]
+        self.links = 0
+        self.segments = 0
+
+    def link(self, first, second, speed=LINK_SPEED):
+        """Connects two routers over a new /30."""
+        base = LINK_BASE + 4 * self.links
+        self.links += 1
+        self.connect([(self.routers[first], Ip.int_to_octets(base + 1)),
+                      (self.routers[second], Ip.int_to_octets(base + 2))], LINK_MASK, speed)
+
+    def segment(self, members, speed=LINK_SPEED):
+        """Connects several routers to a new broadcast /24, as if through a switch."""
+        base = SEGMENT_BASE + 256 * self.segments
+        self.segments += 1
+        self.connect([(self.routers[member], Ip.int_to_octets(base + 1 + position))
+                      for position, member in enumerate(members)], SEGMENT_MASK, speed)
+
+    @staticmethod
+    def connect(attachments, mask, speed):
+        interfaces = [(router.add_interface(ip, mask, speed), router) for router, ip in attachments]
+        for interface, _ in interfaces:
+            interface.neighbors = [(other.ip, router.router_id) for other, router in interfaces
+                                   if other is not interface]
+
+    def access_ip(self):
+        return self.routers[0].interfaces[0].ip
+
+    def router_ips(self):
+        """First interface IP of every router, in router order."""
+        return [router.interfaces[0].ip for router in self.routers]
+
+
+def ring(size):
+    topology = SyntheticTopology('ring', size)
+    # Two routers are a single link, not two parallel ones
+    for number in range(size if size > 2 else size - 1):
+        topology.link(number, (number + 1) % size)
+    return topology
+
+
+def grid(size):
+    """Routers on a square-ish grid, each one linked to its right and lower neighbor."""
+    topology = SyntheticTopology('grid', size)
+    width = max(1, math.isqrt(size))
+    for number in range(size):
+        if (number + 1) % width and number + 1 < size:
+            topology.link(number, number + 1)
+        if number + width < size:
+            topology.link(number, number + width)
+    return topology
+
+
+def multi_area(size, area_size=10):
+    """Rings of area_size routers, each hanging off an area border router on a shared backbone segment."""
+    topology = SyntheticTopology('multi-area', size)
+    borders = list(range(0, size, area_size))
+    for border in borders:
+        area = list(range(border, min(border + area_size, size)))
+        for position, number in enumerate(area[:-1]):
+            topology.link(number, area[position + 1])
+        if len(area) > 2:
+            topology.link(area[-1], border)
+    if len(borders) > 1:
+        topology.segment(borders, speed=10 * LINK_SPEED)
+    return topology
+
+
+def hub_and_spoke(size, spokes_per_hub=50):
+    """Hubs meshed together, every other router a spoke with a single link to its hub."""
+    topology = SyntheticTopology('hub-and-spoke', size)
+    hubs = list(range(0, size, spokes_per_hub + 1))
+    for position, hub in enumerate(hubs):
+        for other_hub in hubs[position + 1:]:
+            topology.link(hub, other_hub, speed=10 * LINK_SPEED)
+        for spoke in range(hub + 1, min(hub + spokes_per_hub + 1, size)):
+            topology.link(hub, spoke)
+    return topology
+
+
+GENERATORS = {
+    'ring': ring,
+    'grid': grid,
+    'multi-area': multi_area,
+    'hub-and-spoke': hub_and_spoke,
+}
+
+
+def generate(kind, size):
+    topology = GENERATORS[kind](size)
+    if not topology.routers[0].interfaces:
+        # A single router has no link, give it a stub LAN to be reached on
+        topology.segment([0])
+    return topology
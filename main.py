@@ -1,7 +1,11 @@
 import argparse
+import time
 from network.network_manager import NetworkManager
-from easysnmp import Session
-from network.network_plot_maker.plot_maker import draw_network_map
+from network.network_classes.NetworkExplorer import DEFAULT_WORKERS
+from network.network_classes.SessionManager import DEFAULT_MAX_SESSIONS
+from network.path_finder import METRICS, DEFAULT_REFERENCE_BANDWIDTH
+from network.daemon import DEFAULT_PORT, DEFAULT_REFRESH_INTERVAL, serve
+from network.interface_poller import DEFAULT_INTERVAL, InterfacePoller, print_interface_load
 
 
 def main():
@@ -12,21 +16,111 @@ def main():
     parser.add_argument('--print-routers', '-r', action='store_true', help="Print routers")
     parser.add_argument('--create-network-graph', '-g', action='store_true', help="Create network graph")
     parser.add_argument('--graph-file', default='', help="File name (Default=network_map)")
+    parser.add_argument('--renderer', choices=('matplotlib', 'graphviz'), default='matplotlib',
+                        help="Graph renderer, graphviz scales to large networks (Default=matplotlib)")
     parser.add_argument('--all', '-a', action='store_true', help="Execute all actions")
     parser.add_argument('--path', '-p', nargs=2, metavar=('ORIGIN', 'DEST'), help="Find the shortest path between two ips")
-
+    parser.add_argument('--trace', '-t', nargs=2, metavar=('ORIGIN', 'DEST'),
+                        help="Follow the routing tables hop by hop between two ips")
+    parser.add_argument('--metric', choices=METRICS, default='hops',
+                        help="Cost of the links for --path: hop count or OSPF cost from the bandwidth (Default=hops)")
+    parser.add_argument('--reference-bandwidth', type=int, default=DEFAULT_REFERENCE_BANDWIDTH // 1000000,
+                        metavar='MBPS', help="OSPF reference bandwidth of the bandwidth metric (Default=100)")
+    parser.add_argument('--route-summary', '-s', action='store_true',
+                        help="Print the shortest path between every pair of ips")
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help=f"Routers polled concurrently during discovery (Default={DEFAULT_WORKERS})")
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS, metavar='N',
+                        help=f"SNMP sessions kept open at once (Default={DEFAULT_MAX_SESSIONS})")
+    parser.add_argument('--from-snapshot', metavar='FILE', help="Load the network from a snapshot instead of SNMP")
+    parser.add_argument('--save-snapshot', metavar='FILE', help="Save the discovered network to a snapshot")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Walk again only the routers of the snapshot that changed since it was saved")
+    parser.add_argument('--columnar-routes', action='store_true',
+                        help="Store routing tables as compact columns, for networks with very large tables")
+    parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                        help="Stop polling routers after this time and report the ones left as unreachable")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print the time of each phase and the SNMP requests sent to each router and OID")
+    parser.add_argument('--profile-json', metavar='FILE', help="Also write the profile as JSON, implies --profile")
+    parser.add_argument('--serve', nargs='?', type=int, const=DEFAULT_PORT, metavar='PORT',
+                        help=f"Keep the network in memory and answer queries on localhost (Default={DEFAULT_PORT})")
+    parser.add_argument('--refresh-interval', type=float, default=DEFAULT_REFRESH_INTERVAL, metavar='SECONDS',
+                        help="Seconds between refreshes of a served network, 0 never "
+                             f"(Default={DEFAULT_REFRESH_INTERVAL})")
+    parser.add_argument('--live-traps', nargs='?', type=int, const=162, metavar='PORT',
+                        help="With --serve, update the routers OSPF traps received on this UDP port are about "
+                             "(Default=162)")
+    parser.add_argument('--poll-interfaces', nargs='?', type=float, const=DEFAULT_INTERVAL, metavar='SECONDS',
+                        help="Poll the load of every interface twice this many seconds apart and print it, with "
+                             f"--serve keep polling it and answer it on /interfaces (Default={DEFAULT_INTERVAL:g})")
+    parser.add_argument('--metrics-store', metavar='DIR',
+                        help="With --poll-interfaces, keep the history of the samples in this metric store")
+    parser.add_argument('--remote', metavar='HOST:PORT', help="Send the queries to a network served with --serve")
 
     args = parser.parse_args()
 
-    if not args.router_ip and not args.all:
-        parser.error("Router's IP is required or use --all option")
+    if not args.router_ip and not args.all and not args.from_snapshot and not args.remote:
+        parser.error("Router's IP is required or use --all, --from-snapshot or --remote options")
+
+    if args.refresh and not args.from_snapshot and not args.remote:
+        parser.error("--refresh needs the previous state given with --from-snapshot or --remote")
+
+    if args.remote and (args.create_network_graph or args.save_snapshot or args.from_snapshot or args.serve
+                        or args.profile or args.profile_json or args.poll_interfaces is not None):
+        parser.error("--remote only answers printing, --path, --trace, --route-summary and --refresh")
+
+    if args.poll_interfaces is not None and args.poll_interfaces <= 0:
+        parser.error("--poll-interfaces needs a positive number of seconds")
+
+    if args.metrics_store and args.poll_interfaces is None:
+        parser.error("--metrics-store needs --poll-interfaces")
+
+    if args.live_traps is not None and args.serve is None:
+        parser.error("--live-traps needs --serve")
 
     if args.all:
         args.print_networks = True
         args.print_routers = True
-        args.create_network_graph = True
+        # A served network is not drawn by its clients
+        args.create_network_graph = not args.remote
+
+    metrics_store = None
+    if args.metrics_store:
+        # numpy is only needed by the store
+        from metrics.store import MetricStore
+        metrics_store = MetricStore(args.metrics_store)
+
+    profiler = None
+    if args.profile or args.profile_json:
+        from network.profiler import Profiler
+        profiler = Profiler()
 
-    nm = NetworkManager(args.router_ip, args.community_string)
+    if args.remote:
+        from network.daemon import RemoteNetwork
+        nm = RemoteNetwork(args.remote)
+    elif args.from_snapshot:
+        nm = NetworkManager.from_snapshot(args.from_snapshot, args.community_string, args.workers, args.max_sessions,
+                                          args.columnar_routes, profiler, args.deadline)
+    else:
+        nm = NetworkManager(args.router_ip, args.community_string, args.workers, args.max_sessions,
+                            columnar_routes=args.columnar_routes, profiler=profiler, deadline=args.deadline)
+
+    if args.refresh:
+        print("Changed routers:")
+        for router, changes in nm.refresh():
+            print(f"{router.name} ({router.ip}): {', '.join(sorted(changes))}")
+
+    unreachable_routers, unreachable_ips = nm.get_unreachable()
+    if unreachable_routers or unreachable_ips:
+        print("Unreachable routers, results are partial:")
+        for router in unreachable_routers:
+            print(f"{router.name} ({router.ip})")
+        for ip in unreachable_ips:
+            print(f"? ({ip})")
+
+    if args.save_snapshot:
+        nm.save_snapshot(args.save_snapshot)
 
     if args.print_networks:
         nm.print_networks()
@@ -35,12 +129,45 @@ def main():
         nm.print_routers()
 
     if args.create_network_graph:
-        draw_network_map(nm, args.graph_file)
+        with nm.phase('rendering'):
+            if args.renderer == 'graphviz':
+                from network.network_plot_maker.dot_renderer import render_network_map
+                render_network_map(nm, args.graph_file)
+            else:
+                # matplotlib and networkx take longer to import than most runs take, only load them to draw
+                from network.network_plot_maker.plot_maker import draw_network_map
+                draw_network_map(nm, args.graph_file)
+
+    if args.route_summary:
+        nm.print_route_summary()
 
     if args.path:
-        path = nm.get_shortest_path(args.path[0], args.path[1])
+        path = nm.get_shortest_path(args.path[0], args.path[1], args.metric, args.reference_bandwidth * 1000000)
         print([router.name for router in path])
 
+    if args.trace:
+        path, result = nm.trace_route(args.trace[0], args.trace[1])
+        print(f"{[router.name for router in path]} ({result})")
+
+    if args.poll_interfaces is not None and args.serve is None:
+        # Rates come from the difference between two reads of the counters
+        poller = InterfacePoller(nm, args.poll_interfaces, args.workers,
+                                 on_samples=metrics_store.write_interface_samples if metrics_store else None)
+        poller.poll_all()
+        time.sleep(args.poll_interfaces)
+        print_interface_load(poller.poll_all())
+        if metrics_store is not None:
+            metrics_store.close()
+
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile_json:
+            profiler.dump_json(args.profile_json)
+
+    if args.serve is not None:
+        serve(nm, port=args.serve, refresh_interval=args.refresh_interval, trap_port=args.live_traps,
+              poll_interval=args.poll_interfaces, metrics_store=metrics_store)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,53 @@
+import argparse
+import sys
+from datetime import datetime
+
+from metrics.store import AUTO, DEFAULT_STORE, RAW, DEFAULT_ROLLUPS, MetricStore
+from traps.__main__ import timestamp
+
+
+def _format(value):
+    return f"{value:.6g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m metrics')
+    parser.add_argument('--store', default=DEFAULT_STORE, metavar='DIR', help=f"Metric store (Default={DEFAULT_STORE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help="Print the metric families of the store and their number of series")
+
+    query_parser = commands.add_parser('query', help="Print the points of the series of a router")
+    query_parser.add_argument('family', help="Metric family, such as in_utilization")
+    query_parser.add_argument('router', help="Router name")
+    query_parser.add_argument('--interface', help="Interface name, every interface of the router without it")
+    query_parser.add_argument('--since', type=timestamp, metavar='WHEN',
+                              help="Only points after, a duration ago like 7d or an ISO date")
+    query_parser.add_argument('--until', type=timestamp, metavar='WHEN', help="Only points before")
+    query_parser.add_argument('--resolution', choices=(RAW, *DEFAULT_ROLLUPS, AUTO), default=AUTO,
+                              help="Raw samples, a rollup, or the finest one holding --since (Default=auto)")
+
+    args = parser.parse_args(argv)
+    store = MetricStore(args.store, read_only=True)
+
+    if args.command == 'list':
+        for family in store.families():
+            print(f"{family}: {len(store.series(family))} series")
+
+    elif args.command == 'query':
+        interfaces = [interface for router, interface in store.series(args.family)
+                      if router == args.router and args.interface in (None, interface)]
+        for interface in interfaces:
+            series = store.read(args.family, args.router, interface, args.since, args.until, args.resolution)
+            print(f"{args.router} {interface}:")
+            columns = [series.time.tolist(), series.value.tolist()]
+            if series.min is not None:
+                columns += [series.min.tolist(), series.max.tolist()]
+            for point_time, *values in zip(*columns):
+                print(f"  {datetime.fromtimestamp(point_time).isoformat(sep=' ', timespec='seconds')} "
+                      f"{' '.join(_format(value) for value in values)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
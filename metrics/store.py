@@ -0,0 +1,344 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_STORE = '/tmp/metrics'
+RAW = 'raw'
+# Resolution of a read picked by the range it covers
+AUTO = 'auto'
+# Samples kept per series: 6 hours of 30 s polls
+DEFAULT_RAW_CAPACITY = 720
+# Rollup name -> (seconds per bucket, buckets kept per series): a day of 1m, a week of 5m, 90 days of 1h
+DEFAULT_ROLLUPS = {'1m': (60, 1440), '5m': (300, 2016), '1h': (3600, 2160)}
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Series rows a ring file grows by when it runs out of them
+SERIES_CHUNK = 256
+
+MAGIC = b'RINGBUF1'
+VERSION = 1
+HEADER_DTYPE = np.dtype({'names': ['magic', 'version', 'capacity', 'resolution'],
+                         'formats': ['S8', '<u4', '<u4', '<f8'], 'offsets': [0, 8, 12, 16], 'itemsize': 64})
+RAW_FIELDS = (('time', '<f8'), ('value', '<f8'))
+# Rollup buckets keep their start time, the mean of their samples, their extremes and how many there were
+ROLLUP_FIELDS = RAW_FIELDS + (('min', '<f8'), ('max', '<f8'), ('count', '<u4'))
+
+# Families written from InterfaceSample fields of the same name
+INTERFACE_FAMILIES = ('in_bps', 'out_bps', 'in_utilization', 'out_utilization', 'in_errors', 'out_errors')
+
+# Points of a series read from a ring, views of the file. min, max and count are None for raw samples.
+Series = namedtuple('Series', ['time', 'value', 'min', 'max', 'count'])
+
+
+def block_dtype(capacity, fields):
+    """One series: how many points it was written, then every field twice capacity long.
+
+    Each point is written at its position and again capacity further, so the latest capacity points are
+    always contiguous from the oldest one and a range of them is read as a slice without copying.
+    """
+    return np.dtype([('written', '<u8')] + [(name, dtype, (2 * capacity,)) for name, dtype in fields])
+
+
+class RingFile:
+    """Fixed-capacity ring of points for every series of a metric family, in one memory-mapped file.
+
+    The file is a header followed by one block per series, numbered like the family's series list. It grows
+    by SERIES_CHUNK blocks when new series need them, the blocks themselves never grow.
+    """
+
+    def __init__(self, path, capacity, resolution=0.0, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        if not os.path.exists(path):
+            if read_only:
+                raise FileNotFoundError(path)
+            header = np.zeros((), dtype=HEADER_DTYPE)
+            header['magic'], header['version'] = MAGIC, VERSION
+            header['capacity'], header['resolution'] = capacity, resolution
+            with open(path, 'wb') as file:
+                file.write(header.tobytes())
+
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+        if header['magic'] != MAGIC or header['version'] != VERSION:
+            raise ValueError(f"{path} is not a ring file")
+        # An existing file keeps the capacity it was created with
+        self.capacity = int(header['capacity'])
+        self.resolution = float(header['resolution'])
+        self.fields = ROLLUP_FIELDS if self.resolution else RAW_FIELDS
+        self.dtype = block_dtype(self.capacity, self.fields)
+        self.blocks = None
+        self._map()
+
+    def _map(self):
+        rows = (os.path.getsize(self.path) - HEADER_DTYPE.itemsize) // self.dtype.itemsize
+        self.blocks = np.memmap(self.path, dtype=self.dtype, mode='r' if self.read_only else 'r+',
+                                offset=HEADER_DTYPE.itemsize, shape=(rows,)) if rows else None
+        # Views of every field across the series, taking one from a memmap costs more than the writes to it
+        self.columns = {name: np.asarray(self.blocks)[name] for name in self.dtype.names} if rows else {}
+
+    def rows(self):
+        return len(self.blocks) if self.blocks is not None else 0
+
+    def reserve(self, rows):
+        """Makes room for at least this many series, the new blocks are sparse until written."""
+        if rows <= self.rows():
+            return
+        rows = -(-rows // SERIES_CHUNK) * SERIES_CHUNK
+        self.flush()
+        with open(self.path, 'r+b') as file:
+            file.truncate(HEADER_DTYPE.itemsize + rows * self.dtype.itemsize)
+        self._map()
+
+    def append(self, rows, times, values):
+        """Adds a point to each series of rows, which must be unique. Points older than a series' last are dropped.
+
+        A rollup adds each point to the bucket it falls in, updating the latest bucket in place.
+        """
+        columns = self.columns
+        capacity = self.capacity
+        written = columns['written'][rows]
+        last = (written.astype(np.int64) - 1) % capacity
+        last_times = np.where(written > 0, columns['time'][rows, last], -np.inf)
+        if self.resolution:
+            times = np.floor(times / self.resolution) * self.resolution
+            same = (written > 0) & (times == last_times)
+            if same.any():
+                self._add_to_buckets(rows[same], last[same], values[same])
+        new = times > last_times
+        if not new.any():
+            return
+        rows, times, values = rows[new], times[new], values[new]
+        positions = (written[new] % capacity).astype(np.int64)
+        new_points = {'time': times, 'value': values}
+        if self.resolution:
+            new_points.update({'min': values, 'max': values, 'count': 1})
+        for name, points in new_points.items():
+            columns[name][rows, positions] = points
+            columns[name][rows, positions + capacity] = points
+        # Counted last, a reader never sees a point before it is written
+        columns['written'][rows] = written[new] + 1
+
+    def _add_to_buckets(self, rows, positions, values):
+        columns = self.columns
+        count = columns['count'][rows, positions] + 1
+        mean = columns['value'][rows, positions]
+        updated = {'value': mean + (values - mean) / count, 'count': count,
+                   'min': np.minimum(columns['min'][rows, positions], values),
+                   'max': np.maximum(columns['max'][rows, positions], values)}
+        for name, points in updated.items():
+            columns[name][rows, positions] = points
+            columns[name][rows, positions + self.capacity] = points
+
+    def read(self, row, start=None, end=None):
+        """Points of a series from start to end, end excluded, as views of the file."""
+        if self.read_only and row >= self.rows():
+            # Grown by the writer since it was mapped
+            self._map()
+        if row >= self.rows():
+            return None
+        columns = self.columns
+        written = int(columns['written'][row])
+        kept = min(written, self.capacity)
+        first = (written - kept) % self.capacity
+        times = columns['time'][row, first:first + kept]
+        low = first + (int(np.searchsorted(times, start)) if start is not None else 0)
+        high = first + (int(np.searchsorted(times, end)) if end is not None else kept)
+        points = {name: columns[name][row, low:high] for name, _ in self.fields}
+        return Series(points['time'], points['value'], points.get('min'), points.get('max'), points.get('count'))
+
+    def is_full(self, row):
+        return int(self.columns['written'][row]) >= self.capacity
+
+    def oldest(self, row):
+        """Time of the oldest point a series still has."""
+        written = int(self.columns['written'][row])
+        return float(self.columns['time'][row, (written - min(written, self.capacity)) % self.capacity]) \
+            if written else None
+
+    def flush(self):
+        if self.blocks is not None and not self.read_only:
+            self.blocks.flush()
+
+
+class MetricStore:
+    """Bounded history of metrics, a set of ring files per metric family with its series and rollups.
+
+    A family, such as in_utilization, has one point per sample for each of its series, (router, interface)
+    pairs, or (router, '') for router metrics. Its raw samples go to a ring of raw_capacity points per series
+    and are added to every rollup ring as they arrive, so a week of 5m buckets is read without going over
+    the raw samples. Rings never grow past their capacity, only new series make the files bigger.
+
+    Samples are written in batches like a TrapStore does, so the rings are updated with one numpy operation
+    per family instead of one per sample. A store opened read_only, from another process, maps the same
+    files and sees the points as soon as they are written.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE, raw_capacity=DEFAULT_RAW_CAPACITY, rollups=None,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL, read_only=False):
+        self.directory = directory
+        self.raw_capacity = raw_capacity
+        self.rollups = rollups if rollups is not None else DEFAULT_ROLLUPS
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        # family -> list of (router, interface), and the row of each of them
+        self.series_keys = {}
+        self.series_rows = {}
+        self.rings = {}
+        # family -> list of (router, interface, time, value) not written yet
+        self.pending = {}
+        self.pending_count = 0
+        self.pending_since = None
+        self.lock = threading.Lock()
+
+    def _path(self, family, name):
+        return os.path.join(self.directory, f"{family}.{name}.ring")
+
+    def _series_path(self, family):
+        return os.path.join(self.directory, f"{family}.series.json")
+
+    def families(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len('.series.json')] for name in os.listdir(self.directory)
+                      if name.endswith('.series.json'))
+
+    def _load_series(self, family):
+        try:
+            with open(self._series_path(family)) as file:
+                keys = [tuple(key) for key in json.load(file)]
+        except FileNotFoundError:
+            keys = []
+        self.series_keys[family] = keys
+        self.series_rows[family] = {key: row for row, key in enumerate(keys)}
+
+    def _save_series(self, family):
+        path = self._series_path(family)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.series_keys[family], file)
+        os.replace(path + '.tmp', path)
+
+    def series(self, family):
+        """(router, interface) of every series of a family, read again from disk by a read-only store."""
+        if self.read_only or family not in self.series_keys:
+            self._load_series(family)
+        return list(self.series_keys[family])
+
+    def _rings(self, family):
+        rings = self.rings.get(family)
+        if rings is None:
+            rings = {RAW: RingFile(self._path(family, RAW), self.raw_capacity, read_only=self.read_only)}
+            for name, (resolution, capacity) in self.rollups.items():
+                path = self._path(family, name)
+                if not self.read_only or os.path.exists(path):
+                    rings[name] = RingFile(path, capacity, resolution, self.read_only)
+            self.rings[family] = rings
+        return rings
+
+    def _row(self, family, router, interface):
+        if family not in self.series_rows:
+            self._load_series(family)
+        row = self.series_rows[family].get((router, interface))
+        if row is None and self.read_only:
+            self._load_series(family)
+            row = self.series_rows[family].get((router, interface))
+        return row
+
+    def write(self, family, router, interface, sample_time, value):
+        """Adds a sample to a series, a None value is skipped."""
+        if value is None:
+            return
+        with self.lock:
+            self.pending.setdefault(family, []).append((router, interface, sample_time, value))
+            self.pending_count += 1
+            if self.pending_since is None:
+                self.pending_since = time.monotonic()
+            if (self.pending_count >= self.batch_size
+                    or time.monotonic() - self.pending_since >= self.flush_interval):
+                self._flush()
+
+    def write_interface_samples(self, samples):
+        """Adds the InterfaceSamples of a poll to the INTERFACE_FAMILIES, an InterfacePoller on_samples."""
+        for sample in samples:
+            for family in INTERFACE_FAMILIES:
+                self.write(family, sample.router.name, sample.interface.name, sample.time, getattr(sample, family))
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending = self.pending, {}
+        self.pending_count = 0
+        self.pending_since = None
+        for family, samples in pending.items():
+            self._write_family(family, samples)
+
+    def _write_family(self, family, samples):
+        if family not in self.series_rows:
+            self._load_series(family)
+        keys = self.series_keys[family]
+        rows_of = self.series_rows[family]
+        known = len(keys)
+        rows = []
+        for router, interface, _, _ in samples:
+            row = rows_of.get((router, interface))
+            if row is None:
+                row = rows_of[router, interface] = len(keys)
+                keys.append((router, interface))
+            rows.append(row)
+        rings = self._rings(family)
+        for ring in rings.values():
+            ring.reserve(len(keys))
+        # The series list is saved before their points, a reader never finds points of an unknown series
+        if len(keys) > known:
+            self._save_series(family)
+
+        rows = np.array(rows, dtype=np.int64)
+        times = np.array([sample[2] for sample in samples], dtype=np.float64)
+        values = np.array([sample[3] for sample in samples], dtype=np.float64)
+        # Every ring is appended once per series at a time, a series sampled twice in a batch goes in two rounds
+        order = np.argsort(times, kind='stable')
+        rows, times, values = rows[order], times[order], values[order]
+        while len(rows):
+            _, first = np.unique(rows, return_index=True)
+            for ring in rings.values():
+                ring.append(rows[first], times[first], values[first])
+            rest = np.ones(len(rows), dtype=bool)
+            rest[first] = False
+            rows, times, values = rows[rest], times[rest], values[rest]
+
+    def read(self, family, router, interface='', start=None, end=None, resolution=RAW):
+        """Points of a series from start to end, end excluded, at a resolution: raw, a rollup name or auto.
+
+        Auto reads the finest ring still holding points as old as start. The points are views of the
+        memory-mapped ring, valid until the store is closed. None for an unknown series.
+        """
+        row = self._row(family, router, interface)
+        if row is None or not os.path.exists(self._path(family, RAW)):
+            return None
+        rings = self._rings(family)
+        if resolution != AUTO:
+            if resolution not in rings:
+                raise ValueError(f"Unknown resolution {resolution}, expected {', '.join((RAW, *self.rollups, AUTO))}")
+            return rings[resolution].read(row, start, end)
+
+        series = None
+        for ring in sorted(rings.values(), key=lambda ring: ring.resolution):
+            series = ring.read(row, start, end)
+            if series is None or start is None or not ring.is_full(row) or ring.oldest(row) <= start:
+                break
+        return series
+
+    def close(self):
+        self.flush()
+        for rings in self.rings.values():
+            for ring in rings.values():
+                ring.flush()
+        self.rings = {}
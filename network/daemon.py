@@ -0,0 +1,307 @@
+import json
+import logging
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from network.interface_poller import InterfacePoller, sample_to_dict
+from network.network_classes.Ip import Ip
+from network.path_finder import METRICS, DEFAULT_REFERENCE_BANDWIDTH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8161
+DEFAULT_REFRESH_INTERVAL = 300
+CLIENT_TIMEOUT = 30
+# Traps received within this many seconds are applied together, so a flap re-polls each router once
+LIVE_FLUSH_INTERVAL = 1.0
+
+# Router of a path or trace answered by a daemon, only what printing needs
+RemoteRouter = namedtuple('RemoteRouter', ['name', 'ip'])
+
+
+class QueryError(ValueError):
+    pass
+
+
+def cidr(network):
+    return f"{network.get_ip()}/{network.get_mask().prefix_length}"
+
+
+def router_to_dict(router):
+    return {
+        'name': router.name,
+        'ip': str(router.ip),
+        'router_id': router.router_id,
+        'reachable': router.reachable,
+        'interfaces': [{'name': interface.name, 'ip': str(interface.ip), 'network': cidr(interface.network),
+                        'speed': interface.speed, 'index': interface.index}
+                       for interface in router.get_interfaces()],
+        'routes': [{'network': cidr(network), 'next_hop': str(next_hop), 'type': str(route_type)}
+                   for network, next_hop, route_type in router.get_routing_table()],
+    }
+
+
+def path_to_list(path):
+    return [{'name': router.name, 'ip': str(router.ip)} for router in path]
+
+
+class TopologyService:
+    """Answers queries from a NetworkManager kept in memory, refreshed in the background every refresh_interval.
+
+    A refresh walks the routers outside the lock, queries only wait while the walked routers are swapped in.
+    """
+
+    def __init__(self, network_manager, refresh_interval=DEFAULT_REFRESH_INTERVAL, poller: InterfacePoller = None):
+        self.network_manager = network_manager
+        self.refresh_interval = refresh_interval
+        self.poller = poller
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.refresher = None
+
+    def start_refreshing(self):
+        if self.refresh_interval and self.refresher is None:
+            self.refresher = threading.Thread(target=self._refresh_loop, name='topology-refresh', daemon=True)
+            self.refresher.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.poller is not None:
+            self.poller.stop()
+
+    def _refresh_loop(self):
+        while not self.stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # The thread must outlive a failed refresh, or the topology served would stop changing
+                logger.exception("Refreshing the network failed, trying again in %s s", self.refresh_interval)
+
+    def refresh(self):
+        with self.network_manager.walk_lock:
+            walk = self.network_manager.walk_refresh()
+            with self.lock:
+                changed_routers = self.network_manager.apply_refresh(walk)
+        return [{'name': router.name, 'ip': str(router.ip), 'changes': sorted(changes)}
+                for router, changes in changed_routers]
+
+    def routers(self):
+        with self.lock:
+            return [router_to_dict(router) for router in self.network_manager.routers]
+
+    def networks(self):
+        with self.lock:
+            return [{'network': cidr(network), 'routers': [router.name for router in network.get_hosts()]}
+                    for network in self.network_manager.networks]
+
+    def unreachable(self):
+        with self.lock:
+            unreachable_routers, unreachable_ips = self.network_manager.get_unreachable()
+            return {'routers': path_to_list(unreachable_routers), 'ips': unreachable_ips}
+
+    def path(self, origin, destination, metric='hops', reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH):
+        if metric not in METRICS:
+            raise QueryError(f"Unknown metric {metric}, expected one of {', '.join(METRICS)}")
+        if reference_bandwidth <= 0:
+            raise QueryError(f"Invalid reference bandwidth {reference_bandwidth}, expected a positive number of bps")
+        with self.lock:
+            path = self.network_manager.get_shortest_path(origin, destination, metric, reference_bandwidth)
+            return {'path': path_to_list(path) if path is not None else None}
+
+    def trace(self, origin, destination):
+        with self.lock:
+            path, result = self.network_manager.trace_route(origin, destination)
+            return {'path': path_to_list(path), 'result': result}
+
+    def interfaces(self):
+        if self.poller is None:
+            raise QueryError("Interfaces are not polled, serve with --poll-interfaces")
+        # The poller keeps its own lock, a refresh does not hold back load queries
+        return [sample_to_dict(sample) for sample in self.poller.latest_samples()]
+
+    def route_summary(self):
+        with self.lock:
+            return [{'origin': origin, 'destination': destination, 'path': path}
+                    for origin, destination, path in self.network_manager.get_route_summary().summary()]
+
+
+def _ip_parameter(parameters, name):
+    values = parameters.get(name)
+    if not values:
+        raise QueryError(f"Missing parameter {name}")
+    try:
+        Ip(values[0])
+    except ValueError:
+        raise QueryError(f"Invalid IP {values[0]} for {name}")
+    return values[0]
+
+
+def answer_query(service: TopologyService, method, path):
+    """Answers GET /routers, /networks, /unreachable, /path, /trace, /route-summary and /interfaces, and POST /refresh.
+
+    Returns the HTTP status and the JSON-able answer.
+    """
+    url = urlsplit(path)
+    parameters = parse_qs(url.query)
+    try:
+        if method == 'POST' and url.path == '/refresh':
+            return 200, service.refresh()
+        if method != 'GET':
+            return 404, {'error': f"Unknown query {method} {url.path}"}
+
+        if url.path == '/routers':
+            return 200, service.routers()
+        if url.path == '/networks':
+            return 200, service.networks()
+        if url.path == '/unreachable':
+            return 200, service.unreachable()
+        if url.path == '/path':
+            reference_bandwidth = parameters.get('reference_bandwidth', [DEFAULT_REFERENCE_BANDWIDTH])[0]
+            return 200, service.path(_ip_parameter(parameters, 'origin'), _ip_parameter(parameters, 'destination'),
+                                     parameters.get('metric', ['hops'])[0], int(reference_bandwidth))
+        if url.path == '/trace':
+            return 200, service.trace(_ip_parameter(parameters, 'origin'), _ip_parameter(parameters, 'destination'))
+        if url.path == '/route-summary':
+            return 200, service.route_summary()
+        if url.path == '/interfaces':
+            return 200, service.interfaces()
+    except (QueryError, ValueError) as error:
+        return 400, {'error': str(error)}
+    return 404, {'error': f"Unknown query {url.path}"}
+
+
+def make_server(service: TopologyService, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """HTTP server answering queries from the service, port 0 picks a free port."""
+    # Only a daemon needs the HTTP server, loading it here keeps it out of every other run
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._reply(*answer_query(service, 'GET', self.path))
+
+        def do_POST(self):
+            self._reply(*answer_query(service, 'POST', self.path))
+
+        def _reply(self, status, answer):
+            body = json.dumps(answer).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Thousands of queries an hour, logging each of them costs more than answering it
+            pass
+
+    return ThreadingHTTPServer((host, port), QueryHandler)
+
+
+def start_live_updates(service: TopologyService, trap_port, community=None):
+    """Receives traps on trap_port in a background thread and applies them to the served network."""
+    import asyncio
+    from network.live_updater import LiveUpdater
+    from traps.receiver import listen
+
+    updater = LiveUpdater(service.network_manager, service.lock)
+    thread = threading.Thread(target=asyncio.run, name='live-updates', daemon=True,
+                              args=(listen(updater, port=trap_port, community=community,
+                                           flush_interval=LIVE_FLUSH_INTERVAL),))
+    thread.start()
+    return updater
+
+
+def serve(network_manager, host=DEFAULT_HOST, port=DEFAULT_PORT, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+          trap_port=None, poll_interval=None, metrics_store=None):
+    """Answers queries about the network until interrupted, refreshing it in the background.
+
+    With a trap_port, the OSPF traps received on it update the routers they are about as they arrive. With a
+    poll_interval, the load of every interface is polled that often and answered on /interfaces, and kept in
+    the metrics_store when given.
+    """
+    on_samples = metrics_store.write_interface_samples if metrics_store is not None else None
+    poller = InterfacePoller(network_manager, poll_interval, on_samples=on_samples) if poll_interval else None
+    service = TopologyService(network_manager, refresh_interval, poller)
+    service.start_refreshing()
+    if poller is not None:
+        poller.start()
+    if trap_port is not None:
+        start_live_updates(service, trap_port, network_manager.community)
+    server = make_server(service, host, port)
+    print(f"Serving the network on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+        if metrics_store is not None:
+            metrics_store.close()
+
+
+class RemoteNetwork:
+    """Client of a daemon, answers like a NetworkManager for the queries main can send it."""
+
+    def __init__(self, address):
+        self.url = address if address.startswith('http') else f"http://{address}"
+
+    def query(self, endpoint, method='GET', **parameters):
+        from urllib.error import HTTPError
+        from urllib.request import Request, urlopen
+
+        url = f"{self.url}/{endpoint}"
+        if parameters:
+            url += '?' + urlencode(parameters)
+        try:
+            with urlopen(Request(url, method=method), timeout=CLIENT_TIMEOUT) as response:
+                return json.load(response)
+        except HTTPError as error:
+            raise QueryError(json.load(error).get('error', str(error)))
+
+    def refresh(self):
+        return [(RemoteRouter(router['name'], router['ip']), set(router['changes']))
+                for router in self.query('refresh', method='POST')]
+
+    def get_unreachable(self):
+        unreachable = self.query('unreachable')
+        return ([RemoteRouter(router['name'], router['ip']) for router in unreachable['routers']],
+                unreachable['ips'])
+
+    def print_networks(self):
+        print("Printing networks:")
+        for network in self.query('networks'):
+            print(f"Network: {network['network']} {network['routers']}")
+
+    def print_routers(self):
+        print("Printing routers:")
+        for router in self.query('routers'):
+            unreachable_str = "" if router['reachable'] else " (unreachable)"
+            interfaces_str = "".join(f"\n       Name: {interface['name']}, Ip: {interface['ip']}, "
+                                     f"Network: {interface['network']}, Speed: {interface['speed']} Mbps"
+                                     for interface in router['interfaces'])
+            routing_table_str = "".join(f"\n       Net: Network: {route['network']} Next-Hop: {route['next_hop']} "
+                                        f"Type: {route['type']}" for route in router['routes'])
+            print(f"Name: {router['name']}{unreachable_str}\n    Interfaces: {interfaces_str}\n"
+                  f"    Routing Table: {routing_table_str}")
+
+    def print_route_summary(self):
+        print("Route summary:")
+        for route in self.query('route-summary'):
+            path = route['path']
+            print(f"  {route['origin']:15} -> {route['destination']:15} {' -> '.join(path) if path else 'unreachable'}")
+
+    def get_shortest_path(self, ip_origin, ip_destination, metric='hops',
+                          reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH):
+        path = self.query('path', origin=ip_origin, destination=ip_destination, metric=metric,
+                          reference_bandwidth=reference_bandwidth)['path']
+        if path is None:
+            print(f"Router with IP {ip_origin} or {ip_destination} not found.")
+            return None
+        return [RemoteRouter(router['name'], router['ip']) for router in path]
+
+    def trace_route(self, ip_origin, ip_destination):
+        trace = self.query('trace', origin=ip_origin, destination=ip_destination)
+        return [RemoteRouter(router['name'], router['ip']) for router in trace['path']], trace['result']
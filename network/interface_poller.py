@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from network.mib_states import OPER_STATUSES
+from network.network_classes.HostMonitor import HostMonitor, is_snmp_error
+from network.network_classes.Router import NO_VALUE_TYPES
+from network.network_classes.SessionManager import SessionManager, DEFAULT_MAX_SESSIONS
+
+logger = logging.getLogger(__name__)
+
+IF_HC_IN_OCTETS_OID = "IF-MIB::ifHCInOctets"
+IF_HC_OUT_OCTETS_OID = "IF-MIB::ifHCOutOctets"
+IF_IN_OCTETS_OID = "IF-MIB::ifInOctets"
+IF_OUT_OCTETS_OID = "IF-MIB::ifOutOctets"
+IF_OPER_STATUS_OID = "IF-MIB::ifOperStatus"
+IF_IN_ERRORS_OID = "IF-MIB::ifInErrors"
+IF_OUT_ERRORS_OID = "IF-MIB::ifOutErrors"
+# Columns read for every interface, the 64-bit octet counters are replaced by the 32-bit ones on old agents
+HC_COLUMNS = (IF_HC_IN_OCTETS_OID, IF_HC_OUT_OCTETS_OID, IF_OPER_STATUS_OID, IF_IN_ERRORS_OID, IF_OUT_ERRORS_OID)
+COLUMNS_32 = (IF_IN_OCTETS_OID, IF_OUT_OCTETS_OID, IF_OPER_STATUS_OID, IF_IN_ERRORS_OID, IF_OUT_ERRORS_OID)
+VARBINDS_PER_INTERFACE = len(HC_COLUMNS)
+COUNTER_MODULUS_64 = 2 ** 64
+COUNTER_MODULUS_32 = 2 ** 32
+
+DEFAULT_INTERVAL = 30.0
+DEFAULT_WORKERS = 16
+# Varbinds per GET until an agent answers tooBig, then halved for that agent
+DEFAULT_MAX_VARBINDS = 60
+# A delta implying more than this many times the interface speed is a counter reset, not traffic
+RESET_FACTOR = 2
+
+InterfaceSample = namedtuple('InterfaceSample', ['router', 'interface', 'time', 'oper_status', 'in_bps', 'out_bps',
+                                                 'in_utilization', 'out_utilization', 'in_errors', 'out_errors'])
+
+
+def is_too_big(error):
+    """Whether the agent refused a request because its response would not fit in one message."""
+    message = str(error).lower()
+    return 'toobig' in message.replace(' ', '') or 'too large' in message
+
+
+def counter_delta(previous, current, modulus):
+    """Increase of a counter between two reads, across one wrap."""
+    return (current - previous) % modulus
+
+
+def sample_to_dict(sample):
+    return {
+        'router': sample.router.name,
+        'interface': sample.interface.name,
+        'ip': str(sample.interface.ip),
+        'time': sample.time,
+        'oper_status': sample.oper_status,
+        'in_bps': sample.in_bps,
+        'out_bps': sample.out_bps,
+        'in_utilization': sample.in_utilization,
+        'out_utilization': sample.out_utilization,
+        'in_errors': sample.in_errors,
+        'out_errors': sample.out_errors,
+    }
+
+
+def _percent(utilization):
+    return f"{utilization:7.2%}" if utilization is not None else '      ?'
+
+
+def print_interface_load(samples):
+    print("Interface load (in / out):")
+    for sample in sorted(samples, key=lambda sample: (sample.router.name, sample.interface.name)):
+        print(f"  {sample.router.name:10} {sample.interface.name:25} {sample.oper_status!s:8} "
+              f"{_percent(sample.in_utilization)} {_percent(sample.out_utilization)}  "
+              f"errors {sample.in_errors} / {sample.out_errors}")
+
+
+def _number(variable):
+    if variable.snmp_type in NO_VALUE_TYPES:
+        return None
+    try:
+        return int(variable.value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _RouterState:
+    """What the poller remembers of a router between polls."""
+
+    __slots__ = ('max_varbinds', 'high_capacity', 'counters')
+
+    def __init__(self, max_varbinds):
+        self.max_varbinds = max_varbinds
+        # False once the agent answered without the 64-bit counters
+        self.high_capacity = True
+        # ifIndex -> (time, in octets, out octets, in errors, out errors) of the last poll
+        self.counters = {}
+
+
+class InterfacePoller:
+    """Polls the load, status and errors of every interface of the routers of a NetworkManager.
+
+    Each router is polled once per interval with GETs packing as many interfaces as its agent accepts. The
+    routers are spread evenly over the interval, so the requests go out at a steady rate instead of in a
+    burst. Every poll hands the samples of a router to on_samples and keeps the latest one of each interface.
+    The poller opens its own sessions, the refresh and live-update walks may use theirs at the same time.
+    """
+
+    def __init__(self, network_manager, interval=DEFAULT_INTERVAL, workers=DEFAULT_WORKERS,
+                 max_varbinds=DEFAULT_MAX_VARBINDS, on_samples=None, clock=time.monotonic, wall_clock=time.time,
+                 sessions: SessionManager = None):
+        self.network_manager = network_manager
+        self.interval = interval
+        self.workers = max(1, workers)
+        self.max_varbinds = max_varbinds
+        # Adaptive timeouts per agent, without the deadline discovery may have had
+        self.sessions = sessions if sessions is not None else SessionManager(
+            max(DEFAULT_MAX_SESSIONS, self.workers), network_manager.sessions.session_factory, HostMonitor())
+        self.on_samples = on_samples
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.states = {}
+        # (router name, ifIndex) -> latest InterfaceSample
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _state(self, router):
+        state = self.states.get(router.name)
+        if state is None:
+            state = self.states[router.name] = _RouterState(self.max_varbinds)
+        return state
+
+    def _get(self, router, state, oids):
+        """GETs the OIDs in as few requests as the agent allows, returns their variables in order."""
+        session = self.sessions.get_session(router.ip, self.network_manager.community)
+        variables = []
+        position = 0
+        while position < len(oids):
+            # Whole interfaces per request, so the columns of one interface are read at the same time
+            size = max(VARBINDS_PER_INTERFACE, state.max_varbinds - state.max_varbinds % VARBINDS_PER_INTERFACE)
+            batch = oids[position:position + size]
+            try:
+                variables.extend(session.get(batch))
+            except Exception as error:
+                if not is_too_big(error) or size <= VARBINDS_PER_INTERFACE:
+                    raise
+                state.max_varbinds = size // 2
+                continue
+            position += len(batch)
+        return variables
+
+    def poll_router(self, router):
+        """Polls every interface of a router once, returns their samples, empty when it did not answer."""
+        state = self._state(router)
+        # Secondary addresses share the ifIndex of their interface, its counters are read once
+        interfaces_by_index = {}
+        for interface in router.get_interfaces():
+            if interface.index is not None:
+                interfaces_by_index.setdefault(interface.index, interface)
+        interfaces = list(interfaces_by_index.values())
+        if not interfaces:
+            return []
+
+        columns = HC_COLUMNS if state.high_capacity else COLUMNS_32
+        oids = [f"{column}.{interface.index}" for interface in interfaces for column in columns]
+        try:
+            variables = self._get(router, state, oids)
+        except Exception as error:
+            if not is_snmp_error(error):
+                raise
+            return []
+        now = self.clock()
+
+        values = [_number(variable) for variable in variables]
+        if state.high_capacity and all(value is None for value in values[::VARBINDS_PER_INTERFACE]):
+            # No 64-bit counters on this agent, the next polls read the 32-bit ones
+            state.high_capacity = False
+            state.counters = {}
+            return []
+
+        modulus = COUNTER_MODULUS_64 if state.high_capacity else COUNTER_MODULUS_32
+        samples = []
+        wall_time = self.wall_clock()
+        for number, interface in enumerate(interfaces):
+            first = number * VARBINDS_PER_INTERFACE
+            in_octets, out_octets, oper_status, in_errors, out_errors = values[first:first + VARBINDS_PER_INTERFACE]
+            current = (now, in_octets, out_octets, in_errors, out_errors)
+            previous = state.counters.get(interface.index)
+            state.counters[interface.index] = current
+            samples.append(self._sample(router, interface, wall_time, previous, current, oper_status, modulus))
+
+        with self.lock:
+            for sample in samples:
+                self.latest[router.name, sample.interface.index] = sample
+        if self.on_samples is not None:
+            self.on_samples(samples)
+        return samples
+
+    @staticmethod
+    def _sample(router, interface, wall_time, previous, current, oper_status, modulus):
+        try:
+            speed = int(interface.speed)
+        except (TypeError, ValueError):
+            speed = 0
+        status = OPER_STATUSES.get(oper_status, oper_status)
+
+        rates = [None, None]
+        errors = [None, None]
+        if previous is not None and current[0] > previous[0]:
+            elapsed = current[0] - previous[0]
+            for position in (1, 2):
+                if previous[position] is None or current[position] is None:
+                    continue
+                bps = counter_delta(previous[position], current[position], modulus) * 8 / elapsed
+                # A rebooted agent restarts its counters, the wrapped delta would be absurd
+                if speed <= 0 or bps <= speed * RESET_FACTOR:
+                    rates[position - 1] = bps
+            for position in (3, 4):
+                if previous[position] is not None and current[position] is not None:
+                    errors[position - 3] = counter_delta(previous[position], current[position], COUNTER_MODULUS_32)
+
+        utilizations = [bps / speed if bps is not None and speed > 0 else None for bps in rates]
+        return InterfaceSample(router, interface, wall_time, status, *rates, *utilizations, *errors)
+
+    def poll_all(self):
+        """Polls every router once at the same time, returns all the samples."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return [sample for samples in executor.map(self.poll_router, list(self.network_manager.routers))
+                    for sample in samples]
+
+    def run(self, rounds=None):
+        """Polls every router once per interval, spread over it, until stopped or after the given rounds."""
+        start = self.clock()
+        in_flight = set()
+        in_flight_lock = threading.Lock()
+
+        def poll(router):
+            try:
+                self.poll_router(router)
+            except Exception:
+                # Nobody waits for the poll, the error would be lost with its future
+                logger.exception("Polling the interfaces of %s failed", router.name)
+            finally:
+                with in_flight_lock:
+                    in_flight.discard(router.name)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            round_number = 0
+            while not self.stopped.is_set() and (rounds is None or round_number < rounds):
+                # Routers found since the last round are polled from this one on
+                routers = list(self.network_manager.routers)
+                round_start = start + round_number * self.interval
+                slot = self.interval / max(1, len(routers))
+                for number, router in enumerate(routers):
+                    delay = round_start + number * slot - self.clock()
+                    if delay > 0 and self.stopped.wait(delay):
+                        break
+                    with in_flight_lock:
+                        # A router still answering its previous poll skips this one rather than queue up
+                        if router.name in in_flight:
+                            continue
+                        in_flight.add(router.name)
+                    executor.submit(poll, router)
+                round_number += 1
+                # Behind schedule after a slow round, start the next one now rather than catch up with a burst
+                start = max(start, self.clock() - round_number * self.interval)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='interface-poller', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def latest_samples(self):
+        with self.lock:
+            return list(self.latest.values())
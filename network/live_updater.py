@@ -0,0 +1,120 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from network.network_manager import ADJACENCY_UP_STATES, ADJACENCY_KEPT_STATES
+
+logger = logging.getLogger(__name__)
+
+
+def _log_failure(future):
+    # The receiving loop never looks at the futures of its flushes
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Applying trap records failed", exc_info=future.exception())
+
+
+class LiveUpdater:
+    """Keeps a NetworkManager up to date from OSPF traps, re-polling only the routers a trap is about.
+
+    It is a sink of a TrapReceiver: write() collects trap records and flush() hands them to a thread applying
+    them, so the traps of a flap storm received between two flushes re-poll each router once and the receiving
+    loop never waits for a walk. The lock, when given, is only held while the walked routers are swapped in,
+    like the one a TopologyService queries the network under.
+    """
+
+    def __init__(self, network_manager, lock=None):
+        self.network_manager = network_manager
+        self.lock = lock if lock is not None else threading.Lock()
+        self.pending = []
+        self.applied = 0
+        # A single thread, the batches are applied in the order they were received
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='live-updates')
+
+    def write(self, record):
+        self.pending.append(record)
+
+    def flush(self):
+        """Hands the records written since the last flush to the updating thread.
+
+        Returns a future of the new routers they led to.
+        """
+        if not self.pending:
+            future = Future()
+            future.set_result([])
+            return future
+        records, self.pending = self.pending, []
+        future = self.executor.submit(self.apply, records)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def apply(self, records):
+        """Walks again the routers the records are about and patches the network, returns the new routers found."""
+        with self.lock:
+            routers, adjacencies = self.affected(records)
+        new_routers = []
+        if routers or adjacencies:
+            with self.network_manager.walk_lock:
+                walk = self.network_manager.walk_update(routers)
+                with self.lock:
+                    new_routers = self.network_manager.apply_update(walk, adjacencies)
+        self.applied += len(records)
+        return new_routers
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(wait=True)
+
+    def _router_of(self, record):
+        """Router sending the trap, by its OSPF router-id or else the address it was sent from."""
+        router = self.network_manager.get_router_by_router_id(record.get('ospfRouterId'))
+        if router is None and record.get('source'):
+            router = self.network_manager.get_router(record['source'])
+        return router
+
+    def _owner(self, ip):
+        if not ip:
+            return None
+        try:
+            return self.network_manager.get_interface(ip)
+        except (TypeError, ValueError):
+            return None
+
+    def affected(self, records):
+        """Routers to walk again and (router, neighbor, network, up) adjacency changes of some trap records.
+
+        Later traps about an adjacency override earlier ones, routers are listed once.
+        """
+        routers = {}
+        adjacencies = {}
+        for record in records:
+            router = self._router_of(record)
+            if router is None:
+                # Not discovered yet, it shows up as a new neighbor of the routers it is adjacent to
+                continue
+            routers[router.name] = router
+            trap = record.get('trap')
+
+            if trap == 'ospfNbrStateChange':
+                owner = self._owner(record.get('ospfNbrIpAddr'))
+                neighbor = self.network_manager.get_router_by_router_id(record.get('ospfNbrRtrId'))
+                if neighbor is None and owner is not None:
+                    neighbor = owner[0]
+                state = record.get('ospfNbrState')
+                if neighbor is None or owner is None or state in ADJACENCY_KEPT_STATES:
+                    continue
+                routers[neighbor.name] = neighbor
+                network = owner[1].network
+                adjacencies[frozenset((router.name, neighbor.name)), network] = (
+                    router, neighbor, network, state in ADJACENCY_UP_STATES)
+
+            elif trap == 'ospfIfStateChange' and record.get('ospfIfState') == 'down':
+                owner = self._owner(record.get('ospfIfIpAddress'))
+                if owner is None:
+                    continue
+                network = owner[1].network
+                for neighbor in network.get_hosts():
+                    if neighbor is not router:
+                        adjacencies[frozenset((router.name, neighbor.name)), network] = (
+                            router, neighbor, network, False)
+
+        return list(routers.values()), list(adjacencies.values())
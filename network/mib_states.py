@@ -0,0 +1,7 @@
+# Names of the enumerated states of the OSPF-MIB and IF-MIB, as the agents number them
+
+NBR_STATES = {1: 'down', 2: 'attempt', 3: 'init', 4: 'twoWay', 5: 'exchangeStart', 6: 'exchange', 7: 'loading',
+              8: 'full'}
+IF_STATES = {1: 'down', 2: 'loopback', 3: 'waiting', 4: 'pointToPoint', 5: 'designatedRouter',
+             6: 'backupDesignatedRouter', 7: 'otherDesignatedRouter'}
+OPER_STATUSES = {1: 'up', 2: 'down', 3: 'testing', 4: 'unknown', 5: 'dormant', 6: 'notPresent', 7: 'lowerLayerDown'}
@@ -0,0 +1,180 @@
+import threading
+import time
+
+# Timeouts in seconds, the initial one is used until an agent has answered once
+INITIAL_TIMEOUT = 1.0
+MIN_TIMEOUT = 0.2
+MAX_TIMEOUT = 5.0
+# Consecutive failed requests that open the circuit of a host, and how long it stays open
+FAILURE_THRESHOLD = 3
+COOLDOWN = 60.0
+# net-snmp resends a request this many times before giving up on it
+RETRIES = 1
+# A session is reopened when the timeout of its host drifted past this factor of the one it was opened with
+TIMEOUT_DRIFT = 1.5
+
+
+class HostUnreachable(Exception):
+    def __init__(self, host, reason):
+        super().__init__(f"{host} is unreachable: {reason}")
+        self.host = host
+        self.reason = reason
+
+
+def is_timeout(error):
+    """Whether an SNMP error is a timeout, easysnmp raises its own EasySNMPTimeoutError for them."""
+    return isinstance(error, TimeoutError) or type(error).__name__ == 'EasySNMPTimeoutError'
+
+
+def is_snmp_error(error):
+    """Whether an error comes from talking to an agent rather than from a bug, discovery goes on after those."""
+    return (isinstance(error, (HostUnreachable, TimeoutError, ConnectionError))
+            or type(error).__module__.split('.')[0] == 'easysnmp')
+
+
+class _HostState:
+    __slots__ = ('srtt', 'rttvar', 'timeout', 'failures', 'open_until')
+
+    def __init__(self, initial_timeout):
+        self.srtt = None
+        self.rttvar = None
+        self.timeout = initial_timeout
+        self.failures = 0
+        self.open_until = None
+
+
+class HostMonitor:
+    """Adaptive per-agent timeouts, circuit breaking of failing agents and a deadline for a whole discovery.
+
+    Timeouts follow the observed round trip times like TCP retransmission timeouts do (RFC 6298): the smoothed
+    RTT plus four times its variation, doubled after every timeout. Agents never heard from start with the
+    timeout estimated over every agent, so a dead neighbor costs what the network's RTTs allow rather than
+    the initial timeout. An agent failing FAILURE_THRESHOLD requests in a row is not asked again until
+    COOLDOWN has passed, and once the deadline passes no agent is asked.
+    """
+
+    def __init__(self, deadline=None, initial_timeout=INITIAL_TIMEOUT, min_timeout=MIN_TIMEOUT,
+                 max_timeout=MAX_TIMEOUT, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN,
+                 clock=time.monotonic):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.deadline_at = clock() + deadline if deadline is not None else None
+        self.hosts = {}
+        # RTT estimate over every agent
+        self.network = _HostState(initial_timeout)
+        self.lock = threading.Lock()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = _HostState(self.network.timeout)
+        return state
+
+    def _update_rtt(self, state, rtt):
+        if state.srtt is None:
+            state.srtt = rtt
+            state.rttvar = rtt / 2
+        else:
+            state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - rtt)
+            state.srtt = 0.875 * state.srtt + 0.125 * rtt
+        state.timeout = min(self.max_timeout, max(self.min_timeout, state.srtt + 4 * state.rttvar))
+
+    def remaining(self):
+        """Seconds left before the deadline, None without one."""
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - self.clock()
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, host):
+        """Timeout of the next request to the host, never past the deadline."""
+        with self.lock:
+            timeout = self._state(host).timeout
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = max(self.min_timeout, min(timeout, remaining))
+        return timeout
+
+    def check(self, host):
+        """Raises HostUnreachable if the host must not be asked anything now."""
+        if self.expired():
+            raise HostUnreachable(host, 'discovery deadline passed')
+        with self.lock:
+            state = self._state(host)
+            if state.open_until is not None and self.clock() < state.open_until:
+                raise HostUnreachable(host, f'{state.failures} failed requests in a row')
+
+    def record_success(self, host, rtt):
+        with self.lock:
+            state = self._state(host)
+            self._update_rtt(state, rtt)
+            self._update_rtt(self.network, rtt)
+            state.failures = 0
+            state.open_until = None
+
+    def record_failure(self, host):
+        with self.lock:
+            state = self._state(host)
+            state.failures += 1
+            state.timeout = min(self.max_timeout, state.timeout * 2)
+            if state.failures >= self.failure_threshold:
+                state.open_until = self.clock() + self.cooldown
+
+    def unreachable_hosts(self):
+        """Hosts whose circuit is open."""
+        now = self.clock()
+        with self.lock:
+            return [host for host, state in self.hosts.items()
+                    if state.open_until is not None and now < state.open_until]
+
+
+class MonitoredSession:
+    """Session of a SessionManager with a HostMonitor, asks the monitor before every request and reports back.
+
+    The session is reopened with the current adaptive timeout whenever it drifted away from the one in use.
+    """
+
+    def __init__(self, host, open_session, monitor: HostMonitor):
+        self.host = host
+        self.open_session = open_session
+        self.monitor = monitor
+        self.timeout = monitor.timeout(host)
+        self.session = open_session(self.timeout)
+
+    def _reopen_if_drifted(self):
+        timeout = self.monitor.timeout(self.host)
+        if timeout > self.timeout * TIMEOUT_DRIFT or timeout * TIMEOUT_DRIFT < self.timeout:
+            self.session = self.open_session(timeout)
+            self.timeout = timeout
+
+    def _call(self, operation, pdus, oid, *args, **kwargs):
+        self.monitor.check(self.host)
+        self._reopen_if_drifted()
+        start = self.monitor.clock()
+        try:
+            result = getattr(self.session, operation)(oid, *args, **kwargs)
+        except Exception as error:
+            if is_timeout(error):
+                self.monitor.record_failure(self.host)
+                raise HostUnreachable(self.host, 'request timed out') from error
+            raise
+        # A walk is made of several request PDUs, the RTT is their mean
+        self.monitor.record_success(self.host, (self.monitor.clock() - start) / pdus(result))
+        return result
+
+    def get(self, oids):
+        return self._call('get', lambda result: 1, oids)
+
+    def walk(self, oid):
+        return self._call('walk', lambda result: len(result) + 1, oid)
+
+    def bulkwalk(self, oid, non_repeaters=0, max_repetitions=10):
+        return self._call('bulkwalk', lambda result: len(result) // max_repetitions + 1, oid,
+                          non_repeaters=non_repeaters, max_repetitions=max_repetitions)
@@ -1,17 +1,50 @@
+import socket
+import weakref
+
+# Every address in use has a single Ip instance, the routing tables of an OSPF domain repeat the same
+# destinations and next hops. Weak values let an address go once no route or interface holds it, a daemon
+# re-walking tables and decoding traps for days would otherwise keep every address it ever saw.
+_interned_ips = weakref.WeakValueDictionary()
+
+
 class Ip:
-    def __init__(self, ip):
-        self.value = self.octets_to_int(ip)
+    __slots__ = ('value', '__weakref__')
+
+    def __new__(cls, ip):
+        return cls.from_int(cls.octets_to_int(ip))
+
+    @classmethod
+    def from_int(cls, ip_value):
+        """Returns the IP of an integer value without parsing any string."""
+        ip = _interned_ips.get(ip_value)
+        if ip is None:
+            ip = object.__new__(cls)
+            ip.value = ip_value
+            _interned_ips[ip_value] = ip
+        return ip
 
     @staticmethod
     def octets_to_int(ip):
         """Converts a dotted decimal format IP to integer."""
-        octets = map(int, ip.split('.'))
-        return sum(octet << (24 - i * 8) for i, octet in enumerate(octets))
+        try:
+            packed = socket.inet_aton(ip)
+            # inet_aton also takes 10.1, hex, octal and trailing text, only a canonical dotted quad is trusted
+            if socket.inet_ntoa(packed) == ip:
+                return int.from_bytes(packed, 'big')
+        except (OSError, TypeError):
+            pass
+        octets = ip.split('.') if isinstance(ip, str) else ()
+        if len(octets) != 4 or not all(octet.isascii() and octet.isdigit() and len(octet) <= 3 for octet in octets):
+            raise ValueError(f"Invalid IP address {ip}")
+        first, second, third, fourth = map(int, octets)
+        if max(first, second, third, fourth) > 255:
+            raise ValueError(f"Invalid IP address {ip}")
+        return first << 24 | second << 16 | third << 8 | fourth
 
     @staticmethod
     def int_to_octets(ip_value):
         """Converts an integer IP to dotted decimal format."""
-        return '.'.join(str(ip_value >> (24 - i * 8) & 0xFF) for i in range(4))
+        return f"{ip_value >> 24 & 0xFF}.{ip_value >> 16 & 0xFF}.{ip_value >> 8 & 0xFF}.{ip_value & 0xFF}"
 
     def __str__(self):
         return self.int_to_octets(self.value)
@@ -1,18 +1,43 @@
+import weakref
+
+from network.network_classes.Ip import Ip
+
+# Routes and interfaces use a handful of different masks, they all share one instance of each in use
+_interned_masks = weakref.WeakValueDictionary()
+
+
 class Netmask:
-    def __init__(self, mask):
-        self.netmask = self.cidr_to_int(mask)
-        self.wildcard = self.cidr_to_int(self.int_to_cidr(~self.netmask))
+    __slots__ = ('netmask', 'wildcard', 'prefix_length', '__weakref__')
+
+    def __new__(cls, mask):
+        return cls.from_int(cls.cidr_to_int(mask))
+
+    @classmethod
+    def from_int(cls, mask_value):
+        """Returns the netmask of an integer value without parsing any string."""
+        mask = _interned_masks.get(mask_value)
+        if mask is None:
+            mask = object.__new__(cls)
+            mask.netmask = mask_value
+            mask.wildcard = ~mask_value & 0xFFFFFFFF
+            mask.prefix_length = bin(mask_value).count('1')
+            _interned_masks[mask_value] = mask
+        return mask
+
+    @classmethod
+    def from_prefix(cls, prefix_length):
+        """Returns the netmask of a CIDR prefix length."""
+        return cls.from_int((0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF)
 
     @staticmethod
     def cidr_to_int(mask):
         """Converts a dotted decimal format IP to integer."""
-        octets = map(int, mask.split('.'))
-        return sum(octet << (24 - i * 8) for i, octet in enumerate(octets))
+        return Ip.octets_to_int(mask)
 
     @staticmethod
     def int_to_cidr(mask):
         """Converts an integer IP to dotted decimal format."""
-        return '.'.join(str(mask >> (24 - i * 8) & 0xFF) for i in range(4))
+        return Ip.int_to_octets(mask)
 
     def netmask_to_decimal(self):
         """Converts a netmask to dotted decimal format."""
@@ -24,11 +49,11 @@ class Netmask:
 
     def netmask_to_cidr(self):
         """Converts a netmask to CIDR notation."""
-        return sum(bin(int(x)).count('1') for x in self.int_to_cidr(self.netmask).split('.'))
+        return self.prefix_length
 
     def wildcard_to_cidr(self):
         """Converts a wildcard to CIDR notation."""
-        return sum(bin(int(x)).count('1') for x in self.int_to_cidr(self.wildcard).split('.'))
+        return 32 - self.prefix_length
 
     def is_host_mask(self):
         """Checks if the netmask is a host mask."""
@@ -43,4 +68,3 @@ class Netmask:
 
     def __hash__(self):
         return hash((self.netmask, self.wildcard))
-
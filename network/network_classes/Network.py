@@ -1,14 +1,16 @@
-import ipaddress
-
 from network.network_classes.Ip import Ip
 from network.network_classes.Netmask import Netmask
 
 
 class Network:
+    __slots__ = ('ip', 'mask', 'hosts', 'host_set')
+
     def __init__(self, ip: Ip, netmask: Netmask):
         self.ip = ip
         self.mask = netmask
-        self.hosts = []
+        # Only the networks of interfaces get hosts, not the ones of routes, both are created with the first host
+        self.hosts = None
+        self.host_set = None
 
     def get_ip(self):
         return Ip.int_to_octets(self.ip.value)
@@ -18,24 +20,35 @@ class Network:
         return self.mask
 
     def get_hosts(self) -> list:
-        return self.hosts
+        return self.hosts if self.hosts is not None else []
 
     def add_host(self, host):
-        if host not in self.hosts:
+        if self.host_set is None:
+            self.hosts = []
+            self.host_set = set()
+        if host not in self.host_set:
+            self.host_set.add(host)
             self.hosts.append(host)
 
+    def remove_host(self, host):
+        if self.host_set is not None and host in self.host_set:
+            self.host_set.remove(host)
+            self.hosts.remove(host)
+
+    def clear_hosts(self):
+        self.hosts = None
+        self.host_set = None
+
     def in_network(self, ip: Ip):
         """Checks if the provided IP is within the network."""
-        return self.hosts.count(ip) > 0
+        return self.host_set is not None and ip in self.host_set
 
     @staticmethod
     def translate_to_net(ip_address: Ip, subnet_mask: Netmask):
-        ip_network = ipaddress.IPv4Network(str(ip_address) + '/' + str(subnet_mask.netmask_to_cidr()), strict=False)
-        network_address = str(ip_network.network_address)
-        return Ip(network_address)
+        return Ip.from_int(ip_address.value & subnet_mask.netmask)
 
     def __str__(self):
-        return "Network: " + Ip.int_to_octets(self.ip.value) + '/' + str(self.mask.netmask_to_cidr())
+        return "Network: " + Ip.int_to_octets(self.ip.value) + '/' + str(self.mask.prefix_length)
 
     def __eq__(self, other):
         return self.ip == other.ip and self.mask == other.mask
@@ -1,26 +1,229 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from network.network_classes.HostMonitor import is_snmp_error
 from network.network_classes.Ip import Ip
-from network.network_classes.Router import Router
+from network.network_classes.Router import Router, indicator_changes
+from network.network_classes.SessionManager import SessionManager
+
+DEFAULT_WORKERS = 8
 
 
 class NetworkExplorer:
-    def __init__(self, router: Router, community):
+    def __init__(self, router: Router, community, workers=DEFAULT_WORKERS, sessions: SessionManager = None,
+                 routers=None, on_router=None):
         self.routers = []
         self.community = community
+        self.workers = max(1, workers)
+        self.sessions = sessions if sessions is not None else router.sessions
+        # Routers found while exploring store their routes like the first one
+        self.columnar_routes = router.columnar_routes
+        # Called from the exploring thread with every router whose interfaces have just been walked
+        self.on_router = on_router
+        # Copies refresh() and update() walked routers into, swap_walked() hands their tables to the routers
+        self.walked = {}
+        # Neighbor IPs that never answered, so no router could be created for them
+        self.unreachable_ips = []
+        # Every sysName, interface IP and OSPF router-id collected, neighbors found in them are not asked anything
+        self.routers_by_name = {}
+        self.known_ips = set()
+        self.known_router_ids = set()
         self.routers.append(router)
+        if routers is not None:
+            # Routers found by an earlier discovery, refresh() polls them again
+            self.routers.extend(known_router for known_router in routers if known_router is not router)
+        self.__reindex__()
 
     def explore(self):
-        self.__explore_router__(self.routers[0])
+        """Discovers the network breadth-first, polling every router of a frontier concurrently."""
+        access_router = self.routers[0]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            frontier_neighbors = [self.__explore_router__(access_router)]
+            self.__index_router__(access_router)
+            self.__notify__([access_router])
+            self.__explore_frontier__(executor, frontier_neighbors)
+
         return self.routers
 
-    def __explore_router__(self, router: Router):
-        for neighbor_router_ips in router.get_known_routers(self.community):
-            router_found = Router(Ip(neighbor_router_ips))
+    def refresh(self):
+        """Walks again only the routers whose change indicators moved, returns (router, changes) for each of them.
+
+        The changed routers are walked into copies, they keep their tables until swap_walked() is called.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Each router is walked right after its poll, while its session is still cached
+            refreshes = self.__map_batches__(executor, self.__poll_and_refresh_router__, self.routers)
+
+            changed_routers = []
+            frontier_neighbors = []
+            for router, (changes, walked, known_routers) in zip(self.routers, refreshes):
+                if changes:
+                    changed_routers.append((router, changes))
+                if walked is not None:
+                    self.walked[router] = walked
+                frontier_neighbors.append(known_routers)
+
+            # New OSPF neighbors may lead to routers that were never discovered
+            self.__reindex__()
+            for router in self.__explore_frontier__(executor, frontier_neighbors):
+                changed_routers.append((router, {'new'}))
+
+        return changed_routers
+
+    def swap_walked(self):
+        """Hands the tables walked by refresh() or update() to their routers, nothing may read them meanwhile."""
+        for router, walked in self.walked.items():
+            router.take_walk(walked)
+        self.walked = {}
+
+    def update(self, routers):
+        """Walks again the interfaces, routes and neighbors of the given routers, returns the new routers found.
+
+        Like refresh(), the given routers are walked into copies swapped in by swap_walked().
+        """
+        walked_routers = [self.walked.get(router) or router.copy() for router in routers]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            frontier_neighbors = self.__map_batches__(executor, self.__explore_router__, walked_routers)
+            self.walked.update(zip(routers, walked_routers))
+            self.__reindex__()
+            return self.__explore_frontier__(executor, frontier_neighbors)
+
+    def __map_batches__(self, executor, function, routers):
+        """Maps routers max_sessions at a time, so no session is dropped by the cache while a worker uses it."""
+        results = []
+        batch_size = self.sessions.max_sessions
+        for start in range(0, len(routers), batch_size):
+            results.extend(executor.map(function, routers[start:start + batch_size]))
+        return results
+
+    def __index_router__(self, router: Router):
+        self.routers_by_name[router.name] = router
+        self.known_ips.add(str(router.ip))
+        self.known_ips.update(str(interface.ip) for interface in router.get_interfaces())
+        if router.router_id is not None:
+            self.known_router_ids.add(router.router_id)
+
+    def __reindex__(self):
+        self.routers_by_name = {}
+        self.known_ips = set()
+        self.known_router_ids = set()
+        for router in self.routers:
+            self.__index_router__(self.walked.get(router, router))
+
+    def __explore_frontier__(self, executor, frontier_neighbors):
+        new_routers = []
+        monitor = self.sessions.monitor
+        while frontier_neighbors:
+            # Only probe the neighbors that are neither a known router nor already being asked for their name
+            neighbor_ips = []
+            for known_routers in frontier_neighbors:
+                for neighbor_ip, router_id in known_routers:
+                    if neighbor_ip in self.known_ips or router_id in self.known_router_ids:
+                        continue
+                    self.known_ips.add(neighbor_ip)
+                    if router_id is not None:
+                        self.known_router_ids.add(router_id)
+                    neighbor_ips.append(neighbor_ip)
+
+            if monitor is not None and monitor.expired():
+                # Out of time, what was found so far is returned and the rest is reported unreachable
+                self.unreachable_ips.extend(neighbor_ips)
+                break
+
+            # At most max_sessions neighbors at a time, the sessions that probed them are still cached to walk them
+            frontier_neighbors = []
+            batch_size = self.sessions.max_sessions
+            for start in range(0, len(neighbor_ips), batch_size):
+                candidates = executor.map(self.__probe_router__, neighbor_ips[start:start + batch_size])
+                batch = self.__add_new_routers__(candidates)
+                frontier_neighbors.extend(executor.map(self.__explore_router__, batch))
+                for router in batch:
+                    self.__index_router__(router)
+                self.__notify__(batch)
+                new_routers.extend(batch)
+        return new_routers
+
+    def __notify__(self, routers):
+        if self.on_router is not None:
+            for router in routers:
+                self.on_router(router)
+
+    def __probe_router__(self, neighbor_ip):
+        router_found = Router(Ip(neighbor_ip), self.sessions, self.columnar_routes)
+        try:
             router_found.get_name(self.community)
+        except Exception as error:
+            if not is_snmp_error(error):
+                raise
+            self.unreachable_ips.append(neighbor_ip)
+            return None
+        return router_found
 
-            if router_found in self.routers:
+    def __add_new_routers__(self, candidates):
+        new_routers = []
+        for router_found in candidates:
+            # Still a known router when it was reached on an address its neighbors reported without router-id
+            if router_found is None or router_found.name in self.routers_by_name:
                 continue
-
-            router_found.get_interfaces_info(self.community)
-            router_found.set_routing_table(self.community)
             self.routers.append(router_found)
-            self.__explore_router__(router_found)
+            self.routers_by_name[router_found.name] = router_found
+            new_routers.append(router_found)
+        return new_routers
+
+    def __explore_router__(self, router: Router):
+        known_routers = []
+        try:
+            # Indicators are read before the tables, a change during the walk is caught by the next refresh
+            known_routers = router.get_known_routers(self.community)
+            indicators = router.get_change_indicators(self.community, known_routers)
+            router.get_interfaces_info(self.community)
+            router.set_routing_table(self.community)
+            # Only kept once every table was walked, so a failed walk is retried by the next refresh
+            router.indicators = indicators
+            router.reachable = True
+        except Exception as error:
+            if not is_snmp_error(error):
+                raise
+            # Keep whatever was walked, the router stays in the results flagged as unreachable
+            router.reachable = False
+        return known_routers
+
+    def __poll_router__(self, router: Router):
+        """Returns what changed on the router and its new indicators, kept by the caller once it walked the changes."""
+        try:
+            indicators = router.get_change_indicators(self.community)
+        except Exception as error:
+            if not is_snmp_error(error):
+                raise
+            router.reachable = False
+            return {'unreachable'}, None
+        changes = indicator_changes(router.indicators, indicators)
+        if not changes:
+            router.indicators = indicators
+        router.reachable = True
+        return changes, indicators
+
+    def __poll_and_refresh_router__(self, router: Router):
+        changes, indicators = self.__poll_router__(router)
+        return (changes, *self.__refresh_router__(router, changes, indicators))
+
+    def __refresh_router__(self, router: Router, changes, indicators):
+        if not changes or 'unreachable' in changes:
+            return None, []
+        walked = router.copy()
+        known_routers = []
+        try:
+            if 'interfaces' in changes:
+                walked.get_interfaces_info(self.community)
+            if 'routes' in changes:
+                walked.set_routing_table(self.community)
+            if 'neighbors' in changes:
+                known_routers = walked.get_known_routers(self.community)
+            walked.indicators = indicators
+        except Exception as error:
+            if not is_snmp_error(error):
+                raise
+            # The old indicators stay, the next refresh walks the changes again
+            walked.reachable = False
+            changes.add('unreachable')
+        return walked, known_routers
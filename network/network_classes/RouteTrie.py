@@ -0,0 +1,45 @@
+class RouteTrie:
+    """Binary trie over the bits of IPv4 destinations for longest prefix match lookups.
+
+    Nodes live in parallel lists indexed by node number, so a lookup walks at most 32 nodes
+    whatever the size of the routing table.
+    """
+
+    def __init__(self, routes=()):
+        self.children = [[-1, -1]]
+        self.routes = [None]
+        for route in routes:
+            self.insert(route)
+
+    def insert(self, route):
+        """Adds a (Network, next hop, type) route, a later route to the same prefix replaces the earlier one."""
+        network = route[0]
+        destination = network.ip.value
+        prefix_length = network.get_mask().netmask_to_cidr()
+
+        node = 0
+        for bit_number in range(prefix_length):
+            bit = (destination >> (31 - bit_number)) & 1
+            child = self.children[node][bit]
+            if child < 0:
+                child = len(self.routes)
+                self.children[node][bit] = child
+                self.children.append([-1, -1])
+                self.routes.append(None)
+            node = child
+        self.routes[node] = route
+
+    def lookup(self, ip_value):
+        """Returns the route with the longest prefix covering the integer IP, None if no route does."""
+        best = self.routes[0]
+        node = 0
+        for bit_number in range(32):
+            node = self.children[node][(ip_value >> (31 - bit_number)) & 1]
+            if node < 0:
+                break
+            if self.routes[node] is not None:
+                best = self.routes[node]
+        return best
+
+    def __len__(self):
+        return sum(route is not None for route in self.routes)
@@ -0,0 +1,26 @@
+from enum import IntEnum
+
+
+class RouteType(IntEnum):
+    """ipCidrRouteType and inetCidrRouteType values."""
+    OTHER = 1
+    REJECT = 2
+    LOCAL = 3
+    REMOTE = 4
+    BLACKHOLE = 5
+
+    @classmethod
+    def parse(cls, value):
+        """Converts an agent's route type, numeric ('4') or labelled ('remote', 'remote(4)'), None if unknown."""
+        if isinstance(value, int):
+            return cls(value) if value in cls._value2member_map_ else None
+
+        value = str(value).strip().lower()
+        if '(' in value:
+            value = value[value.index('(') + 1:value.index(')')]
+        if value.isdigit():
+            return cls.parse(int(value))
+        return cls.__members__.get(value.upper())
+
+    def __str__(self):
+        return self.name.lower()
@@ -1,33 +1,78 @@
-from collections import deque
-
-from easysnmp import Session
+import re
+from collections import namedtuple
 
+from network.mib_states import NBR_STATES
 from network.network_classes.Ip import Ip
 from network.network_classes.Netmask import Netmask
 from network.network_classes.Network import Network
+from network.network_classes.RouteTrie import RouteTrie
+from network.network_classes.RoutingTable import RoutingTable
+from network.network_classes.SessionManager import SessionManager
 
 ROUTE_NETWORK_OID = "IP-FORWARD-MIB::ipCidrRouteDest"
 ROUTE_MASK_OID = "IP-FORWARD-MIB::ipCidrRouteMask"
 ROUTE_NEXT_HOP_OID = "IP-FORWARD-MIB::ipCidrRouteNextHop"
 ROUTE_TYPE_OID = "IP-FORWARD-MIB::ipCidrRouteType"
+INET_ROUTE_TYPE_OID = "IP-FORWARD-MIB::inetCidrRouteType"
 IF_NAME_OID = "IF-MIB::ifName"
 IF_DESCR_OID = "IF-MIB::ifDescr"
 IF_TYPE_OID = "IF-MIB::ifType"
 IF_SPEED_OID = "IF-MIB::ifSpeed"
+IF_HIGH_SPEED_OID = "IF-MIB::ifHighSpeed"
 IP_ADDR_OID = "IP-MIB::ipAdEntAddr"
 IP_MASK_OID = "IP-MIB::ipAdEntNetMask"
 OSPF_NBR_IP_OID = 'OSPF-MIB::ospfNbrIpAddr'
+OSPF_NBR_RTR_ID_OID = 'OSPF-MIB::ospfNbrRtrId'
+OSPF_NBR_STATE_OID = 'OSPF-MIB::ospfNbrState'
+OSPF_ROUTER_ID_OID = 'OSPF-MIB::ospfRouterId.0'
+SYS_NAME_OID = 'sysName.0'
+SYS_UPTIME_OID = "SNMPv2-MIB::sysUpTime.0"
+IF_TABLE_LAST_CHANGE_OID = "IF-MIB::ifTableLastChange.0"
+ROUTE_NUMBER_OID = "IP-FORWARD-MIB::ipCidrRouteNumber.0"
 
 
 INTERFACE_INDEX_TO_ADDR_OID = "RFC1213-MIB::ipAdEntIfIndex"
 
+# Varbinds per GETBULK response when walking table columns
+MAX_REPETITIONS = 50
+NO_VALUE_TYPES = ('NOSUCHOBJECT', 'NOSUCHINSTANCE', 'ENDOFMIBVIEW')
+IF_SPEED_SATURATED = "4294967295"
+
+INET_ADDRESS_IPV4 = 1
+INET_ROUTE_TEXT_INDEX = re.compile(r'ipv4\."([\d.]+)"\.(\d+)\.')
+INET_TEXT_ADDRESS = re.compile(r'"(\d+\.\d+\.\d+\.\d+)"')
+
+# Cheap scalars that move whenever the interfaces, routes or OSPF neighbors of a router change, None if unknown
+ChangeIndicators = namedtuple('ChangeIndicators', ['uptime', 'if_last_change', 'route_number', 'neighbors'])
+
+
+def nbr_state_name(state):
+    """Name of an ospfNbrState as traps report it, whether the agent answered its number or its name."""
+    return NBR_STATES.get(int(state), state) if state is not None and state.isdigit() else state
+
+
+def indicator_changes(previous: ChangeIndicators, current: ChangeIndicators):
+    """Returns which parts of a router must be walked again, anything unknown counts as changed."""
+    if previous is None or previous.uptime is None or current.uptime is None or current.uptime < previous.uptime:
+        return {'rebooted', 'interfaces', 'routes', 'neighbors'}
+
+    changes = set()
+    if current.if_last_change is None or current.if_last_change != previous.if_last_change:
+        changes.add('interfaces')
+    if current.route_number is None or current.route_number != previous.route_number:
+        changes.add('routes')
+    if current.neighbors != previous.neighbors:
+        changes.add('neighbors')
+    return changes
+
 
 class RouterInterface:
-    def __init__(self, name, ip, network: Network, speed):
+    def __init__(self, name, ip, network: Network, speed, index=None):
         self.name = name
         self.network = network
         self.ip = ip
         self.speed = speed  # in Mbps
+        self.index = index  # ifIndex on the agent
 
     def get_other_hosts(self, router):
         return [hosts for hosts in self.network.get_hosts() if hosts != router]
@@ -40,11 +85,40 @@ class RouterInterface:
 
 
 class Router:
-    def __init__(self, ip: Ip):
+    def __init__(self, ip: Ip, sessions: SessionManager = None, columnar_routes=False):
         self.name = ""
         self.ip = ip
+        self.sessions = sessions if sessions is not None else SessionManager()
         self.interfaces = []
-        self.routing_table = []
+        # A RoutingTable keeps large tables in a few bytes per route, a list keeps the agent's own route types
+        self.columnar_routes = columnar_routes
+        self.routing_table = RoutingTable() if columnar_routes else []
+        # False once the agent stopped answering, whatever was walked before is kept
+        self.reachable = True
+        # OSPF router-id, None until get_name or if the agent has no OSPF-MIB
+        self.router_id = None
+        self.route_trie = None
+        self.indicators = None
+        # ospfNbrState of each OSPF neighbor IP, None until the neighbors are walked
+        self.neighbor_states = None
+
+    def copy(self):
+        """Router sharing the tables of this one, walked again while this one is still being read."""
+        walked = Router(self.ip, self.sessions, self.columnar_routes)
+        walked.name, walked.router_id, walked.reachable, walked.indicators = (self.name, self.router_id,
+                                                                             self.reachable, self.indicators)
+        walked.interfaces, walked.routing_table, walked.neighbor_states = (self.interfaces, self.routing_table,
+                                                                           self.neighbor_states)
+        return walked
+
+    def take_walk(self, walked):
+        """Takes the interfaces, routes and state walked into a copy of this router."""
+        if walked.routing_table is not self.routing_table:
+            self.routing_table = walked.routing_table
+            self.route_trie = None
+        self.interfaces = walked.interfaces
+        self.neighbor_states = walked.neighbor_states
+        self.router_id, self.reachable, self.indicators = walked.router_id, walked.reachable, walked.indicators
 
     def add_interface(self, interface):
         self.interfaces.append(interface)
@@ -57,53 +131,17 @@ class Router:
 
     def add_route(self, route):
         self.routing_table.append(route)
+        self.route_trie = None
+
+    def lookup_route(self, ip: Ip):
+        """Returns the route the router forwards the IP with, the routing table is indexed on first use."""
+        if self.route_trie is None:
+            self.route_trie = RouteTrie(self.routing_table)
+        return self.route_trie.lookup(ip.value)
 
     def get_networks(self):
         return [interface.network for interface in self.interfaces]
 
-    def get_adjacent_routers(self):
-        adjacent_routers = []
-
-        for interface in self.get_interfaces():
-            network_hosts = interface.network.get_hosts()
-            adjacent_routers.extend([host for host in network_hosts if host != self])
-
-        return adjacent_routers
-
-    def shortest_path(self, destination_ip):
-        # Initialize a dictionary to track the visited routers and their previous routers
-        visited = {self.ip: None}
-
-        # Initialize a queue for BFS traversal
-        queue = deque([self])
-
-        while queue:
-            current_router = queue.popleft()
-
-            # Check if any interface IP of the current router matches the destination IP
-            for interface in current_router.interfaces:
-                if interface.ip == destination_ip:
-                    return self._build_path(current_router, visited)
-
-            # Visit adjacent routers
-            adjacent_routers = current_router.get_adjacent_routers()
-            for adjacent_router in adjacent_routers:
-                if adjacent_router.ip not in visited:
-                    visited[adjacent_router.ip] = current_router
-                    queue.append(adjacent_router)
-
-        # If the destination IP is not reachable from the current router, return an empty path
-        return []
-
-    @staticmethod
-    def _build_path(current_router, visited):
-        path = []
-        while current_router:
-            path.append(current_router)
-            current_router = visited[current_router.ip]
-        path.reverse()
-        return path
-
     def is_neighbor(self, router):
         for network in self.get_networks():
             for network2 in router.get_networks():
@@ -112,94 +150,175 @@ class Router:
         return False
 
     def get_interfaces_info(self, community):
-        session = Session(hostname=str(self.ip), community=community, version=2)
-        return list(
-            map(
-                lambda pair: self._get_interface_details(session, pair['index'], pair['addr']),
-                self._interface_index_set_pairs(session),
-            )
-        )
+        session = self._session(community)
+
+        # Each column is fetched whole with GETBULK and joined in memory
+        addr_to_index = self._walk_column(session, INTERFACE_INDEX_TO_ADDR_OID)
+        masks = self._walk_column(session, IP_MASK_OID)
+        descriptions = self._walk_column(session, IF_DESCR_OID)
+        speeds = self._walk_column(session, IF_SPEED_OID)
+        types = self._walk_column(session, IF_TYPE_OID)
+
+        # ifSpeed saturates at 4294967295 on links faster than 4 Gbps, ifHighSpeed holds those in Mbps
+        if IF_SPEED_SATURATED in speeds.values():
+            for index, high_speed in self._walk_column(session, IF_HIGH_SPEED_OID).items():
+                if speeds.get(index) == IF_SPEED_SATURATED:
+                    speeds[index] = str(int(high_speed) * 1000000)
+
+        details = [
+            {
+                "IF_INDEX": index,
+                "IF_DESCR": descriptions.get(index),
+                "IP_ADDRESS": addr,
+                "IP_MASK": masks.get(addr),
+                "IF_SPEED": speeds.get(index),
+                "IF_TYPE": types.get(index),
+            }
+            for addr, index in addr_to_index.items()
+            # A ragged table, the address removed between two walks, leaves it without a network to join
+            if masks.get(addr) is not None
+        ]
+        # Replaced only once every column was walked, a walk cut short keeps the interfaces walked before
+        self.interfaces = [interface for interface in map(self._interface_of, details) if interface is not None]
+        return details
 
     @staticmethod
-    def _interface_index_set_pairs(session: Session):
-        return list(
-            map(
-                lambda entry: {'index': entry.value, 'addr': entry.oid_index},
-                session.walk(INTERFACE_INDEX_TO_ADDR_OID),
-            )
-        )
-
-    def _get_interface_details(self, session: Session, index: str, addr: str):
-        details = {
-            "IF_DESCR": self._get_oid_value(session, IF_DESCR_OID, index),
-            "IP_ADDRESS": addr,
-            "IP_MASK": self._get_oid_value(session, IP_MASK_OID, addr),
-            "IF_SPEED": self._get_oid_value(session, IF_SPEED_OID, index),
-            "IF_TYPE": self._get_oid_value(session, IF_TYPE_OID, index),
+    def _walk_column(session, oid: str) -> dict:
+        """Walks a table column with GETBULK and maps each instance index to its value."""
+        return {
+            entry.oid_index: entry.value
+            for entry in session.bulkwalk(oid, max_repetitions=MAX_REPETITIONS)
+            if entry.snmp_type not in NO_VALUE_TYPES
         }
-        # Add check for 'Vo' or 'Nu' in IF_DESCR if necessary
 
-        # Create a RouterInterface and add it to the router
+    @staticmethod
+    def _interface_of(details: dict):
+        # Create the RouterInterface of a row, None for the ones the router is not given
         ip = Ip(details["IP_ADDRESS"])
         mask = Netmask(details["IP_MASK"])
         network_ip = Network.translate_to_net(ip, mask)
         network = Network(network_ip, mask)
-        interface = RouterInterface(details["IF_DESCR"], ip, network, details["IF_SPEED"])
+        interface = RouterInterface(details["IF_DESCR"], ip, network, details["IF_SPEED"], details["IF_INDEX"])
 
         # Ignore loopback interfaces and down interfaces
         if details["IF_TYPE"] != "24" and details["IF_TYPE"] != "2":
-            self.add_interface(interface)
-
-        return details
-
-    @staticmethod
-    def _get_oid_value(session: Session, oid: str, index: str) -> str:
-        return session.get(oid + "." + index).value
+            return interface
+        return None
 
     def set_routing_table(self, community):
-        session = Session(hostname=str(self.ip), community=community, version=2)
-        routes = session.walk(ROUTE_NETWORK_OID)
-
-        for route in routes:
-            destination = Ip(route.value)
-            netmask = Netmask(session.get(f'{ROUTE_MASK_OID}.{route.oid_index}').value)
-
-            # Separate the network into destination and mask
-            network = Network(destination, netmask)
-
-            next_hop = Ip(session.get(f'{ROUTE_NEXT_HOP_OID}.{route.oid_index}').value)
-
-            # Get the route type
-            route_type = session.get(f'{ROUTE_TYPE_OID}.{route.oid_index}').value
+        session = self._session(community)
+
+        # Agents that dropped the deprecated ipCidrRouteTable only answer the inetCidrRouteTable
+        routes = self._get_cidr_routes(session) or self._get_inet_cidr_routes(session)
+        self.routing_table = RoutingTable(routes) if self.columnar_routes else routes
+        self.route_trie = None
+
+    def _get_cidr_routes(self, session):
+        destinations = self._walk_column(session, ROUTE_NETWORK_OID)
+        if not destinations:
+            return []
+
+        masks = self._walk_column(session, ROUTE_MASK_OID)
+        next_hops = self._walk_column(session, ROUTE_NEXT_HOP_OID)
+        route_types = self._walk_column(session, ROUTE_TYPE_OID)
+
+        routes = []
+        for oid_index, destination in destinations.items():
+            mask, next_hop, route_type = masks.get(oid_index), next_hops.get(oid_index), route_types.get(oid_index)
+            # A route withdrawn or added between the walks of two columns is only in some of them
+            if mask is None or next_hop is None or route_type is None:
+                continue
+            routes.append((Network(Ip(destination), Netmask(mask)), Ip(next_hop), route_type))
+        return routes
+
+    def _get_inet_cidr_routes(self, session):
+        # Destination, prefix length and next hop are not columns of this table, only parts of its index
+        routes = []
+        for oid_index, route_type in self._walk_column(session, INET_ROUTE_TYPE_OID).items():
+            route = self._parse_inet_cidr_index(oid_index)
+            if route is None:
+                continue
+            destination, prefix_length, next_hop = route
+            routes.append((Network(Ip(destination), Netmask.from_prefix(prefix_length)), Ip(next_hop), route_type))
+        return routes
 
-            # Add the route type to the tuple
-            self.routing_table.append((network, next_hop, route_type))
+    @staticmethod
+    def _parse_inet_cidr_index(oid_index: str):
+        """Splits an inetCidrRouteEntry index into destination, prefix length and next hop of an IPv4 route."""
+        if '"' in oid_index:
+            # Index rendered with MIB labels: ipv4."10.0.0.0".8.zeroDotZero.ipv4."10.0.0.2"
+            match = INET_ROUTE_TEXT_INDEX.match(oid_index)
+            if match is None:
+                return None
+            addresses = INET_TEXT_ADDRESS.findall(oid_index)
+            next_hop = addresses[1] if len(addresses) > 1 else "0.0.0.0"
+            return match.group(1), int(match.group(2)), next_hop
+
+        # Numeric index: type.len.dest.prefix.policy_len.policy.type.len.next_hop
+        try:
+            parts = [int(part) for part in oid_index.strip('.').split('.')]
+            if parts[0] != INET_ADDRESS_IPV4 or parts[1] != 4:
+                return None
+            destination = '.'.join(map(str, parts[2:6]))
+            prefix_length = parts[6]
+            next_hop_at = 8 + parts[7]
+            next_hop_length = parts[next_hop_at + 1]
+            next_hop = parts[next_hop_at + 2:next_hop_at + 2 + next_hop_length]
+        except (ValueError, IndexError):
+            # Cut short or not numeric, not an index this parser knows
+            return None
+        if next_hop_length != 4:
+            next_hop = [0, 0, 0, 0]
+        return destination, prefix_length, '.'.join(map(str, next_hop))
 
     def get_known_routers(self, community):
-        session = Session(hostname=str(self.ip), community=community, version=2)
-
-        # Retrieve the OSPF neighbor IP addresses
-        ospf_nbr_ips = session.walk(OSPF_NBR_IP_OID)
+        """Returns (IP, router-id) of every OSPF neighbor, the router-id is None if the agent does not report it.
+
+        The state of the adjacency with each neighbor is kept in neighbor_states.
+        """
+        session = self._session(community)
+
+        # Retrieve the OSPF neighbor IP addresses, router-ids and states, all indexed by the neighbor IP
+        ospf_nbr_ips = self._walk_column(session, OSPF_NBR_IP_OID)
+        ospf_nbr_ids = self._walk_column(session, OSPF_NBR_RTR_ID_OID) if ospf_nbr_ips else {}
+        ospf_nbr_states = self._walk_column(session, OSPF_NBR_STATE_OID) if ospf_nbr_ips else {}
+        self.neighbor_states = {nbr_ip: nbr_state_name(ospf_nbr_states.get(index))
+                                for index, nbr_ip in ospf_nbr_ips.items()}
+
+        return [(nbr_ip, ospf_nbr_ids.get(index)) for index, nbr_ip in ospf_nbr_ips.items()]
+
+    def get_change_indicators(self, community, known_routers=None):
+        """Polls the change indicators in one GET, known_routers saves walking the OSPF neighbors again."""
+        session = self._session(community)
+        uptime, if_last_change, route_number = (
+            int(variable.value) if variable.snmp_type not in NO_VALUE_TYPES else None
+            for variable in session.get([SYS_UPTIME_OID, IF_TABLE_LAST_CHANGE_OID, ROUTE_NUMBER_OID])
+        )
 
-        known_routers = []
+        if known_routers is None:
+            known_routers = self.get_known_routers(community)
 
-        # Iterate over the retrieved information for each OSPF neighbor
-        for i in range(len(ospf_nbr_ips)):
-            nbr_ip = ospf_nbr_ips[i].value
-            known_routers.append(nbr_ip)
+        return ChangeIndicators(uptime, if_last_change, route_number, len(known_routers))
 
-        return known_routers
+    def _session(self, community):
+        return self.sessions.get_session(self.ip, community)
 
     def get_routing_table(self):
         return self.routing_table
 
     def get_name(self, community):
-        session = Session(hostname=str(self.ip), community=community, version=2)
-        self.name = session.get('sysName.0').value
+        """Gets the sysName of the router, and its OSPF router-id in the same request."""
+        session = self._session(community)
+        name, router_id = session.get([SYS_NAME_OID, OSPF_ROUTER_ID_OID])
+        self.name = name.value
+        self.router_id = router_id.value if router_id.snmp_type not in NO_VALUE_TYPES else None
 
     def __eq__(self, other):
         return self.name == other.name
 
+    def __hash__(self):
+        return hash(self.name)
+
     def __str__(self):
         interfaces_str = ""
         for interface in self.interfaces:
@@ -208,4 +327,5 @@ class Router:
         routing_table_str = ""
         for route in self.routing_table:
             routing_table_str += "\n       Net: " + str(route[0]) + " Next-Hop: " + str(route[1]) + " Type: " + str(route[2])
-        return f"Name: {self.name}\n    Interfaces: {str(interfaces_str)}\n    Routing Table: {str(routing_table_str)}"
+        unreachable_str = "" if self.reachable else " (unreachable)"
+        return f"Name: {self.name}{unreachable_str}\n    Interfaces: {str(interfaces_str)}\n    Routing Table: {str(routing_table_str)}"
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+from network.network_classes.HostMonitor import HostMonitor, MonitoredSession, RETRIES
+
+DEFAULT_MAX_SESSIONS = 64
+SNMP_VERSION = 2
+
+
+def easysnmp_session(hostname, community, version, **options):
+    """Opens a net-snmp session through easysnmp, options such as timeout and retries go to easysnmp."""
+    from easysnmp import Session
+    return Session(hostname=hostname, community=community, version=version, **options)
+
+
+class SessionManager:
+    """Caches one SNMP session per (host, community, version) and keeps at most max_sessions of them open.
+
+    A session is not thread safe, callers must not poll the same agent from several threads at once.
+    With a HostMonitor, sessions are opened with its adaptive timeouts and refuse to poll unreachable agents.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, session_factory=easysnmp_session,
+                 monitor: HostMonitor = None):
+        self.max_sessions = max(1, max_sessions)
+        self.session_factory = session_factory
+        self.monitor = monitor
+        self.sessions = OrderedDict()
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def get_session(self, host, community, version=SNMP_VERSION):
+        """Returns the cached session of the agent, opening it the first time it is requested."""
+        key = (str(host), community, version)
+
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+                return session
+
+            if self.monitor is not None:
+                session = MonitoredSession(key[0], self._opener(key), self.monitor)
+            else:
+                session = self.session_factory(*key)
+            self.sessions[key] = session
+            self.opened += 1
+
+            # Drop the least recently used sessions, net-snmp releases them once unreferenced
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+        return session
+
+    def _opener(self, key):
+        def open_session(timeout):
+            return self.session_factory(*key, timeout=timeout, retries=RETRIES)
+        return open_session
+
+    def close_session(self, host, community, version=SNMP_VERSION):
+        with self.lock:
+            self.sessions.pop((str(host), community, version), None)
+
+    def close_all(self):
+        with self.lock:
+            self.sessions.clear()
+
+    def __len__(self):
+        return len(self.sessions)
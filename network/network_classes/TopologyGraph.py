@@ -0,0 +1,98 @@
+from array import array
+
+
+def interface_speed_kbps(interface):
+    """ifSpeed of an interface in kbps, 0 when the agent did not report it."""
+    try:
+        return max(0, int(interface.speed)) // 1000
+    except (TypeError, ValueError):
+        return 0
+
+
+class TopologyGraph:
+    """Frozen graph of the network, built once after NetworkManager.set_networks.
+
+    Routers are numbered 0..R-1 and transit networks (two hosts or more) R..R+N-1. Both the bipartite
+    router/network graph and the router to router graph are stored CSR style: the edges of node n are
+    positions offsets[n]..offsets[n + 1] of flat arrays, so walking them allocates nothing.
+    Every edge also keeps the speed, in kbps, of the router interface it leaves or enters the network by.
+    down_adjacencies holds (router, neighbor, network) triples whose OSPF adjacency is down, in either
+    direction: the two routers are not neighbors through that network even though they share it.
+    """
+
+    def __init__(self, routers, networks, down_adjacencies=frozenset()):
+        self.routers = list(routers)
+        self.networks = [network for network in networks if len(network.get_hosts()) > 1]
+        self.router_numbers = {id(router): number for number, router in enumerate(self.routers)}
+        network_numbers = {id(network): len(self.routers) + number for number, network in enumerate(self.networks)}
+
+        # Router/network edges, from every router then from every network
+        network_edges = [[] for _ in self.networks]
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.speeds = array('I')
+        for number, router in enumerate(self.routers):
+            for interface in router.get_interfaces():
+                network_number = network_numbers.get(id(interface.network))
+                if network_number is None:
+                    continue
+                speed = interface_speed_kbps(interface)
+                self.targets.append(network_number)
+                self.speeds.append(speed)
+                network_edges[network_number - len(self.routers)].append((number, speed))
+            self.offsets.append(len(self.targets))
+        for edges in network_edges:
+            for number, speed in edges:
+                self.targets.append(number)
+                self.speeds.append(speed)
+            self.offsets.append(len(self.targets))
+
+        # Router to router edges through each shared network, weighted by the speed of the outgoing interface
+        self.neighbor_offsets = array('i', [0])
+        self.neighbors = array('i')
+        self.neighbor_speeds = array('I')
+        for number in range(len(self.routers)):
+            for edge in range(self.offsets[number], self.offsets[number + 1]):
+                network_number = self.targets[edge]
+                for network_edge in range(self.offsets[network_number], self.offsets[network_number + 1]):
+                    neighbor = self.targets[network_edge]
+                    if neighbor != number and not (down_adjacencies and self._is_down(
+                            down_adjacencies, number, neighbor, network_number)):
+                        self.neighbors.append(neighbor)
+                        self.neighbor_speeds.append(self.speeds[edge])
+            self.neighbor_offsets.append(len(self.neighbors))
+
+    def _is_down(self, down_adjacencies, router_number, neighbor_number, network_number):
+        router = self.routers[router_number]
+        neighbor = self.routers[neighbor_number]
+        network = self.network_of(network_number)
+        return (router, neighbor, network) in down_adjacencies or (neighbor, router, network) in down_adjacencies
+
+    def router_count(self):
+        return len(self.routers)
+
+    def node_count(self):
+        return len(self.routers) + len(self.networks)
+
+    def router_number(self, router):
+        return self.router_numbers.get(id(router))
+
+    def network_of(self, node):
+        """Returns the Network of a network node number."""
+        return self.networks[node - len(self.routers)]
+
+    def edges(self, node):
+        """Positions in targets/speeds of the edges of a router or network node."""
+        return range(self.offsets[node], self.offsets[node + 1])
+
+    def neighbor_edges(self, router_number):
+        """Positions in neighbors/neighbor_speeds of the routers adjacent to a router."""
+        return range(self.neighbor_offsets[router_number], self.neighbor_offsets[router_number + 1])
+
+    def degree(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def nbytes(self):
+        arrays = (self.offsets, self.targets, self.speeds, self.neighbor_offsets, self.neighbors,
+                  self.neighbor_speeds)
+        return sum(len(buffer) * buffer.itemsize for buffer in arrays)
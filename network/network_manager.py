@@ -1,37 +1,293 @@
-from easysnmp import Session
-import ipaddress
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
 
+from network.network_classes.HostMonitor import HostMonitor
 from network.network_classes.Ip import Ip
-from network.network_classes.Netmask import Netmask
-from network.network_classes.NetworkExplorer import NetworkExplorer
+from network.network_classes.NetworkExplorer import NetworkExplorer, DEFAULT_WORKERS
 from network.network_classes.Network import Network
-from network.network_classes.Router import RouterInterface, Router
+from network.network_classes.Router import Router
+from network.network_classes.RouteType import RouteType
+from network.network_classes.TopologyGraph import TopologyGraph
+from network.network_classes.SessionManager import SessionManager, DEFAULT_MAX_SESSIONS, easysnmp_session
+from network.path_finder import PathFinder, DEFAULT_REFERENCE_BANDWIDTH
+from network.snapshot import load_snapshot, save_snapshot
 
 
 # https://easysnmp.readthedocs.io/en/latest/
 
+# Neighbor states of ospfNbrState: only full adjacencies carry routes, two-way is the steady state of
+# two DROthers and tells nothing, any other state means the adjacency went down or is being rebuilt
+ADJACENCY_UP_STATES = ('full',)
+ADJACENCY_KEPT_STATES = ('twoWay',)
+# Path finders kept at once, each holds the trees it computed, the least recently used one is dropped
+MAX_PATH_FINDERS = 8
+
 
 class NetworkManager:
-    def __init__(self, access_ip, community):
-        self.ip = Ip(access_ip)
+    def __init__(self, access_ip, community, workers=DEFAULT_WORKERS, max_sessions=DEFAULT_MAX_SESSIONS,
+                 routers=None, columnar_routes=False, session_factory=easysnmp_session, profiler=None, deadline=None):
+        self.ip = Ip(str(access_ip))
         self.community = community
+        self.workers = workers
         self.networks = []
+        # Times the phases of the run and every SNMP request when given
+        self.profiler = profiler
+        if profiler is not None:
+            session_factory = profiler.session_factory(session_factory)
+        # Agents that stop answering are given up on, and no agent is asked anything once the deadline passes
+        self.monitor = HostMonitor(deadline)
+        self.sessions = SessionManager(max(max_sessions, workers), session_factory, self.monitor)
 
-        self.access_router = Router(self.ip)
-        self.access_router.get_name(self.community)
-
-        self.access_router.get_interfaces_info(self.community)
+        # Lookup indexes, filled as discovery walks each router
+        self.routers_by_ip = {}
+        self.routers_by_name = {}
+        self.routers_by_router_id = {}
+        self.interfaces_by_ip = {}
+        self.networks_by_address = {}
+        # (router, neighbor, network) of the OSPF adjacencies traps reported down, they carry no path
+        self.down_adjacencies = set()
+        # Held by every walk after discovery, the explorer keeps the state of one walk at a time
+        self.walk_lock = threading.RLock()
 
-        self.access_router.set_routing_table(self.community)
+        if routers is None:
+            with self.phase('discovery'):
+                self.access_router = Router(self.ip, self.sessions, columnar_routes)
+                self.access_router.get_name(self.community)
 
-        self.access_router.get_interfaces()
+                self.network_explorer = NetworkExplorer(self.access_router, self.community, workers, self.sessions,
+                                                        on_router=self.add_router)
+                self.routers = list(self.network_explorer.explore())
+                # Later walks may run while the indexes are queried, their routers are indexed once applied
+                self.network_explorer.on_router = None
+        else:
+            # Routers restored from a snapshot, any later SNMP query goes through this manager's sessions
+            for router in routers:
+                router.sessions = self.sessions
+            self.access_router = routers[0]
 
-        self.network_explorer = NetworkExplorer(self.access_router, self.community)
-        self.routers = self.network_explorer.explore()
+            self.network_explorer = NetworkExplorer(self.access_router, self.community, workers, self.sessions,
+                                                    routers)
+            self.routers = list(self.network_explorer.routers)
+            self.reindex()
 
         self.networks = []
+        self.topology_graph = None
+        self.route_summary = None
+        self.path_finders = OrderedDict()
         self.set_networks()
 
+    @classmethod
+    def from_snapshot(cls, snapshot_file, community, workers=DEFAULT_WORKERS, max_sessions=DEFAULT_MAX_SESSIONS,
+                      columnar_routes=False, profiler=None, deadline=None):
+        """Rebuilds the network from a snapshot file without querying any router."""
+        with profiler.phase('snapshot load') if profiler is not None else nullcontext():
+            access_ip, routers = load_snapshot(snapshot_file, columnar_routes)
+        return cls(access_ip, community, workers, max_sessions, routers, profiler=profiler, deadline=deadline)
+
+    def phase(self, name):
+        """Context timing a phase of the run when profiling, doing nothing otherwise."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def save_snapshot(self, snapshot_file):
+        save_snapshot(snapshot_file, self.ip, self.routers)
+
+    def refresh(self):
+        """Walks again the routers whose change indicators moved and returns (router, changes) for each of them."""
+        with self.walk_lock:
+            return self.apply_refresh(self.walk_refresh())
+
+    def walk_refresh(self):
+        """Walks the changed routers of a refresh into copies, the network is left as it was until apply_refresh.
+
+        Callers querying the network meanwhile hold walk_lock until the refresh is applied.
+        """
+        with self.walk_lock, self.phase('discovery'):
+            return self.network_explorer.refresh()
+
+    def apply_refresh(self, changed_routers):
+        """Swaps in the routers walked by walk_refresh and the new ones found, returns changed_routers."""
+        self.network_explorer.swap_walked()
+        self.routers = list(self.network_explorer.routers)
+        # Re-walked routers may have lost interfaces, index everything again
+        self.reindex()
+        self.set_networks()
+        # Every router had its OSPF neighbors polled
+        self._sync_down_adjacencies(self.routers)
+        return changed_routers
+
+    def update_routers(self, routers, adjacencies=()):
+        """Walks again only the given routers and patches the networks and paths they are part of.
+
+        adjacencies are (router, neighbor, network, up) OSPF adjacency changes to apply at the same time.
+        Cached paths are only dropped for the sources whose shortest path tree the changes can alter.
+        Returns the new routers found behind the neighbors of the given ones.
+        """
+        with self.walk_lock:
+            return self.apply_update(self.walk_update(routers), adjacencies)
+
+    def walk_update(self, routers):
+        """Walks the given routers into copies and the new routers behind them, for apply_update.
+
+        Like walk_refresh, the network is left as it was and callers hold walk_lock until the update is applied.
+        """
+        routers = list(routers)
+        with self.walk_lock, self.phase('discovery'):
+            return routers, self.network_explorer.update(routers)
+
+    def apply_update(self, walk, adjacencies=()):
+        """Swaps in the routers walked by walk_update, see update_routers."""
+        routers, new_routers = walk
+        old_networks = {router: router.get_networks() for router in routers}
+        old_ips = {router: router.get_ips() for router in routers}
+        self.network_explorer.swap_walked()
+        self.routers = list(self.network_explorer.routers)
+
+        changed_routers = set(routers)
+        for router, neighbor, network, up in adjacencies:
+            if up:
+                self.down_adjacencies.discard((router, neighbor, network))
+                self.down_adjacencies.discard((neighbor, router, network))
+            else:
+                self.down_adjacencies.add((router, neighbor, network))
+            changed_routers.update((router, neighbor))
+
+        with self.phase('network merge'):
+            for router in routers:
+                for ip in old_ips[router]:
+                    if self.interfaces_by_ip.get(ip.value, (None,))[0] is router:
+                        del self.interfaces_by_ip[ip.value]
+                for network in old_networks[router]:
+                    network.remove_host(router)
+            for router in routers + new_routers:
+                self.add_router(router)
+                self._merge_interfaces(router)
+            self.networks = [network for network in self.networks if network.get_hosts()]
+            self.networks_by_address = {(network.ip.value, network.get_mask().netmask): network
+                                        for network in self.networks}
+
+        changed_routers.update(self._sync_down_adjacencies(routers + new_routers))
+        self._update_paths(changed_routers, new_routers)
+        return new_routers
+
+    def _sync_down_adjacencies(self, routers):
+        """Takes the state of the adjacencies of walked routers from the OSPF neighbor tables of both ends.
+
+        An adjacency is down when an end lists the other in any state but full or two-way, and up when the ends
+        listing each other all do so in one of these. One no end lists keeps the state traps last reported,
+        adjacencies over networks a router left are dropped. Returns the routers whose adjacencies changed.
+        """
+        changed_routers = set()
+        for router in routers:
+            if router.neighbor_states is None:
+                continue
+            networks = set(router.get_networks())
+            for adjacency in [adjacency for adjacency in self.down_adjacencies if router in adjacency[:2]]:
+                if adjacency[2] not in networks:
+                    self.down_adjacencies.discard(adjacency)
+                    changed_routers.update(adjacency[:2])
+
+            for interface in router.get_interfaces():
+                network = interface.network
+                for neighbor in interface.get_other_hosts(router):
+                    states = [state for state in (self._neighbor_state(router, neighbor, network),
+                                                  self._neighbor_state(neighbor, router, network))
+                              if state is not None]
+                    if not states:
+                        continue
+                    up = all(state in ADJACENCY_UP_STATES or state in ADJACENCY_KEPT_STATES for state in states)
+                    down = {(router, neighbor, network), (neighbor, router, network)} & self.down_adjacencies
+                    if up and down:
+                        self.down_adjacencies -= down
+                        changed_routers.update((router, neighbor))
+                    elif not up and not down:
+                        self.down_adjacencies.add((router, neighbor, network))
+                        changed_routers.update((router, neighbor))
+        return changed_routers
+
+    @staticmethod
+    def _neighbor_state(router, neighbor, network):
+        """ospfNbrState the router lists the interface of the neighbor on the network with, None if not listed."""
+        if not router.neighbor_states:
+            return None
+        return next((router.neighbor_states[str(interface.ip)] for interface in neighbor.get_interfaces()
+                     if interface.network == network and str(interface.ip) in router.neighbor_states), None)
+
+    def _merge_interfaces(self, router: Router):
+        """Points the interfaces of a router to the known instance of their network, adding the router to it."""
+        for interface in router.get_interfaces():
+            key = (interface.network.ip.value, interface.network.get_mask().netmask)
+            network = self.networks_by_address.get(key)
+            if network is None:
+                network = self.networks_by_address[key] = interface.network
+                network.clear_hosts()
+                self.networks.append(network)
+            else:
+                interface.network = network
+            network.add_host(router)
+
+    def _update_paths(self, changed_routers, new_routers):
+        self.route_summary = None
+        if self.topology_graph is None:
+            return
+        if new_routers or not self.path_finders:
+            # New routers renumber the graph, every path is computed again
+            self.topology_graph = None
+            self.path_finders = OrderedDict()
+            return
+
+        self.topology_graph = TopologyGraph(self.routers, self.networks, self.down_adjacencies)
+        changed_numbers = [self.topology_graph.router_number(router) for router in changed_routers
+                           if self.topology_graph.router_number(router) is not None]
+        for path_finder in self.path_finders.values():
+            path_finder.update_graph(self.topology_graph, changed_numbers)
+
+    def add_router(self, router: Router):
+        """Indexes a router by its IP, its sysName and the IPs of its interfaces."""
+        self.routers_by_ip[router.ip.value] = router
+        self.routers_by_name[router.name] = router
+        if router.router_id is not None:
+            self.routers_by_router_id[router.router_id] = router
+        for interface in router.get_interfaces():
+            self.interfaces_by_ip[interface.ip.value] = (router, interface)
+
+    def reindex(self):
+        self.routers_by_ip = {}
+        self.routers_by_name = {}
+        self.routers_by_router_id = {}
+        self.interfaces_by_ip = {}
+        for router in self.routers:
+            self.add_router(router)
+
+    def get_router(self, ip) -> Router:
+        """Returns the router polled through this IP, or the owner of an interface with it, None if unknown."""
+        ip_value = Ip(ip).value
+        router = self.routers_by_ip.get(ip_value)
+        if router is None:
+            router, _ = self.interfaces_by_ip.get(ip_value, (None, None))
+        return router
+
+    def get_unreachable(self):
+        """Returns the routers that stopped answering and the neighbor IPs that never answered."""
+        return ([router for router in self.routers if not router.reachable],
+                list(self.network_explorer.unreachable_ips))
+
+    def get_router_by_name(self, name) -> Router:
+        return self.routers_by_name.get(name)
+
+    def get_router_by_router_id(self, router_id) -> Router:
+        return self.routers_by_router_id.get(router_id)
+
+    def get_interface(self, ip):
+        """Returns the (router, interface) pair owning the IP, None if no interface has it."""
+        return self.interfaces_by_ip.get(Ip(ip).value)
+
+    def get_network_hosts(self, network: Network) -> list:
+        known_network = self.networks_by_address.get((network.ip.value, network.get_mask().netmask))
+        return known_network.get_hosts() if known_network is not None else []
+
     def print_networks(self):
         print("Printing networks:")
         for network in self.networks:
@@ -59,30 +315,70 @@ class NetworkManager:
                 f"  Network: {network.get_ip():15} Netmask: {network.get_mask().netmask_to_decimal():15} Next hop: {nexthop} Sysname: {sysname}")
 
     def set_networks(self):
-        network_mapping = {}
+        with self.phase('network merge'):
+            network_mapping = {}
 
-        for router in self.routers:
-            for interface in router.get_interfaces():
-                network = interface.network
+            # Merge the networks seen from every side into one instance that knows all its hosts
+            for router in self.routers:
+                for interface in router.get_interfaces():
+                    network = network_mapping.get(interface.network)
+                    if network is None:
+                        network = network_mapping[interface.network] = interface.network
+                        network.clear_hosts()
+                    else:
+                        interface.network = network
+                    network.add_host(router)
 
-                if network not in network_mapping:
-                    network_mapping[network] = network
-                else:
-                    interface.network = network_mapping[network]
+            self.networks = list(network_mapping.values())
+            self.networks_by_address = {(network.ip.value, network.get_mask().netmask): network
+                                        for network in self.networks}
 
-        # Remove duplicate networks
-        self.networks = list(set(network_mapping.values()))
+            # Paths computed over the previous topology are stale
+            self.topology_graph = None
+            self.route_summary = None
+            self.path_finders = OrderedDict()
 
-        for router in self.routers:
-            for interface in router.get_interfaces():
-                network = interface.network
-                network.add_host(router)
+    def get_topology_graph(self) -> TopologyGraph:
+        """Returns the CSR graph of routers and transit networks, built on first use after every topology change."""
+        if self.topology_graph is None:
+            self.topology_graph = TopologyGraph(self.routers, self.networks, self.down_adjacencies)
+        return self.topology_graph
+
+    def get_route_summary(self):
+        """Returns the all-pairs shortest paths, computed on first use after every topology change."""
+        if self.route_summary is None:
+            # Imported here, the summary is the only user of NumPy most runs never reach
+            from network.route_summary import RouteSummary
+
+            self.route_summary = RouteSummary(self.get_topology_graph())
+        return self.route_summary
+
+    def get_path_finder(self, metric='hops', reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH) -> PathFinder:
+        """Returns the path finder of a metric, its cached paths live until the topology changes."""
+        if metric == 'hops':
+            # Hop counts do not depend on the reference bandwidth
+            reference_bandwidth = DEFAULT_REFERENCE_BANDWIDTH
+        key = (metric, reference_bandwidth)
+        path_finder = self.path_finders.get(key)
+        if path_finder is None:
+            path_finder = self.path_finders[key] = PathFinder(self.get_topology_graph(), metric, reference_bandwidth)
+            while len(self.path_finders) > MAX_PATH_FINDERS:
+                self.path_finders.popitem(last=False)
+        else:
+            self.path_finders.move_to_end(key)
+        return path_finder
 
-    def get_shortest_path(self, ip_origin, ip_destination):
+    def print_route_summary(self):
+        print("Route summary:")
+        with self.phase('path computation'):
+            for origin, destination, path in self.get_route_summary().summary():
+                print(f"  {origin:15} -> {destination:15} {' -> '.join(path) if path else 'unreachable'}")
+
+    def get_shortest_path(self, ip_origin, ip_destination, metric='hops',
+                          reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH):
         # Retrieve the Router instances from the IP addresses
-        router_origin = next((router for router in self.routers if router.ip == Ip(ip_origin)), None)
-        router_destination = next((router for router in self.routers if
-                                   any(interface.ip == Ip(ip_destination) for interface in router.interfaces)), None)
+        router_origin = self.get_router(ip_origin)
+        router_destination, _ = self.get_interface(ip_destination) or (None, None)
 
         # Check if both routers are found
         if not router_origin:
@@ -93,26 +389,72 @@ class NetworkManager:
             return
 
         # Find the shortest path
-        path = router_origin.shortest_path(Ip(ip_destination))
+        with self.phase('path computation'):
+            path = self.get_path_finder(metric, reference_bandwidth).shortest_path(router_origin, router_destination)
         return path
 
+    def trace_route(self, ip_origin, ip_destination):
+        """Follows the routing tables from the origin router hop by hop.
+
+        Returns the routers crossed and why the trace stopped: 'delivered', 'no route', 'dropped',
+        'unknown next hop' or 'loop'.
+        """
+        router = self.get_router(ip_origin)
+        if router is None:
+            print(f"Router with IP {ip_origin} not found.")
+            return [], 'unknown origin'
+
+        with self.phase('path computation'):
+            return self._follow_routes(router, Ip(ip_destination))
+
+    def _follow_routes(self, router: Router, destination: Ip):
+        path = [router]
+        while True:
+            if destination in router.get_ips():
+                return path, 'delivered'
+
+            route = router.lookup_route(destination)
+            if route is None:
+                return path, 'no route'
+
+            _, next_hop, route_type = route
+            route_type = RouteType.parse(route_type)
+            if route_type in (RouteType.REJECT, RouteType.BLACKHOLE):
+                return path, 'dropped'
+
+            if route_type == RouteType.LOCAL or next_hop.value == 0:
+                # Directly connected, the destination is on one of the router's networks
+                owner = self.get_interface(str(destination))
+                if owner is not None and owner[0] is not router:
+                    path.append(owner[0])
+                return path, 'delivered'
+
+            owner = self.get_interface(str(next_hop))
+            if owner is None:
+                return path, 'unknown next hop'
+            router = owner[0]
+            if router in path:
+                path.append(router)
+                return path, 'loop'
+            path.append(router)
+
 
 if __name__ == '__main__':
     network_manager = NetworkManager('10.0.0.2', 'rocom')
-    # path = network_manager.routers[0].shortest_path(Ip("12.0.0.2"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '12.0.0.2')
     # print([router.name for router in path])
 
-    # path = network_manager.routers[0].shortest_path(Ip("12.0.0.1"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '12.0.0.1')
     # print([router.name for router in path])
 
-    # path = network_manager.routers[0].shortest_path(Ip("11.0.0.2"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '11.0.0.2')
     # print([router.name for router in path])
 
-    # path = network_manager.routers[0].shortest_path(Ip("11.0.0.1"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '11.0.0.1')
     # print([router.name for router in path])
 
-    # path = network_manager.routers[0].shortest_path(Ip("10.0.0.2"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '10.0.0.2')
     # print([router.name for router in path])
 
-    # path = network_manager.routers[0].shortest_path(Ip("10.0.0.3"))
+    # path = network_manager.get_shortest_path('10.0.0.2', '10.0.0.3')
     # print([router.name for router in path])
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+
+from network.network_classes.TopologyGraph import TopologyGraph
+
+# In the user's cache directory, so runs started from different directories share the layouts
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'network_map')
+# sfdp is the multilevel force directed layout of Graphviz, it stays fast on thousands of nodes
+LAYOUT_ENGINE = 'sfdp'
+
+
+def _quote(text):
+    text = str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{text}"'
+
+
+def _network_hosts(graph: TopologyGraph, network_node):
+    return [graph.routers[graph.targets[edge]].name for edge in graph.edges(network_node)]
+
+
+def topology_fingerprint(graph: TopologyGraph):
+    """Hash of the routers and of which routers share each network, the same for any discovery order."""
+    lines = sorted(router.name for router in graph.routers)
+    lines += sorted(f"{graph.network_of(node)} {' '.join(sorted(_network_hosts(graph, node)))}"
+                    for node in range(graph.router_count(), graph.node_count()))
+    return hashlib.sha1('\n'.join(lines).encode()).hexdigest()
+
+
+def network_dot(graph: TopologyGraph, positions=None):
+    """DOT source of the network map, routers are boxes and networks of three routers or more are switches.
+
+    With positions, a {node name: (x, y)} dict in points, every node is pinned where it was laid out before.
+    """
+    def node(name, label, shape):
+        attributes = f"label={_quote(label)} shape={shape}"
+        if positions is not None and name in positions:
+            x, y = positions[name]
+            attributes += f' pos="{x},{y}!"'
+        return f"  {_quote(name)} [{attributes}];"
+
+    lines = ['graph network_map {',
+             '  graph [overlap=false outputorder=edgesfirst];',
+             '  node [fontsize=8 style=filled fillcolor=cyan];',
+             '  edge [fontsize=7];']
+    for router in graph.routers:
+        interfaces_str = "\n".join([interface.name_speed() for interface in router.get_interfaces()])
+        lines.append(node(router.name, f"{router.name}\n{interfaces_str}", 'box'))
+
+    switches_count = 0
+    for network_node in range(graph.router_count(), graph.node_count()):
+        network = graph.network_of(network_node)
+        hosts = _network_hosts(graph, network_node)
+
+        if len(hosts) == 2:
+            lines.append(f"  {_quote(hosts[0])} -- {_quote(hosts[1])} [label={_quote(network)}];")
+        else:
+            lines.append(node(str(network), f"S{switches_count}\n{network}", 'ellipse'))
+            for host in hosts:
+                lines.append(f"  {_quote(host)} -- {_quote(network)};")
+            switches_count += 1
+
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def parse_positions(layout_json):
+    """Node positions out of the json output of a Graphviz layout."""
+    layout = json.loads(layout_json)
+    positions = {}
+    for laid_out in layout.get('objects', []):
+        if 'pos' in laid_out:
+            x, y = laid_out['pos'].split(',')
+            positions[laid_out['name']] = (float(x), float(y))
+    return positions
+
+
+def load_positions(cache_dir, fingerprint):
+    try:
+        with open(os.path.join(cache_dir, f"{fingerprint}.json")) as file:
+            return {name: tuple(position) for name, position in json.load(file).items()}
+    except (OSError, ValueError):
+        return None
+
+
+def store_positions(cache_dir, fingerprint, positions):
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, f"{fingerprint}.json"), 'w') as file:
+        json.dump(positions, file)
+
+
+def render_network_map(network_manager, graph_file, cache_dir=DEFAULT_CACHE_DIR):
+    """Draws the network map with Graphviz, the layout of an already drawn topology is reused from the cache."""
+    import graphviz
+
+    graph = network_manager.get_topology_graph()
+    fingerprint = topology_fingerprint(graph)
+    positions = load_positions(cache_dir, fingerprint)
+    if positions is None:
+        layout = graphviz.Source(network_dot(graph), engine=LAYOUT_ENGINE).pipe(format='json')
+        positions = parse_positions(layout)
+        store_positions(cache_dir, fingerprint, positions)
+
+    # neato -n2 keeps the given positions and only routes the edges and draws
+    source = graphviz.Source(network_dot(graph, positions), engine='neato')
+    if graph_file == "":
+        graph_file = "network_map.pdf"
+    else:
+        graph_file = f"../../network_map_{graph_file}.pdf"
+    with open(graph_file, 'wb') as file:
+        file.write(source.pipe(format='pdf', neato_no_op=2))
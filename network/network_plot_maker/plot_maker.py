@@ -6,29 +6,26 @@ from network.network_manager import NetworkManager
 
 def draw_network_map(network_manager: NetworkManager, graph_file):
     G = nx.Graph()
-    switches = {}
-    switches_count = 0
+    graph = network_manager.get_topology_graph()
 
     # Add nodes (routers) to the graph
-    for router in network_manager.routers:
+    for router in graph.routers:
         interfaces_str = "\n".join([interface.name_speed() for interface in router.get_interfaces()])
         G.add_node(router.name, label=f"{router.name}\n{interfaces_str}")
 
-        # Add edges (connections between routers)
-        for interface in router.get_interfaces():
-            hosts = interface.get_other_hosts(router)
-
-            if len(hosts) == 1:
-                G.add_edge(router.name, hosts[0].name, label=str(interface.network))
-            elif len(hosts) > 1:
-                if f"{(str(interface.network))}" not in switches:
-                    switches[f"{(str(interface.network))}"] = f"S{switches_count}"
-                    G.add_node(f"{interface.network}", label=f"S{switches_count}\n{interface.network}")
-                    G.add_edge(router.name, f"{interface.network}")
-                    print(f"Added switch {interface.network}")
-                    switches_count += 1
-                else:
-                    G.add_edge(router.name, f"{interface.network}")
+    # Add edges (connections between routers), networks with more than two routers go through a switch
+    switches_count = 0
+    for network_node in range(graph.router_count(), graph.node_count()):
+        network = graph.network_of(network_node)
+        hosts = [graph.routers[graph.targets[edge]].name for edge in graph.edges(network_node)]
+
+        if len(hosts) == 2:
+            G.add_edge(hosts[0], hosts[1], label=str(network))
+        else:
+            G.add_node(f"{network}", label=f"S{switches_count}\n{network}")
+            for host in hosts:
+                G.add_edge(host, f"{network}")
+            switches_count += 1
 
     # Draw the graph with dynamic layout
     pos = nx.spring_layout(G)
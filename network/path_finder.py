@@ -0,0 +1,142 @@
+import heapq
+from array import array
+
+from network.network_classes.TopologyGraph import TopologyGraph
+
+METRICS = ('hops', 'bandwidth')
+# OSPF's default reference bandwidth, 100 Mbps links and faster cost 1
+DEFAULT_REFERENCE_BANDWIDTH = 100000000
+
+
+def speed_cost(speed, reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH):
+    """OSPF cost of a link of the given speed in bps, the reference bandwidth divided by it."""
+    if speed <= 0:
+        # Unknown speed, cost it like a link at the reference bandwidth
+        return 1
+    return max(1, reference_bandwidth // speed)
+
+
+class PathFinder:
+    """Dijkstra over the router adjacency of a TopologyGraph, each source's tree is computed once and cached.
+
+    With the 'hops' metric every link costs 1, with 'bandwidth' links cost like OSPF costs them.
+    """
+
+    def __init__(self, graph: TopologyGraph, metric='hops', reference_bandwidth=DEFAULT_REFERENCE_BANDWIDTH):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {', '.join(METRICS)}")
+
+        self.metric = metric
+        self.reference_bandwidth = reference_bandwidth
+        self._set_graph(graph)
+        # source number -> (distances, predecessors) of its shortest path tree
+        self.trees = {}
+
+    def _set_graph(self, graph: TopologyGraph):
+        self.graph = graph
+        self.routers = graph.routers
+        # Cost of every edge of graph.neighbors
+        if self.metric == 'bandwidth':
+            self.costs = array('I', (speed_cost(speed * 1000, self.reference_bandwidth)
+                                     for speed in graph.neighbor_speeds))
+        else:
+            self.costs = array('I', [1]) * len(graph.neighbors)
+
+    def invalidate(self, sources=None):
+        """Forgets the cached trees of the given source numbers, or of every source."""
+        if sources is None:
+            self.trees = {}
+        else:
+            for source in sources:
+                self.trees.pop(source, None)
+
+    def _link_costs(self, router_numbers):
+        """Cheapest cost of every link from or to the given routers, as {(from, to): cost}."""
+        neighbors = self.graph.neighbors
+        links = {}
+
+        def add(link, cost):
+            if link not in links or cost < links[link]:
+                links[link] = cost
+
+        for number in router_numbers:
+            for edge in self.graph.neighbor_edges(number):
+                adjacent = neighbors[edge]
+                add((number, adjacent), self.costs[edge])
+                for back in self.graph.neighbor_edges(adjacent):
+                    if neighbors[back] == number:
+                        add((adjacent, number), self.costs[back])
+        return links
+
+    def update_graph(self, graph: TopologyGraph, changed_routers):
+        """Moves to a graph of the same routers where only the links of the changed router numbers differ.
+
+        A cached tree is only dropped when a changed link can alter it: a link it uses got dearer or
+        disappeared, or a link got cheaper or appeared that shortens the way to one of its routers.
+        Returns how many trees were dropped.
+        """
+        old_links = self._link_costs(changed_routers)
+        self._set_graph(graph)
+        new_links = self._link_costs(changed_routers)
+        worse = [link for link, cost in old_links.items() if link not in new_links or new_links[link] > cost]
+        better = [(link, cost) for link, cost in new_links.items() if link not in old_links or cost < old_links[link]]
+
+        stale = [source for source, tree in self.trees.items() if self._is_stale(tree, worse, better)]
+        self.invalidate(stale)
+        return len(stale)
+
+    @staticmethod
+    def _is_stale(tree, worse, better):
+        distances, predecessors = tree
+        if any(predecessors[to] == start for start, to in worse):
+            return True
+        return any(distances[start] is not None and (distances[to] is None or distances[start] + cost < distances[to])
+                   for (start, to), cost in better)
+
+    def tree(self, source):
+        """Returns (distances, predecessors) of the shortest path tree rooted at a router number."""
+        tree = self.trees.get(source)
+        if tree is None:
+            tree = self.trees[source] = self._dijkstra(source)
+        return tree
+
+    def _dijkstra(self, source):
+        distances = [None] * len(self.routers)
+        predecessors = [-1] * len(self.routers)
+        distances[source] = 0
+        predecessors[source] = source
+        heap = [(0, source)]
+
+        neighbors = self.graph.neighbors
+        costs = self.costs
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distance > distances[current]:
+                continue
+            for edge in self.graph.neighbor_edges(current):
+                adjacent = neighbors[edge]
+                candidate = distance + costs[edge]
+                if distances[adjacent] is None or candidate < distances[adjacent]:
+                    distances[adjacent] = candidate
+                    predecessors[adjacent] = current
+                    heapq.heappush(heap, (candidate, adjacent))
+
+        return distances, predecessors
+
+    def shortest_path(self, origin, destination):
+        """Returns the routers on the cheapest path between two routers, empty if unreachable."""
+        source = self.graph.router_number(origin)
+        target = self.graph.router_number(destination)
+        distances, predecessors = self.tree(source)
+        if distances[target] is None:
+            return []
+
+        path = [target]
+        while path[-1] != source:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return [self.routers[number] for number in path]
+
+    def path_cost(self, origin, destination):
+        distances, _ = self.tree(self.graph.router_number(origin))
+        return distances[self.graph.router_number(destination)]
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from network.network_classes.HostMonitor import is_timeout
+
+# Rows of each section of the printed report
+DEFAULT_TOP = 10
+
+
+class OperationStats:
+    __slots__ = ('requests', 'seconds', 'max_seconds', 'varbinds', 'timeouts', 'errors')
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.varbinds = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def add(self, seconds, varbinds, error=None):
+        self.requests += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.varbinds += varbinds
+        if error is not None:
+            if is_timeout(error):
+                self.timeouts += 1
+            else:
+                self.errors += 1
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class ProfiledSession:
+    """Wraps an SNMP session and reports every get, walk and bulkwalk it sends to a Profiler."""
+
+    def __init__(self, session, host, profiler):
+        self.session = session
+        self.host = host
+        self.profiler = profiler
+
+    def _call(self, operation, oid, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = getattr(self.session, operation)(oid, *args, **kwargs)
+        except Exception as error:
+            self.profiler.record(self.host, oid, time.perf_counter() - start, 0, error)
+            raise
+        varbinds = len(result) if isinstance(result, (list, tuple)) else 1
+        self.profiler.record(self.host, oid, time.perf_counter() - start, varbinds)
+        return result
+
+    def get(self, oids):
+        return self._call('get', oids)
+
+    def walk(self, oid):
+        return self._call('walk', oid)
+
+    def bulkwalk(self, oid, *args, **kwargs):
+        return self._call('bulkwalk', oid, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class Profiler:
+    """Counts SNMP requests per agent and per OID, and times the phases of a run."""
+
+    def __init__(self):
+        self.hosts = {}
+        self.oids = {}
+        self.phases = {}
+        self.lock = threading.Lock()
+
+    def session_factory(self, session_factory):
+        """Wraps a SessionManager session factory so that every session it opens is profiled."""
+        def profiled_session_factory(hostname, community, version, **options):
+            return ProfiledSession(session_factory(hostname, community, version, **options), str(hostname), self)
+        return profiled_session_factory
+
+    def record(self, host, oid, seconds, varbinds, error=None):
+        # A GET of several scalars is one request, it is counted under all of its OIDs together
+        if isinstance(oid, (list, tuple)):
+            oid = ' '.join(oid)
+        with self.lock:
+            for stats in (self.hosts.setdefault(host, OperationStats()), self.oids.setdefault(oid, OperationStats())):
+                stats.add(seconds, varbinds, error)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'phases': dict(self.phases),
+                'hosts': {host: stats.to_dict() for host, stats in self.hosts.items()},
+                'oids': {oid: stats.to_dict() for oid, stats in self.oids.items()},
+            }
+
+    def dump_json(self, json_file):
+        with open(json_file, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def print_report(self, top=DEFAULT_TOP):
+        report = self.to_dict()
+        print("Phases:")
+        for name, seconds in report['phases'].items():
+            print(f"  {name:20} {seconds * 1000:10.1f} ms")
+
+        for title, section in (("Slowest agents:", report['hosts']), ("Hottest OIDs:", report['oids'])):
+            print(title)
+            print(f"  {'':40} {'requests':>8} {'varbinds':>8} {'timeouts':>8} {'total ms':>10} {'mean ms':>8} "
+                  f"{'max ms':>8}")
+            ranked = sorted(section.items(), key=lambda item: item[1]['seconds'], reverse=True)
+            for key, stats in ranked[:top]:
+                print(f"  {key[:40]:40} {stats['requests']:8} {stats['varbinds']:8} {stats['timeouts']:8} "
+                      f"{stats['seconds'] * 1000:10.1f} {stats['seconds'] * 1000 / stats['requests']:8.2f} "
+                      f"{stats['max_seconds'] * 1000:8.2f}")
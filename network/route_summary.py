@@ -0,0 +1,73 @@
+from collections import deque
+
+import numpy as np
+
+from network.network_classes.Ip import Ip
+from network.network_classes.TopologyGraph import TopologyGraph
+
+
+class RouteSummary:
+    """Shortest paths between every pair of routers, computed once with a BFS from each router.
+
+    predecessors[source, router] holds the number of the router before `router` on the path from `source`,
+    so any path is rebuilt walking back from its destination in O(path length).
+    """
+
+    def __init__(self, graph: TopologyGraph):
+        self.graph = graph
+        self.routers = graph.routers
+        self.ip_owners = {
+            interface.ip.value: number
+            for number, router in enumerate(self.routers)
+            for interface in router.get_interfaces()
+        }
+
+        router_count = graph.router_count()
+        dtype = np.int16 if router_count < np.iinfo(np.int16).max else np.int32
+        self.predecessors = np.full((router_count, router_count), -1, dtype=dtype)
+        for source in range(router_count):
+            self.predecessors[source] = self._search(source)
+
+    def _search(self, source):
+        graph = self.graph
+        predecessors = [-1] * graph.router_count()
+        predecessors[source] = source
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for edge in graph.neighbor_edges(current):
+                adjacent = graph.neighbors[edge]
+                if predecessors[adjacent] < 0:
+                    predecessors[adjacent] = current
+                    queue.append(adjacent)
+        return predecessors
+
+    def router_path(self, source, destination):
+        """Returns the routers on the shortest path between two router numbers, empty if unreachable."""
+        predecessors = self.predecessors[source]
+        if predecessors[destination] < 0:
+            return []
+
+        path = [destination]
+        while path[-1] != source:
+            path.append(int(predecessors[path[-1]]))
+        path.reverse()
+        return [self.routers[number] for number in path]
+
+    def path(self, origin_ip, destination_ip):
+        """Returns the routers between the owners of two interface IPs, None if an IP is unknown."""
+        source = self.ip_owners.get(origin_ip.value)
+        destination = self.ip_owners.get(destination_ip.value)
+        if source is None or destination is None:
+            return None
+        return self.router_path(source, destination)
+
+    def summary(self):
+        """Yields (origin IP, destination IP, sysNames of the path) for every pair of interface IPs."""
+        ips = sorted(self.ip_owners)
+        for origin in ips:
+            for destination in ips:
+                if origin == destination:
+                    continue
+                path = self.router_path(self.ip_owners[origin], self.ip_owners[destination])
+                yield Ip.int_to_octets(origin), Ip.int_to_octets(destination), [router.name for router in path]
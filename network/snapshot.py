@@ -0,0 +1,225 @@
+import gc
+import struct
+import sys
+from array import array
+
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Network import Network
+from network.network_classes.Router import Router, RouterInterface, ChangeIndicators
+from network.network_classes.RoutingTable import RoutingTable
+
+# Snapshot layout, every integer little endian:
+#   header     magic, format version, access router IP and the length of each section
+#   strings    offsets of every string into a UTF-8 blob, index 0 stands for None
+#   routers    ip, name and change indicators of each router (version 2 onwards),
+#              then its first interface and first route (one extra final offset)
+#   interfaces name, ip, netmask, speed and ifIndex of each interface
+#   routes     destination, netmask, next hop and type of each route
+# Networks are not stored, NetworkManager.set_networks derives them from the interfaces.
+SNAPSHOT_MAGIC = b'XSNP'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<4sHIIIII')
+
+ROUTER_COLUMNS = ('ip', 'name') + ChangeIndicators._fields
+# Version 1 snapshots have no change indicators, a refresh walks every router again
+ROUTER_COLUMNS_V1 = ('ip', 'name')
+INDICATOR_UNKNOWN = 0xFFFFFFFF
+ROUTER_OFFSETS = ('interfaces', 'routes')
+INTERFACE_COLUMNS = ('name', 'ip', 'mask', 'speed', 'index')
+ROUTE_COLUMNS = ('destination', 'mask', 'next_hop', 'type')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {None: 0}
+        self.strings = [None]
+
+    def add(self, string):
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def to_bytes(self):
+        blobs = [b''] + [string.encode() for string in self.strings[1:]]
+        offsets = array('I', [0])
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        return _column_bytes(offsets) + b''.join(blobs)
+
+
+def _new_columns(names):
+    return {name: array('I') for name in names}
+
+
+def _column_bytes(column: array):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def save_snapshot(snapshot_file, access_ip: Ip, routers):
+    """Writes the routers with their interfaces and routing tables to a columnar binary snapshot."""
+    strings = _StringTable()
+    router_columns = _new_columns(ROUTER_COLUMNS)
+    router_offsets = _new_columns(ROUTER_OFFSETS)
+    interface_columns = _new_columns(INTERFACE_COLUMNS)
+    route_columns = _new_columns(ROUTE_COLUMNS)
+
+    for router in routers:
+        router_columns['ip'].append(router.ip.value)
+        router_columns['name'].append(strings.add(router.name))
+        indicators = router.indicators or ChangeIndicators(None, None, None, None)
+        for field, value in zip(ChangeIndicators._fields, indicators):
+            router_columns[field].append(INDICATOR_UNKNOWN if value is None else value)
+        router_offsets['interfaces'].append(len(interface_columns['ip']))
+        router_offsets['routes'].append(len(route_columns['destination']))
+
+        for interface in router.get_interfaces():
+            interface_columns['name'].append(strings.add(interface.name))
+            interface_columns['ip'].append(interface.ip.value)
+            interface_columns['mask'].append(interface.network.get_mask().netmask)
+            interface_columns['speed'].append(strings.add(interface.speed))
+            interface_columns['index'].append(strings.add(interface.index))
+
+        for network, next_hop, route_type in router.get_routing_table():
+            route_columns['destination'].append(network.ip.value)
+            route_columns['mask'].append(network.get_mask().netmask)
+            route_columns['next_hop'].append(next_hop.value)
+            route_columns['type'].append(strings.add(str(route_type)))
+
+    router_offsets['interfaces'].append(len(interface_columns['ip']))
+    router_offsets['routes'].append(len(route_columns['destination']))
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, access_ip.value, len(strings.strings),
+                         len(routers), len(interface_columns['ip']), len(route_columns['destination']))
+
+    with open(snapshot_file, 'wb') as file:
+        file.write(header)
+        file.write(strings.to_bytes())
+        for columns in (router_columns, router_offsets, interface_columns, route_columns):
+            for column in columns.values():
+                file.write(_column_bytes(column))
+
+
+class _SnapshotReader:
+    def __init__(self, data: bytes, offset: int):
+        self.data = data
+        self.offset = offset
+
+    def column(self, length):
+        column = array('I')
+        end = self.offset + length * column.itemsize
+        if end > len(self.data):
+            raise SnapshotError("Snapshot is truncated")
+        column.frombytes(self.data[self.offset:end])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        self.offset = end
+        return column
+
+    def columns(self, names, length):
+        return {name: self.column(length) for name in names}
+
+    def strings(self, count):
+        offsets = self.column(count + 1)
+        blob = self.data[self.offset:self.offset + offsets[-1]]
+        self.offset += offsets[-1]
+        return [None] + [blob[offsets[i]:offsets[i + 1]].decode() for i in range(1, count)]
+
+
+def load_snapshot(snapshot_file, columnar_routes=False):
+    """Rebuilds the access router IP and the routers stored in a snapshot without any SNMP request.
+
+    With columnar_routes every routing table is a RoutingTable sliced straight from the route columns.
+    """
+    with open(snapshot_file, 'rb') as file:
+        data = file.read()
+
+    if len(data) < HEADER.size:
+        raise SnapshotError(f"{snapshot_file} is not a network snapshot")
+    magic, version, access_ip, string_count, router_count, interface_count, route_count = HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{snapshot_file} is not a network snapshot")
+    if version not in (1, SNAPSHOT_VERSION):
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    reader = _SnapshotReader(data, HEADER.size)
+    strings = reader.strings(string_count)
+    router_columns = reader.columns(ROUTER_COLUMNS if version > 1 else ROUTER_COLUMNS_V1, router_count)
+    router_offsets = reader.columns(ROUTER_OFFSETS, router_count + 1)
+    interface_columns = reader.columns(INTERFACE_COLUMNS, interface_count)
+    route_columns = reader.columns(ROUTE_COLUMNS, route_count)
+
+    # Only new objects are allocated, pausing the cyclic collector avoids rescanning them over and over
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        routers = _build_routers(strings, router_columns, router_offsets, interface_columns, route_columns,
+                                 columnar_routes)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return Ip.from_int(access_ip), routers
+
+
+def _build_routers(strings, router_columns, router_offsets, interface_columns, route_columns, columnar_routes=False):
+    # Routes and interfaces repeat the same few masks, share one instance of each
+    masks = {}
+
+    def get_mask(mask_value):
+        mask = masks.get(mask_value)
+        if mask is None:
+            mask = masks[mask_value] = Netmask.from_int(mask_value)
+        return mask
+
+    if columnar_routes:
+        # Converted once for the whole snapshot, each table then only slices the columns
+        route_prefixes = array('B', (get_mask(mask_value).prefix_length for mask_value in route_columns['mask']))
+        # Route types as saved, the distinct strings of the snapshot numbered in the order they appear
+        type_codes = {}
+        route_types = array('B', (type_codes.setdefault(string, len(type_codes)) for string in route_columns['type']))
+        type_names = [strings[string] for string in type_codes]
+
+    routers = []
+    for i in range(len(router_columns['ip'])):
+        router = Router(Ip.from_int(router_columns['ip'][i]), columnar_routes=columnar_routes)
+        router.name = strings[router_columns['name'][i]]
+        if 'uptime' in router_columns:
+            router.indicators = ChangeIndicators(*(
+                None if router_columns[field][i] == INDICATOR_UNKNOWN else router_columns[field][i]
+                for field in ChangeIndicators._fields
+            ))
+
+        for j in range(router_offsets['interfaces'][i], router_offsets['interfaces'][i + 1]):
+            ip = Ip.from_int(interface_columns['ip'][j])
+            mask = get_mask(interface_columns['mask'][j])
+            network = Network(Ip.from_int(ip.value & mask.netmask), mask)
+            router.add_interface(RouterInterface(strings[interface_columns['name'][j]], ip, network,
+                                                 strings[interface_columns['speed'][j]],
+                                                 strings[interface_columns['index'][j]]))
+
+        first_route, end_route = router_offsets['routes'][i], router_offsets['routes'][i + 1]
+        if columnar_routes:
+            router.routing_table = RoutingTable.from_columns(route_columns['destination'][first_route:end_route],
+                                                             route_prefixes[first_route:end_route],
+                                                             route_columns['next_hop'][first_route:end_route],
+                                                             route_types[first_route:end_route], type_names)
+        else:
+            for j in range(first_route, end_route):
+                network = Network(Ip.from_int(route_columns['destination'][j]), get_mask(route_columns['mask'][j]))
+                router.add_route((network, Ip.from_int(route_columns['next_hop'][j]),
+                                  strings[route_columns['type'][j]]))
+
+        routers.append(router)
+
+    return routers
+
@@ -0,0 +1,73 @@
+import unittest
+
+from benchmarks.run import benchmark, regressions
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import TOPOLOGIES, generate
+from network.network_classes.Ip import Ip
+from network.network_manager import NetworkManager
+
+
+class TestTopologies(unittest.TestCase):
+
+    def test_sizes(self):
+        for kind in TOPOLOGIES:
+            for size in (1, 2, 25):
+                topology = generate(kind, size)
+                self.assertEqual(len(topology.routers), size)
+                self.assertTrue(all(router.interfaces for router in topology.routers), f"{kind} {size}")
+
+    def test_ring_links(self):
+        topology = generate('ring', 5)
+        self.assertEqual(topology.links, 5)
+        self.assertTrue(all(len(router.neighbor_ips()) == 2 for router in topology.routers))
+
+
+class TestSimulatedDiscovery(unittest.TestCase):
+
+    def discover(self, topology, full_tables=False):
+        simulated = SimulatedNetwork(topology, full_tables=full_tables)
+        return NetworkManager(topology.access_ip(), 'rocom', session_factory=simulated.session_factory)
+
+    def test_ring(self):
+        topology = generate('ring', 6)
+        network_manager = self.discover(topology)
+        self.assertListEqual(sorted(router.name for router in network_manager.routers),
+                             [f"R{number}" for number in range(6)])
+        self.assertEqual(len(network_manager.networks), 6)
+
+        # Opposite routers of the ring are three hops away
+        path = network_manager.get_shortest_path(topology.router_ips()[0], topology.router_ips()[3])
+        self.assertEqual(len(path), 4)
+
+    def test_multi_area_switch(self):
+        network_manager = self.discover(generate('multi-area', 30))
+        self.assertEqual(len(network_manager.routers), 30)
+        backbone = network_manager.networks_by_address[(Ip('172.16.0.0').value, Ip('255.255.255.0').value)]
+        self.assertEqual(len(backbone.get_hosts()), 3)
+
+    def test_full_tables_trace(self):
+        topology = generate('grid', 9)
+        network_manager = self.discover(topology, full_tables=True)
+        path, result = network_manager.trace_route(topology.router_ips()[0], topology.router_ips()[8])
+        self.assertEqual(result, 'delivered')
+        self.assertEqual(len(path), 5)
+
+
+class TestRunner(unittest.TestCase):
+
+    def test_benchmark(self):
+        result = benchmark('hub-and-spoke', 12)
+        self.assertEqual(result['routers'], 12)
+        self.assertGreater(result['pdus'], 0)
+        self.assertSetEqual(set(result['timings']),
+                            {'explore', 'set_networks', 'get_shortest_path', 'get_shortest_path_cached'})
+
+    def test_regressions(self):
+        baseline = [{'topology': 'ring', 'size': 10, 'timings': {'explore': 1.0, 'set_networks': 0.001}}]
+        results = [{'topology': 'ring', 'size': 10, 'timings': {'explore': 2.0, 'set_networks': 0.005}}]
+        self.assertEqual(len(regressions(results, baseline)), 1)
+        self.assertListEqual(regressions(results, baseline, tolerance=3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
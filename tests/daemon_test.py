@@ -0,0 +1,142 @@
+import threading
+import unittest
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate
+from network.daemon import TopologyService, RemoteNetwork, QueryError, answer_query, make_server
+from network.interface_poller import InterfacePoller
+from network.network_classes.Router import ROUTE_NETWORK_OID, ROUTE_NUMBER_OID
+from network.network_manager import NetworkManager, MAX_PATH_FINDERS
+
+
+class TestDaemon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.topology = generate('ring', 4)
+        simulated = SimulatedNetwork(cls.topology, full_tables=True)
+        cls.network_manager = NetworkManager(cls.topology.access_ip(), 'rocom',
+                                             session_factory=simulated.session_factory)
+        cls.service = TopologyService(cls.network_manager, refresh_interval=0)
+        cls.server = make_server(cls.service, port=0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        host, port = cls.server.server_address
+        cls.remote = RemoteNetwork(f"{host}:{port}")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def ip_of(self, number):
+        return self.topology.routers[number].interfaces[0].ip
+
+    def test_routers_and_networks(self):
+        routers = self.remote.query('routers')
+        self.assertListEqual(sorted(router['name'] for router in routers), ['R0', 'R1', 'R2', 'R3'])
+        self.assertTrue(all(router['reachable'] for router in routers))
+        self.assertEqual(len(self.remote.query('networks')), len(self.network_manager.networks))
+
+    def test_path_matches_local_answer(self):
+        local = self.network_manager.get_shortest_path(self.ip_of(0), self.ip_of(2))
+        remote = self.remote.get_shortest_path(self.ip_of(0), self.ip_of(2))
+        self.assertListEqual([router.name for router in remote], [router.name for router in local])
+
+    def test_trace_and_route_summary(self):
+        local_path, local_result = self.network_manager.trace_route(self.ip_of(0), self.ip_of(1))
+        remote_path, remote_result = self.remote.trace_route(self.ip_of(0), self.ip_of(1))
+        self.assertListEqual([router.name for router in remote_path], [router.name for router in local_path])
+        self.assertEqual(remote_result, local_result)
+        self.assertEqual(len(self.remote.query('route-summary')),
+                         len(list(self.network_manager.get_route_summary().summary())))
+
+    def test_refresh_and_unreachable(self):
+        self.assertListEqual(self.remote.refresh(), [])
+        self.assertEqual(self.remote.get_unreachable(), ([], []))
+
+    def test_refresh_loop_survives_errors(self):
+        service = TopologyService(self.network_manager, refresh_interval=0.01)
+        refreshes = []
+
+        def refresh():
+            refreshes.append(len(refreshes))
+            if len(refreshes) == 1:
+                raise RuntimeError("refresh failed")
+            service.stop()
+        service.refresh = refresh
+        with self.assertLogs('network.daemon', 'ERROR'):
+            service._refresh_loop()
+        self.assertListEqual(refreshes, [0, 1])
+
+    def test_path_finders_are_bounded(self):
+        for reference_bandwidth in range(1, 3 * MAX_PATH_FINDERS):
+            self.service.path(self.ip_of(0), self.ip_of(2), 'bandwidth', reference_bandwidth * 10 ** 8)
+        self.assertEqual(len(self.network_manager.path_finders), MAX_PATH_FINDERS)
+        with self.assertRaises(QueryError):
+            self.remote.query('path', origin=self.ip_of(0), destination=self.ip_of(2), metric='bandwidth',
+                              reference_bandwidth=0)
+
+    def test_bad_queries(self):
+        with self.assertRaises(QueryError):
+            self.remote.query('path', origin='not an ip', destination=self.ip_of(1))
+        with self.assertRaises(QueryError):
+            self.remote.query('path', origin='10.1', destination=self.ip_of(1))
+        with self.assertRaises(QueryError):
+            self.remote.query('path', origin=self.ip_of(0), destination=self.ip_of(1), metric='latency')
+        self.assertEqual(answer_query(self.service, 'GET', '/trace?origin=10.0.0.1')[0], 400)
+        self.assertEqual(answer_query(self.service, 'GET', '/unknown')[0], 404)
+        self.assertEqual(answer_query(self.service, 'DELETE', '/routers')[0], 404)
+        self.assertEqual(answer_query(self.service, 'GET', '/interfaces')[0], 400)
+
+    def test_interfaces(self):
+        poller = InterfacePoller(self.network_manager)
+        poller.poll_all()
+        status, interfaces = answer_query(TopologyService(self.network_manager, 0, poller), 'GET', '/interfaces')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(interfaces), sum(len(router.interfaces) for router in self.topology.routers))
+        self.assertTrue(all(interface['oper_status'] == 'up' for interface in interfaces))
+
+
+class TestRefresh(unittest.TestCase):
+
+    def setUp(self):
+        topology = generate('ring', 4)
+        self.simulated = SimulatedNetwork(topology)
+        self.walking = threading.Event()
+        self.resume = threading.Event()
+        # Discovery is not paused, only the walks once the service answers queries
+        self.service = None
+        network_manager = NetworkManager(topology.access_ip(), 'rocom', session_factory=self.session_factory)
+        self.service = TopologyService(network_manager, refresh_interval=0)
+
+    def session_factory(self, *args, **kwargs):
+        session = self.simulated.session_factory(*args, **kwargs)
+        bulkwalk = session.bulkwalk
+
+        def paused_bulkwalk(oid, *walk_args, **walk_kwargs):
+            if oid == ROUTE_NETWORK_OID and session.agent.name == 'R1' and self.service is not None:
+                self.walking.set()
+                self.resume.wait(5)
+            return bulkwalk(oid, *walk_args, **walk_kwargs)
+        session.bulkwalk = paused_bulkwalk
+        return session
+
+    def test_queries_are_answered_during_the_walk(self):
+        agent = next(agent for agent in self.simulated.agents.values() if agent.name == 'R1')
+        agent.scalars[ROUTE_NUMBER_OID] = '99'
+        changes = []
+        refresher = threading.Thread(target=lambda: changes.extend(self.service.refresh()))
+        refresher.start()
+        try:
+            self.assertTrue(self.walking.wait(5))
+            self.assertTrue(self.service.lock.acquire(timeout=1))
+            self.service.lock.release()
+            self.assertEqual(len(self.service.routers()), 4)
+        finally:
+            self.resume.set()
+            refresher.join()
+        self.assertListEqual([(change['name'], change['changes']) for change in changes], [('R1', ['routes'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from network.network_manager import NetworkManager
+from network.network_plot_maker.dot_renderer import (network_dot, topology_fingerprint, parse_positions,
+                                                     load_positions, store_positions)
+from tests.snapshot_test import make_router
+
+
+def make_network_manager(routers):
+    return NetworkManager(routers[0].ip, 'rocom', routers=routers)
+
+
+class TestDotRenderer(unittest.TestCase):
+
+    def setUp(self):
+        # R1, R2 and R3 share 10.0.0.0/24 through a switch, R3 - R4 over 11.0.0.0/24
+        self.routers = [
+            make_router('R1', '10.0.0.1', [('10.0.0.1', '255.255.255.0')]),
+            make_router('R2', '10.0.0.2', [('10.0.0.2', '255.255.255.0')]),
+            make_router('R3', '10.0.0.3', [('10.0.0.3', '255.255.255.0'), ('11.0.0.1', '255.255.255.0')]),
+            make_router('R4', '11.0.0.2', [('11.0.0.2', '255.255.255.0')]),
+        ]
+        self.graph = make_network_manager(self.routers).get_topology_graph()
+
+    def test_dot_source(self):
+        dot = network_dot(self.graph)
+        self.assertTrue(dot.startswith('graph network_map {'))
+        self.assertIn('"R1" [label="R1\\nFastEthernet1/0 Network: 10.0.0.0/24 100000000 Mbps" shape=box];', dot)
+        self.assertIn('"Network: 10.0.0.0/24" [label="S0\\nNetwork: 10.0.0.0/24" shape=ellipse];', dot)
+        self.assertIn('"R2" -- "Network: 10.0.0.0/24";', dot)
+        self.assertIn('"R3" -- "R4" [label="Network: 11.0.0.0/24"];', dot)
+        self.assertNotIn('pos=', dot)
+
+    def test_dot_source_with_positions(self):
+        dot = network_dot(self.graph, {'R1': (10.0, 20.5)})
+        self.assertIn('"R1" [label="R1\\nFastEthernet1/0 Network: 10.0.0.0/24 100000000 Mbps" shape=box '
+                      'pos="10.0,20.5!"];', dot)
+
+    def test_fingerprint_ignores_discovery_order(self):
+        reordered = make_network_manager(list(reversed(self.routers))).get_topology_graph()
+        self.assertEqual(topology_fingerprint(reordered), topology_fingerprint(self.graph))
+
+        changed = make_network_manager(self.routers[:3]).get_topology_graph()
+        self.assertNotEqual(topology_fingerprint(changed), topology_fingerprint(self.graph))
+
+    def test_parse_positions(self):
+        layout = json.dumps({'objects': [{'name': 'R1', 'pos': '27,18'}, {'name': 'cluster'}]})
+        self.assertDictEqual(parse_positions(layout.encode()), {'R1': (27.0, 18.0)})
+
+    def test_position_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            fingerprint = topology_fingerprint(self.graph)
+            self.assertIsNone(load_positions(cache_dir, fingerprint))
+            store_positions(cache_dir, fingerprint, {'R1': (27.0, 18.0)})
+            self.assertDictEqual(load_positions(cache_dir, fingerprint), {'R1': (27.0, 18.0)})
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate
+from network.network_classes.HostMonitor import HostMonitor, HostUnreachable, MonitoredSession, is_snmp_error
+from network.network_manager import NetworkManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimingOutSession:
+    def __init__(self, clock):
+        self.clock = clock
+
+    def get(self, oids):
+        self.clock.now += 1
+        raise TimeoutError("timed out while connecting to remote host")
+
+
+class TestHostMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.monitor = HostMonitor(deadline=100, clock=self.clock)
+
+    def test_timeout_follows_rtt(self):
+        self.assertEqual(self.monitor.timeout('10.0.0.1'), 1.0)
+        for _ in range(10):
+            self.monitor.record_success('10.0.0.1', 0.5)
+        self.assertAlmostEqual(self.monitor.timeout('10.0.0.1'), 0.5, delta=0.1)
+        # Agents never polled start from what the others answer in
+        self.assertAlmostEqual(self.monitor.timeout('10.0.0.2'), 0.5, delta=0.1)
+
+        self.monitor.record_failure('10.0.0.1')
+        self.assertAlmostEqual(self.monitor.timeout('10.0.0.1'), 1.0, delta=0.2)
+
+    def test_circuit_breaker(self):
+        for _ in range(3):
+            self.monitor.check('10.0.0.1')
+            self.monitor.record_failure('10.0.0.1')
+        with self.assertRaises(HostUnreachable):
+            self.monitor.check('10.0.0.1')
+        self.assertListEqual(self.monitor.unreachable_hosts(), ['10.0.0.1'])
+
+        # Asked again once the cooldown passed, a success closes the circuit
+        self.clock.now += 60
+        self.monitor.check('10.0.0.1')
+        self.monitor.record_success('10.0.0.1', 0.01)
+        self.assertListEqual(self.monitor.unreachable_hosts(), [])
+
+    def test_deadline(self):
+        self.clock.now = 99.5
+        self.assertEqual(self.monitor.timeout('10.0.0.1'), 0.5)
+        self.clock.now = 100
+        self.assertTrue(self.monitor.expired())
+        with self.assertRaises(HostUnreachable):
+            self.monitor.check('10.0.0.1')
+
+    def test_monitored_session(self):
+        timeouts = []
+
+        def open_session(timeout):
+            timeouts.append(timeout)
+            return TimingOutSession(self.clock)
+
+        session = MonitoredSession('10.0.0.1', open_session, self.monitor)
+        with self.assertRaises(HostUnreachable) as raised:
+            session.get('sysName.0')
+        self.assertTrue(is_snmp_error(raised.exception))
+        # The doubled timeout reopens the session
+        with self.assertRaises(HostUnreachable):
+            session.get('sysName.0')
+        self.assertListEqual(timeouts, [1.0, 2.0])
+
+
+class TestPartialDiscovery(unittest.TestCase):
+
+    def test_dead_router_is_skipped(self):
+        # R2 of the ring never answers, the others are still found going round the other way
+        topology = generate('ring', 6)
+        simulated = SimulatedNetwork(topology, dead_routers={2})
+        network_manager = NetworkManager(topology.access_ip(), 'rocom', session_factory=simulated.session_factory)
+
+        self.assertListEqual(sorted(router.name for router in network_manager.routers),
+                             ['R0', 'R1', 'R3', 'R4', 'R5'])
+        unreachable_routers, unreachable_ips = network_manager.get_unreachable()
+        self.assertListEqual(unreachable_routers, [])
+        # R1 and R3 both report R2 with the same router-id, it is only probed once
+        self.assertEqual(len(unreachable_ips), 1)
+
+    def test_deadline_returns_partial_results(self):
+        # Walking the whole ring takes over a second at 10 ms per PDU
+        topology = generate('ring', 20)
+        simulated = SimulatedNetwork(topology, latency=0.01)
+        network_manager = NetworkManager(topology.access_ip(), 'rocom', session_factory=simulated.session_factory,
+                                         deadline=0.3)
+        self.assertLess(len(network_manager.routers), 20)
+        unreachable_routers, unreachable_ips = network_manager.get_unreachable()
+        self.assertTrue(unreachable_routers or unreachable_ips)
+
+
+if __name__ == '__main__':
+    unittest.main()
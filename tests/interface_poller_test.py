@@ -0,0 +1,134 @@
+import time
+import unittest
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate, LINK_SPEED
+from network.interface_poller import InterfacePoller, counter_delta, COUNTER_MODULUS_64, IF_IN_OCTETS_OID, \
+    IF_OUT_OCTETS_OID
+from network.network_classes.Ip import Ip
+from network.network_classes.Router import RouterInterface
+from network.network_manager import NetworkManager
+
+
+class TestInterfacePoller(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = generate('ring', 4)
+        self.simulated = SimulatedNetwork(self.topology)
+        self.network_manager = NetworkManager(self.topology.access_ip(), 'rocom',
+                                              session_factory=self.simulated.session_factory)
+        self.now = 0.0
+        self.poller = InterfacePoller(self.network_manager, clock=lambda: self.now)
+        # Octets counted by every interface, set by each test instead of growing with time
+        self.octets = {}
+        for router in self.topology.routers:
+            self.agent(router.name).octets = lambda index, router=router.name: self.octets.get((router, index), '0')
+
+    def agent(self, name):
+        return next(agent for agent in self.simulated.agents.values() if agent.name == name)
+
+    def poll(self, name, octets, elapsed=10.0):
+        self.octets[name, '1'] = str(octets)
+        self.now += elapsed
+        samples = self.poller.poll_router(self.network_manager.get_router_by_name(name))
+        return next(sample for sample in samples if sample.interface.index == '1')
+
+    def test_utilization(self):
+        first = self.poll('R0', 0)
+        self.assertEqual(first.oper_status, 'up')
+        self.assertIsNone(first.in_bps)
+
+        # A quarter of the link speed for 10 seconds
+        sample = self.poll('R0', LINK_SPEED // 4 * 10 // 8)
+        self.assertAlmostEqual(sample.in_bps, LINK_SPEED / 4)
+        self.assertAlmostEqual(sample.in_utilization, 0.25)
+        self.assertEqual(sample.in_errors, 0)
+
+    def test_own_sessions(self):
+        # The refresh and live-update walks use the sessions of the network manager at the same time
+        opened = self.network_manager.sessions.opened
+        self.poller.poll_all()
+        self.assertEqual(self.network_manager.sessions.opened, opened)
+        self.assertEqual(self.poller.sessions.opened, len(self.topology.routers))
+
+    def test_secondary_addresses_are_polled_once(self):
+        router = self.network_manager.get_router_by_name('R0')
+        primary = next(interface for interface in router.get_interfaces() if interface.index == '1')
+        router.interfaces.append(RouterInterface('secondary', Ip('192.168.50.1'), primary.network, primary.speed, '1'))
+        self.poll('R0', 0)
+        sample = self.poll('R0', 10 ** 6)
+        self.assertIs(sample.interface, primary)
+        self.assertAlmostEqual(sample.in_bps, 8 * 10 ** 5)
+        latest = [sample for sample in self.poller.latest_samples() if sample.router is router]
+        self.assertEqual(len(latest), len({interface.index for interface in router.get_interfaces()}))
+
+    def test_run_logs_poll_errors(self):
+        poller = InterfacePoller(self.network_manager, interval=0.01)
+        poller.poll_router = lambda router: 1 / 0
+        with self.assertLogs('network.interface_poller', 'ERROR') as logs:
+            poller.run(rounds=1)
+        self.assertEqual(len(logs.records), len(self.topology.routers))
+
+    def test_counter_wrap(self):
+        self.assertEqual(counter_delta(COUNTER_MODULUS_64 - 10, 5, COUNTER_MODULUS_64), 15)
+        self.poll('R0', COUNTER_MODULUS_64 - 1000)
+        sample = self.poll('R0', 250, elapsed=1.0)
+        self.assertAlmostEqual(sample.in_bps, 1250 * 8)
+
+    def test_counter_reset_is_not_traffic(self):
+        self.poll('R0', 10 ** 12)
+        sample = self.poll('R0', 100)
+        self.assertIsNone(sample.in_bps)
+        self.assertIsNone(sample.in_utilization)
+        self.assertAlmostEqual(self.poll('R0', 100 + 1250).in_bps, 1000)
+
+    def test_too_big_halves_the_request(self):
+        limit = 7
+        factory = self.simulated.session_factory
+
+        def session_factory(*args, **kwargs):
+            session = factory(*args, **kwargs)
+            get = session.get
+
+            def limited_get(oids):
+                if isinstance(oids, list) and len(oids) > limit:
+                    raise Exception("Error in packet: (tooBig) Response message would have been too large.")
+                return get(oids)
+            session.get = limited_get
+            return session
+
+        network_manager = NetworkManager(self.topology.access_ip(), 'rocom', session_factory=session_factory)
+        poller = InterfacePoller(network_manager, max_varbinds=20)
+        router = network_manager.get_router_by_name('R0')
+        self.assertEqual(len(poller.poll_router(router)), len(router.get_interfaces()))
+        self.assertEqual(poller.states['R0'].max_varbinds, 5)
+
+    def test_32_bit_fallback(self):
+        agent = self.agent('R1')
+        agent.octets = lambda index: None
+        agent.columns[IF_IN_OCTETS_OID] = {'1': '4294967000'}
+        agent.columns[IF_OUT_OCTETS_OID] = {'1': '0'}
+        router = self.network_manager.get_router_by_name('R1')
+        self.assertListEqual(self.poller.poll_router(router), [])
+        self.assertFalse(self.poller.states['R1'].high_capacity)
+
+        self.now += 1.0
+        self.poller.poll_router(router)
+        agent.columns[IF_IN_OCTETS_OID]['1'] = '704'
+        self.now += 1.0
+        sample = next(sample for sample in self.poller.poll_router(router) if sample.interface.index == '1')
+        self.assertAlmostEqual(sample.in_bps, 1000 * 8)
+
+    def test_run_spreads_routers_over_the_interval(self):
+        times = []
+        poller = InterfacePoller(self.network_manager, interval=0.4,
+                                 on_samples=lambda samples: times.append(time.monotonic()))
+        start = time.monotonic()
+        poller.run(rounds=1)
+        self.assertEqual(len(times), len(self.topology.routers))
+        self.assertGreaterEqual(max(times) - start, 0.25)
+        self.assertEqual(len(poller.latest_samples()), sum(len(router.interfaces) for router in self.topology.routers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from network.network_classes.Ip import Ip
+from network.network_classes.Ip import Ip, _interned_ips
 
 
 class TestIp(unittest.TestCase):
@@ -40,6 +40,24 @@ class TestIp(unittest.TestCase):
         self.assertFalse(Ip('255.255.255.255') < Ip('0.0.0.0'))
         self.assertTrue(Ip('8.8.4.4') < Ip('8.8.8.8'))
 
+    def test_interned(self):
+        self.assertIs(Ip('10.0.0.1'), Ip('10.0.0.1'))
+        self.assertIs(Ip.from_int(167772161), Ip('10.0.0.1'))
+
+    def test_unused_ips_are_released(self):
+        Ip('10.99.99.99')
+        self.assertNotIn(Ip.octets_to_int('10.99.99.99'), _interned_ips)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Ip, '10.0.0.256')
+        self.assertRaises(ValueError, Ip, 'router')
+        for malformed in ('10', '10.1', '10.0.1', '0x0a.0.0.1', '10.0.0.1 junk', '10.0.0.1.5', '10..0.1', ' 10.0.0.1',
+                          '10.0.0.-1', '10.0.0.1000', ''):
+            self.assertRaises(ValueError, Ip, malformed)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(Ip('10.0.0.1'), '__dict__'))
+
 
 if __name__ == '__main__':
     unittest.main()
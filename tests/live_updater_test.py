@@ -0,0 +1,177 @@
+import threading
+import unittest
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate
+from network.live_updater import LiveUpdater
+from network.mib_states import NBR_STATES
+from network.network_classes.Router import OSPF_NBR_IP_OID, OSPF_NBR_RTR_ID_OID, OSPF_NBR_STATE_OID
+from network.network_manager import NetworkManager
+from traps.pdu import decode_message, ospf_nbr_state_change, to_record
+
+
+NBR_STATE_NUMBERS = {name: number for number, name in NBR_STATES.items()}
+
+
+def nbr_state_change(router, neighbor_ip, neighbor_router_id, state):
+    """Record of the trap a synthetic router sends when its adjacency with a neighbor changes state."""
+    trap = ospf_nbr_state_change('rocom', router.router_id, neighbor_ip, neighbor_router_id, state)
+    return to_record(decode_message(trap), router.interfaces[0].ip, 0.0)
+
+
+def set_adjacency_state(simulated, first, second, state):
+    """Sets the ospfNbrState two synthetic routers list each other with, None takes them out of each other's table."""
+    for router, neighbor in ((first, second), (second, first)):
+        columns = simulated.agents[router.interfaces[0].ip].columns
+        for neighbor_ip, router_id in router.neighbors():
+            if router_id != neighbor.router_id:
+                continue
+            index = f"{neighbor_ip}.0"
+            if state is None:
+                for column in (OSPF_NBR_IP_OID, OSPF_NBR_RTR_ID_OID, OSPF_NBR_STATE_OID):
+                    del columns[column][index]
+            else:
+                columns[OSPF_NBR_IP_OID][index] = neighbor_ip
+                columns[OSPF_NBR_RTR_ID_OID][index] = router_id
+                columns[OSPF_NBR_STATE_OID][index] = str(NBR_STATE_NUMBERS[state])
+
+
+class TestLiveUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = generate('ring', 6)
+        self.simulated = SimulatedNetwork(self.topology, full_tables=True)
+        self.network_manager = NetworkManager(self.topology.access_ip(), 'rocom',
+                                              session_factory=self.simulated.session_factory)
+        self.updater = LiveUpdater(self.network_manager)
+
+    def ip_of(self, number):
+        return self.topology.routers[number].interfaces[0].ip
+
+    def path(self, origin, destination):
+        return [router.name for router in self.network_manager.get_shortest_path(self.ip_of(origin),
+                                                                                 self.ip_of(destination))]
+
+    def test_adjacency_down_and_up(self):
+        self.assertListEqual(self.path(0, 2), ['R0', 'R1', 'R2'])
+        r0, r1 = self.topology.routers[0], self.topology.routers[1]
+        neighbor_ip, neighbor_router_id = r0.neighbors()[0]
+        self.assertEqual(neighbor_router_id, r1.router_id)
+
+        set_adjacency_state(self.simulated, r0, r1, 'down')
+        self.updater.write(nbr_state_change(r0, neighbor_ip, neighbor_router_id, 'down'))
+        self.updater.flush().result()
+        self.assertListEqual(self.path(0, 2), ['R0', 'R5', 'R4', 'R3', 'R2'])
+        self.assertEqual(len(self.network_manager.networks), 6)
+
+        set_adjacency_state(self.simulated, r0, r1, 'full')
+        self.updater.write(nbr_state_change(r0, neighbor_ip, neighbor_router_id, 'init'))
+        self.updater.write(nbr_state_change(r0, neighbor_ip, neighbor_router_id, 'full'))
+        self.updater.flush().result()
+        self.assertListEqual(self.path(0, 2), ['R0', 'R1', 'R2'])
+
+    def test_neighbor_tables_override_traps(self):
+        r0, r1 = self.topology.routers[0], self.topology.routers[1]
+        neighbor_ip, neighbor_router_id = r0.neighbors()[0]
+        # Both ends deleted each other once the adjacency went down, the trap tells its state
+        set_adjacency_state(self.simulated, r0, r1, None)
+        self.updater.write(nbr_state_change(r0, neighbor_ip, neighbor_router_id, 'down'))
+        self.updater.flush().result()
+        self.assertListEqual(self.path(0, 2), ['R0', 'R5', 'R4', 'R3', 'R2'])
+
+        # The trap of the adjacency coming back is lost, the next refresh finds it full
+        set_adjacency_state(self.simulated, r0, r1, 'full')
+        self.network_manager.refresh()
+        self.assertSetEqual(self.network_manager.down_adjacencies, set())
+        self.assertListEqual(self.path(0, 2), ['R0', 'R1', 'R2'])
+
+        # An adjacency listed in any state but full or two-way is down, whatever the traps said
+        set_adjacency_state(self.simulated, r0, r1, 'exchange')
+        self.network_manager.refresh()
+        self.assertListEqual(self.path(0, 2), ['R0', 'R5', 'R4', 'R3', 'R2'])
+
+    def test_only_affected_trees_are_dropped(self):
+        # Every shortest path tree of a ring uses all of its links but one, a grid has many that do not
+        topology = generate('grid', 16)
+        simulated = SimulatedNetwork(topology)
+        network_manager = NetworkManager(topology.access_ip(), 'rocom', session_factory=simulated.session_factory)
+        path_finder = network_manager.get_path_finder()
+        graph = network_manager.get_topology_graph()
+        sources = range(graph.router_count())
+        for source in sources:
+            path_finder.tree(source)
+
+        router = topology.routers[0]
+        neighbor_ip, neighbor_router_id = router.neighbors()[1]
+        ends = [graph.router_number(network_manager.get_router_by_router_id(router_id))
+                for router_id in (router.router_id, neighbor_router_id)]
+        using_link = {source for source, (_, predecessors) in path_finder.trees.items()
+                      if predecessors[ends[1]] == ends[0] or predecessors[ends[0]] == ends[1]}
+        self.assertLess(len(using_link), len(sources))
+
+        updater = LiveUpdater(network_manager)
+        set_adjacency_state(simulated, router, next(neighbor for neighbor in topology.routers
+                                                    if neighbor.router_id == neighbor_router_id), 'down')
+        updater.write(nbr_state_change(router, neighbor_ip, neighbor_router_id, 'down'))
+        updater.flush().result()
+        self.assertSetEqual(set(sources) - set(path_finder.trees), using_link)
+
+    def test_new_neighbor_is_discovered(self):
+        # R2 was down during discovery and comes back, R1 sends the trap of their adjacency reaching full
+        alive_agents = dict(self.simulated.agents)
+        for interface in self.topology.routers[2].interfaces:
+            del self.simulated.agents[interface.ip]
+        network_manager = NetworkManager(self.topology.access_ip(), 'rocom',
+                                         session_factory=self.simulated.session_factory)
+        self.assertIsNone(network_manager.get_router_by_name('R2'))
+        self.simulated.agents.update(alive_agents)
+
+        router = self.topology.routers[1]
+        updater = LiveUpdater(network_manager)
+        updater.write(nbr_state_change(router, *router.neighbors()[1], 'full'))
+        self.assertListEqual([new_router.name for new_router in updater.flush().result()], ['R2'])
+        path = network_manager.get_shortest_path(self.ip_of(1), self.ip_of(2))
+        self.assertListEqual([router.name for router in path], ['R1', 'R2'])
+
+    def test_walk_runs_off_the_receiving_thread_and_lock(self):
+        lock = threading.Lock()
+        updater = LiveUpdater(self.network_manager, lock)
+        walking, resume = threading.Event(), threading.Event()
+        walk_update = self.network_manager.walk_update
+
+        def paused_walk_update(routers):
+            walking.set()
+            resume.wait(5)
+            return walk_update(routers)
+        self.network_manager.walk_update = paused_walk_update
+
+        r0 = self.topology.routers[0]
+        updater.write(nbr_state_change(r0, *r0.neighbors()[0], 'full'))
+        future = updater.flush()
+        try:
+            self.assertTrue(walking.wait(5))
+            self.assertFalse(future.done())
+            self.assertTrue(lock.acquire(timeout=1))
+            lock.release()
+        finally:
+            resume.set()
+        self.assertListEqual(future.result(), [])
+        updater.close()
+        self.assertEqual(updater.applied, 1)
+
+    def test_failures_are_logged(self):
+        self.network_manager.walk_update = lambda routers: 1 / 0
+        r0 = self.topology.routers[0]
+        self.updater.write(nbr_state_change(r0, *r0.neighbors()[0], 'full'))
+        with self.assertLogs('network.live_updater', 'ERROR'):
+            future = self.updater.flush()
+            self.assertIsInstance(future.exception(), ZeroDivisionError)
+            self.updater.close()
+
+    def test_unknown_routers_are_ignored(self):
+        self.updater.write({'trap': 'ospfNbrStateChange', 'source': '192.168.0.1', 'ospfRouterId': '9.9.9.9'})
+        self.assertTupleEqual(self.updater.affected(self.updater.pending), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
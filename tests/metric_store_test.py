@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from metrics.store import MetricStore, RingFile, SERIES_CHUNK
+
+# On a minute, so the two samples of each minute of the tests fall in the same 1m bucket
+START = 1699999980.0
+
+
+class TestMetricStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MetricStore(self.directory.name, raw_capacity=10, rollups={'1m': (60, 5)})
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def write_minutes(self, minutes, router='R1', interface='Gi0/0', per_minute=2):
+        for minute in range(minutes):
+            for sample in range(per_minute):
+                self.store.write('in_bps', router, interface, START + minute * 60 + sample * 30,
+                                 minute * 10 + sample)
+        self.store.flush()
+
+    def test_ring_keeps_the_latest_points(self):
+        self.write_minutes(8)
+        raw = self.store.read('in_bps', 'R1', 'Gi0/0')
+        self.assertListEqual(raw.value.tolist(), [30, 31, 40, 41, 50, 51, 60, 61, 70, 71])
+        self.assertIsNone(raw.min)
+        recent = self.store.read('in_bps', 'R1', 'Gi0/0', start=START + 5 * 60, end=START + 7 * 60)
+        self.assertListEqual(recent.value.tolist(), [50, 51, 60, 61])
+        self.assertTrue(np.shares_memory(recent.value, self.store.rings['in_bps']['raw'].columns['value']))
+
+    def test_rollups_are_updated_incrementally(self):
+        self.write_minutes(3)
+        minutes = self.store.read('in_bps', 'R1', 'Gi0/0', resolution='1m')
+        self.assertListEqual(minutes.time.tolist(), [START + minute * 60 for minute in range(3)])
+        self.assertListEqual(minutes.value.tolist(), [0.5, 10.5, 20.5])
+        self.assertListEqual(minutes.max.tolist(), [1, 11, 21])
+        self.assertListEqual(minutes.count.tolist(), [2, 2, 2])
+
+        # A sample in the latest bucket updates it in place
+        self.store.write('in_bps', 'R1', 'Gi0/0', START + 2 * 60 + 45, 8)
+        self.store.flush()
+        latest = self.store.read('in_bps', 'R1', 'Gi0/0', resolution='1m')
+        self.assertEqual(len(latest.time), 3)
+        self.assertEqual(latest.min[-1], 8)
+        self.assertAlmostEqual(latest.value[-1], (20 + 21 + 8) / 3)
+
+    def test_auto_resolution(self):
+        self.write_minutes(8)
+        self.assertIsNone(self.store.read('in_bps', 'R1', 'Gi0/0', start=START + 5 * 60, resolution='auto').min)
+        # Neither ring goes back to the start, the one going back furthest answers
+        series = self.store.read('in_bps', 'R1', 'Gi0/0', start=START, resolution='auto')
+        self.assertListEqual(series.value.tolist(), [30.5, 40.5, 50.5, 60.5, 70.5])
+        with self.assertRaises(ValueError):
+            self.store.read('in_bps', 'R1', 'Gi0/0', resolution='5m')
+
+    def test_reader_sees_the_writer(self):
+        self.write_minutes(1)
+        reader = MetricStore(self.directory.name, read_only=True)
+        self.assertListEqual(reader.families(), ['in_bps'])
+        self.assertIsNone(reader.read('in_bps', 'R2', 'Gi0/0'))
+
+        # New series past the rows the reader mapped, and new points of the ones it has
+        for number in range(SERIES_CHUNK + 1):
+            self.store.write('in_bps', f"R{number + 2}", 'Gi0/0', START, number)
+        self.write_minutes(2)
+        self.assertEqual(len(reader.series('in_bps')), SERIES_CHUNK + 2)
+        self.assertListEqual(reader.read('in_bps', f"R{SERIES_CHUNK + 2}", 'Gi0/0').value.tolist(), [SERIES_CHUNK])
+        self.assertEqual(len(reader.read('in_bps', 'R1', 'Gi0/0').time), 4)
+        reader.close()
+
+    def test_files_keep_their_size(self):
+        self.write_minutes(1)
+        path = os.path.join(self.directory.name, 'in_bps.raw.ring')
+        size = os.path.getsize(path)
+        self.write_minutes(50)
+        self.assertEqual(os.path.getsize(path), size)
+
+        # Reopened with other settings, a file keeps the capacity it was created with
+        self.store.close()
+        self.assertEqual(RingFile(path, 1000).capacity, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -68,5 +68,17 @@ class TestNetmask(unittest.TestCase):
         self.assertNotEqual(Netmask('255.255.255.0'), Netmask('0.0.0.0'))
         self.assertNotEqual(Netmask('255.255.255.0'), Netmask('128.0.0.0'))
 
+    def test_from_prefix(self):
+        self.assertEqual(Netmask.from_prefix(24), Netmask('255.255.255.0'))
+        self.assertEqual(Netmask.from_prefix(0), Netmask('0.0.0.0'))
+        self.assertEqual(Netmask.from_prefix(32), Netmask('255.255.255.255'))
+
+    def test_interned(self):
+        self.assertIs(Netmask('255.255.0.0'), Netmask.from_prefix(16))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(Netmask('255.255.0.0'), '__dict__'))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import sys
+import unittest
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate
+from network.network_classes.Ip import Ip
+from network.network_classes.NetworkExplorer import NetworkExplorer
+from network.network_classes.Router import Router, IF_TABLE_LAST_CHANGE_OID, IP_MASK_OID
+from network.network_classes.SessionManager import SessionManager, DEFAULT_MAX_SESSIONS
+
+
+def explorer(topology, workers, max_sessions=DEFAULT_MAX_SESSIONS):
+    sessions = SessionManager(max_sessions, SimulatedNetwork(topology).session_factory)
+    access_router = Router(Ip(topology.access_ip()), sessions)
+    access_router.get_name('rocom')
+    return NetworkExplorer(access_router, 'rocom', workers)
+
+
+class TestNetworkExplorer(unittest.TestCase):
+
+    def test_long_ring_does_not_recurse(self):
+        # Each router deeper in the ring used to be explored a few stack frames further down
+        topology = generate('ring', 400)
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(150)
+        try:
+            routers = explorer(topology, workers=1).explore()
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        self.assertEqual(len(routers), 400)
+
+    def test_breadth_first_order_whatever_the_workers(self):
+        topology = generate('grid', 25)
+        names = [router.name for router in explorer(topology, workers=1).explore()]
+        self.assertEqual(names[0], 'R0')
+        self.assertEqual(len(set(names)), 25)
+        self.assertListEqual([router.name for router in explorer(topology, workers=8).explore()], names)
+
+    def test_frontier_wider_than_the_sessions(self):
+        # The hub's 299 spokes form a single frontier, each spoke's session must survive from its probe to its walk
+        network_explorer = explorer(generate('hub-and-spoke', 300), workers=8, max_sessions=16)
+        self.assertEqual(len(network_explorer.explore()), 300)
+        self.assertEqual(network_explorer.sessions.opened, 300)
+
+        # Polled and walked max_sessions routers at a time, whichever worker gets to them first
+        network_explorer.refresh()
+        self.assertEqual(network_explorer.sessions.opened, 600)
+
+    def test_failed_walk_keeps_the_tables_and_is_retried(self):
+        topology = generate('ring', 5)
+        simulated = SimulatedNetwork(topology)
+        failures = []
+
+        def session_factory(*args, **kwargs):
+            session = simulated.session_factory(*args, **kwargs)
+            bulkwalk = session.bulkwalk
+
+            def failing_bulkwalk(oid, *walk_args, **walk_kwargs):
+                if oid == IP_MASK_OID and session.agent.name in failures:
+                    failures.remove(session.agent.name)
+                    raise TimeoutError("Timed out while connecting to remote host")
+                return bulkwalk(oid, *walk_args, **walk_kwargs)
+            session.bulkwalk = failing_bulkwalk
+            return session
+
+        access_router = Router(Ip(topology.access_ip()), SessionManager(session_factory=session_factory))
+        access_router.get_name('rocom')
+        network_explorer = NetworkExplorer(access_router, 'rocom')
+        network_explorer.explore()
+        r4 = network_explorer.routers_by_name['R4']
+        interfaces = r4.get_interfaces()
+
+        agent = next(agent for agent in simulated.agents.values() if agent.name == 'R4')
+        agent.scalars[IF_TABLE_LAST_CHANGE_OID] = '500'
+        failures.append('R4')
+        network_explorer.refresh()
+        network_explorer.swap_walked()
+        self.assertFalse(r4.reachable)
+        self.assertListEqual(r4.get_interfaces(), interfaces)
+
+        # Its indicators were not kept, the next refresh walks the interfaces again
+        changes = dict(network_explorer.refresh())
+        network_explorer.swap_walked()
+        self.assertSetEqual(changes[r4], {'interfaces'})
+        self.assertTrue(r4.reachable)
+        self.assertEqual(len(r4.get_interfaces()), len(interfaces))
+        self.assertListEqual(network_explorer.refresh(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Network import Network
+from network.network_manager import NetworkManager
+from tests.snapshot_test import make_router
+
+
+class TestNetworkManagerIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.network_manager = NetworkManager('10.0.0.1', 'rocom', routers=[
+            make_router('R1', '10.0.0.1', [('10.0.0.1', '255.255.255.0')]),
+            make_router('R2', '10.0.0.2', [('10.0.0.2', '255.255.255.0'), ('11.0.0.1', '255.255.255.0')]),
+            make_router('R3', '11.0.0.2', [('11.0.0.2', '255.255.255.0')]),
+        ])
+
+    def test_get_router(self):
+        self.assertEqual(self.network_manager.get_router('10.0.0.2').name, 'R2')
+        self.assertEqual(self.network_manager.get_router('11.0.0.1').name, 'R2')
+        self.assertIsNone(self.network_manager.get_router('99.0.0.1'))
+
+    def test_get_router_by_name(self):
+        self.assertEqual(self.network_manager.get_router_by_name('R3').ip, Ip('11.0.0.2'))
+        self.assertIsNone(self.network_manager.get_router_by_name('R9'))
+
+    def test_get_interface(self):
+        router, interface = self.network_manager.get_interface('11.0.0.1')
+        self.assertEqual(router.name, 'R2')
+        self.assertEqual(interface.ip, Ip('11.0.0.1'))
+        self.assertIsNone(self.network_manager.get_interface('99.0.0.1'))
+
+    def test_get_network_hosts(self):
+        network = Network(Ip('10.0.0.0'), Netmask('255.255.255.0'))
+        self.assertListEqual([router.name for router in self.network_manager.get_network_hosts(network)],
+                             ['R1', 'R2'])
+
+    def test_add_router(self):
+        self.network_manager.add_router(make_router('R4', '12.0.0.1', [('12.0.0.1', '255.255.255.0')]))
+        self.assertEqual(self.network_manager.get_router('12.0.0.1').name, 'R4')
+
+    def test_routers_in_sets(self):
+        routers = set(self.network_manager.routers)
+        self.assertIn(self.network_manager.get_router_by_name('R1'), routers)
+        self.assertEqual(len(routers), 3)
+
+    def test_get_shortest_path(self):
+        path = self.network_manager.get_shortest_path('10.0.0.1', '11.0.0.2')
+        self.assertListEqual([router.name for router in path], ['R1', 'R2', 'R3'])
+        self.assertIsNone(self.network_manager.get_shortest_path('10.0.0.1', '99.0.0.1'))
+
+
+class TestTraceRoute(unittest.TestCase):
+
+    def setUp(self):
+        # R1 - R2 - R3 in a chain, R3 has a default route back to R2 and R2 sends 13.0.0.0/8 nowhere
+        self.network_manager = NetworkManager('10.0.0.1', 'rocom', routers=[
+            make_router('R1', '10.0.0.1', [('10.0.0.1', '255.255.255.0')],
+                        [('10.0.0.0', '255.255.255.0', '0.0.0.0', '3'), ('0.0.0.0', '0.0.0.0', '10.0.0.2', '4')]),
+            make_router('R2', '10.0.0.2', [('10.0.0.2', '255.255.255.0'), ('11.0.0.1', '255.255.255.0')],
+                        [('10.0.0.0', '255.255.255.0', '0.0.0.0', '3'), ('11.0.0.0', '255.255.255.0', '0.0.0.0', '3'),
+                         ('12.0.0.0', '255.0.0.0', '11.0.0.2', '4'), ('13.0.0.0', '255.0.0.0', '0.0.0.0', '2'),
+                         ('14.0.0.0', '255.0.0.0', '11.0.0.2', '4')]),
+            make_router('R3', '11.0.0.2', [('11.0.0.2', '255.255.255.0'), ('12.0.0.1', '255.255.255.0')],
+                        [('11.0.0.0', '255.255.255.0', '0.0.0.0', '3'), ('12.0.0.0', '255.255.255.0', '0.0.0.0', '3'),
+                         ('0.0.0.0', '0.0.0.0', '11.0.0.1', '4')]),
+        ])
+
+    def trace(self, origin, destination):
+        path, result = self.network_manager.trace_route(origin, destination)
+        return [router.name for router in path], result
+
+    def test_delivered(self):
+        self.assertEqual(self.trace('10.0.0.1', '12.0.0.1'), (['R1', 'R2', 'R3'], 'delivered'))
+        self.assertEqual(self.trace('10.0.0.1', '12.0.0.77'), (['R1', 'R2', 'R3'], 'delivered'))
+        self.assertEqual(self.trace('11.0.0.2', '10.0.0.1'), (['R3', 'R2', 'R1'], 'delivered'))
+
+    def test_dropped(self):
+        self.assertEqual(self.trace('10.0.0.1', '13.0.0.1'), (['R1', 'R2'], 'dropped'))
+
+    def test_loop(self):
+        self.assertEqual(self.trace('10.0.0.1', '14.0.0.1'), (['R1', 'R2', 'R3', 'R2'], 'loop'))
+
+    def test_no_route(self):
+        self.assertEqual(self.trace('10.0.0.2', '15.0.0.1'), (['R2'], 'no route'))
+
+
+if __name__ == '__main__':
+    unittest.main()
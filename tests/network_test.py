@@ -41,6 +41,17 @@ class TestNetwork(unittest.TestCase):
         network_address = Network.translate_to_net(Ip('192.168.0.2'), Netmask('255.255.255.0'))
         self.assertEqual(network_address, Ip('192.168.0.0'))
 
+    def test_clear_hosts(self):
+        self.network.add_host(Ip('192.168.0.2'))
+        self.network.clear_hosts()
+        self.assertListEqual(self.network.get_hosts(), [])
+        self.assertFalse(self.network.in_network(Ip('192.168.0.2')))
+
+    def test_translate_to_net_prefixes(self):
+        self.assertEqual(Network.translate_to_net(Ip('10.1.2.3'), Netmask('255.0.0.0')), Ip('10.0.0.0'))
+        self.assertEqual(Network.translate_to_net(Ip('10.1.2.3'), Netmask('255.255.255.252')), Ip('10.1.2.0'))
+        self.assertEqual(Network.translate_to_net(Ip('10.1.2.3'), Netmask('0.0.0.0')), Ip('0.0.0.0'))
+
     def test_str(self):
         self.assertEqual(str(self.network), 'Network: 192.168.0.1/24')
 
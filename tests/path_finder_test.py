@@ -0,0 +1,62 @@
+import unittest
+
+from network.network_manager import NetworkManager
+from network.path_finder import PathFinder, speed_cost
+from tests.snapshot_test import make_router
+
+
+class TestPathFinder(unittest.TestCase):
+
+    def setUp(self):
+        # R1 - R2 over a 10 Mbps link, R1 - R3 - R2 over 1 Gbps links
+        routers = [
+            make_router('R1', '10.0.12.1', [('10.0.12.1', '255.255.255.0'), ('10.0.13.1', '255.255.255.0')]),
+            make_router('R2', '10.0.12.2', [('10.0.12.2', '255.255.255.0'), ('10.0.23.2', '255.255.255.0')]),
+            make_router('R3', '10.0.13.3', [('10.0.13.3', '255.255.255.0'), ('10.0.23.3', '255.255.255.0')]),
+        ]
+        for router in routers:
+            for interface in router.get_interfaces():
+                interface.speed = '10000000' if str(interface.ip).startswith('10.0.12.') else '1000000000'
+        self.network_manager = NetworkManager('10.0.12.1', 'rocom', routers=routers)
+
+    def names(self, origin, destination, metric):
+        path = self.network_manager.get_shortest_path(origin, destination, metric, 1000000000)
+        return [router.name for router in path]
+
+    def test_speed_cost(self):
+        self.assertEqual(speed_cost(10000000), 10)
+        self.assertEqual(speed_cost(10000000, 1000000000), 100)
+        self.assertEqual(speed_cost(0), 1)
+
+    def test_hops(self):
+        self.assertListEqual(self.names('10.0.12.1', '10.0.23.2', 'hops'), ['R1', 'R2'])
+
+    def test_bandwidth(self):
+        self.assertListEqual(self.names('10.0.12.1', '10.0.23.2', 'bandwidth'), ['R1', 'R3', 'R2'])
+        path_finder = self.network_manager.get_path_finder('bandwidth', 1000000000)
+        r1 = self.network_manager.get_router_by_name('R1')
+        r2 = self.network_manager.get_router_by_name('R2')
+        self.assertEqual(path_finder.path_cost(r1, r2), 2)
+
+    def test_tree_is_cached(self):
+        path_finder = self.network_manager.get_path_finder()
+        r1 = self.network_manager.get_router_by_name('R1')
+        r3 = self.network_manager.get_router_by_name('R3')
+        path_finder.shortest_path(r1, r3)
+        tree = path_finder.trees[0]
+        path_finder.shortest_path(r1, r3)
+        self.assertIs(path_finder.trees[0], tree)
+        path_finder.invalidate([0])
+        self.assertNotIn(0, path_finder.trees)
+
+    def test_invalidated_by_set_networks(self):
+        path_finder = self.network_manager.get_path_finder()
+        self.network_manager.set_networks()
+        self.assertIsNot(self.network_manager.get_path_finder(), path_finder)
+
+    def test_unknown_metric(self):
+        self.assertRaises(ValueError, PathFinder, [], 'delay')
+
+
+if __name__ == '__main__':
+    unittest.main()
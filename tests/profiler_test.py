@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from benchmarks.simulator import SimulatedNetwork
+from benchmarks.topologies import generate
+from network.network_classes.Router import OSPF_NBR_IP_OID
+from network.network_manager import NetworkManager
+from network.profiler import Profiler, ProfiledSession, is_timeout
+
+
+class EasySNMPTimeoutError(Exception):
+    pass
+
+
+class TimingOutSession:
+    def get(self, oids):
+        raise EasySNMPTimeoutError("timed out while connecting to remote host")
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = generate('ring', 4)
+        self.profiler = Profiler()
+        simulated = SimulatedNetwork(self.topology)
+        self.network_manager = NetworkManager(self.topology.access_ip(), 'rocom',
+                                              session_factory=simulated.session_factory, profiler=self.profiler)
+
+    def test_requests_per_host_and_oid(self):
+        report = self.profiler.to_dict()
+        self.assertIn(self.topology.access_ip(), report['hosts'])
+        # Every router is asked for its OSPF neighbors once while exploring
+        self.assertEqual(report['oids'][OSPF_NBR_IP_OID]['requests'], 4)
+        self.assertEqual(report['oids'][OSPF_NBR_IP_OID]['varbinds'], 8)
+        self.assertEqual(sum(stats['requests'] for stats in report['hosts'].values()),
+                         sum(stats['requests'] for stats in report['oids'].values()))
+
+    def test_phases(self):
+        self.network_manager.get_shortest_path(self.topology.router_ips()[0], self.topology.router_ips()[2])
+        self.assertSetEqual(set(self.profiler.phases), {'discovery', 'network merge', 'path computation'})
+
+    def test_timeouts(self):
+        session = ProfiledSession(TimingOutSession(), '10.0.0.9', self.profiler)
+        with self.assertRaises(EasySNMPTimeoutError):
+            session.get('sysName.0')
+        self.assertEqual(self.profiler.hosts['10.0.0.9'].timeouts, 1)
+        self.assertTrue(is_timeout(TimeoutError()))
+        self.assertFalse(is_timeout(ValueError()))
+
+    def test_report_and_json(self):
+        with redirect_stdout(io.StringIO()) as output:
+            self.profiler.print_report()
+        self.assertIn("Hottest OIDs:", output.getvalue())
+
+        handle, json_file = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.profiler.dump_json(json_file)
+            with open(json_file) as file:
+                self.assertIn('discovery', json.load(file)['phases'])
+        finally:
+            os.remove(json_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
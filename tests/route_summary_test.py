@@ -0,0 +1,49 @@
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.network_manager import NetworkManager
+from tests.snapshot_test import make_router
+
+
+class TestRouteSummary(unittest.TestCase):
+
+    def setUp(self):
+        # R1 - R2 - R3 in a chain, R4 isolated
+        self.network_manager = NetworkManager('10.0.0.1', 'rocom', routers=[
+            make_router('R1', '10.0.0.1', [('10.0.0.1', '255.255.255.0')]),
+            make_router('R2', '10.0.0.2', [('10.0.0.2', '255.255.255.0'), ('11.0.0.1', '255.255.255.0')]),
+            make_router('R3', '11.0.0.2', [('11.0.0.2', '255.255.255.0')]),
+            make_router('R4', '12.0.0.1', [('12.0.0.1', '255.255.255.0')]),
+        ])
+        self.route_summary = self.network_manager.get_route_summary()
+
+    def names(self, origin, destination):
+        return [router.name for router in self.route_summary.path(Ip(origin), Ip(destination))]
+
+    def test_path(self):
+        self.assertListEqual(self.names('10.0.0.1', '11.0.0.2'), ['R1', 'R2', 'R3'])
+        self.assertListEqual(self.names('11.0.0.2', '10.0.0.1'), ['R3', 'R2', 'R1'])
+        self.assertListEqual(self.names('11.0.0.1', '10.0.0.2'), ['R2'])
+
+    def test_unreachable(self):
+        self.assertListEqual(self.names('10.0.0.1', '12.0.0.1'), [])
+
+    def test_unknown_ip(self):
+        self.assertIsNone(self.route_summary.path(Ip('10.0.0.1'), Ip('99.0.0.1')))
+
+    def test_same_as_shortest_path(self):
+        path = self.network_manager.get_shortest_path('10.0.0.1', '11.0.0.2')
+        self.assertListEqual([router.name for router in path], self.names('10.0.0.1', '11.0.0.2'))
+
+    def test_summary(self):
+        summary = list(self.route_summary.summary())
+        self.assertEqual(len(summary), 5 * 4)
+        self.assertIn(('10.0.0.1', '11.0.0.2', ['R1', 'R2', 'R3']), summary)
+
+    def test_invalidated_by_set_networks(self):
+        self.network_manager.set_networks()
+        self.assertIsNot(self.network_manager.get_route_summary(), self.route_summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
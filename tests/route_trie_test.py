@@ -0,0 +1,55 @@
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Network import Network
+from network.network_classes.RouteTrie import RouteTrie
+from network.network_classes.RouteType import RouteType
+
+
+def route(destination, mask, next_hop, route_type='4'):
+    return Network(Ip(destination), Netmask(mask)), Ip(next_hop), route_type
+
+
+class TestRouteTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.default = route('0.0.0.0', '0.0.0.0', '10.0.0.1')
+        self.net_8 = route('12.0.0.0', '255.0.0.0', '10.0.0.2')
+        self.net_24 = route('12.1.2.0', '255.255.255.0', '10.0.0.3')
+        self.host = route('12.1.2.3', '255.255.255.255', '10.0.0.4')
+        self.trie = RouteTrie([self.default, self.net_8, self.net_24, self.host])
+
+    def test_longest_prefix_match(self):
+        self.assertIs(self.trie.lookup(Ip('12.1.2.3').value), self.host)
+        self.assertIs(self.trie.lookup(Ip('12.1.2.4').value), self.net_24)
+        self.assertIs(self.trie.lookup(Ip('12.9.9.9').value), self.net_8)
+        self.assertIs(self.trie.lookup(Ip('8.8.8.8').value), self.default)
+
+    def test_no_route(self):
+        trie = RouteTrie([self.net_8])
+        self.assertIsNone(trie.lookup(Ip('13.0.0.1').value))
+
+    def test_replace_route(self):
+        newer = route('12.0.0.0', '255.0.0.0', '10.0.0.9')
+        self.trie.insert(newer)
+        self.assertIs(self.trie.lookup(Ip('12.9.9.9').value), newer)
+        self.assertEqual(len(self.trie), 4)
+
+
+class TestRouteType(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(RouteType.parse('3'), RouteType.LOCAL)
+        self.assertEqual(RouteType.parse(4), RouteType.REMOTE)
+        self.assertEqual(RouteType.parse('remote'), RouteType.REMOTE)
+        self.assertEqual(RouteType.parse('reject(2)'), RouteType.REJECT)
+        self.assertIsNone(RouteType.parse('9'))
+        self.assertIsNone(RouteType.parse('static'))
+
+    def test_str(self):
+        self.assertEqual(str(RouteType.BLACKHOLE), 'blackhole')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,43 @@ import unittest
 from network.network_classes.Ip import Ip
 from network.network_classes.Netmask import Netmask
 from network.network_classes.Network import Network
-from network.network_classes.Router import Router, RouterInterface
+from network.network_classes.Router import Router, RouterInterface, ChangeIndicators, indicator_changes
+from network.network_classes.SessionManager import SessionManager
+
+
+class FakeVariable:
+    def __init__(self, oid, oid_index, value, snmp_type='OCTETSTR'):
+        self.oid = oid
+        self.oid_index = oid_index
+        self.value = value
+        self.snmp_type = snmp_type
+
+
+class FakeSession:
+    """Answers walks from a table of {column OID: {index: value}}."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.requests = 0
+
+    def bulkwalk(self, oid, non_repeaters=0, max_repetitions=10):
+        self.requests += 1
+        return [FakeVariable(oid, index, value) for index, value in self.columns.get(oid, {}).items()]
+
+    def walk(self, oid):
+        return self.bulkwalk(oid)
+
+    def get(self, oids):
+        self.requests += 1
+        if isinstance(oids, list):
+            return [self._get_one(oid) for oid in oids]
+        return self._get_one(oids)
+
+    def _get_one(self, oid):
+        column, index = oid.rsplit('.', 1)
+        if index not in self.columns.get(column, {}):
+            return FakeVariable(column, index, 'NOSUCHOBJECT', 'NOSUCHOBJECT')
+        return FakeVariable(column, index, self.columns[column][index])
 
 
 class TestRouter(unittest.TestCase):
@@ -52,5 +88,146 @@ class TestRouter(unittest.TestCase):
         self.assertEqual(self.router_interface.get_other_hosts(self.router), [host])
 
 
+class TestRouterCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = {
+            "RFC1213-MIB::ipAdEntIfIndex": {'10.0.0.2': '1', '11.0.0.1': '2', '1.1.1.1': '3'},
+            "IP-MIB::ipAdEntNetMask": {'10.0.0.2': '255.0.0.0', '11.0.0.1': '255.255.255.0',
+                                       '1.1.1.1': '255.255.255.255'},
+            "IF-MIB::ifDescr": {'1': 'FastEthernet0/0', '2': 'TenGigabitEthernet1/0', '3': 'Loopback0'},
+            "IF-MIB::ifSpeed": {'1': '100000000', '2': '4294967295', '3': '8000000000'},
+            "IF-MIB::ifHighSpeed": {'1': '100', '2': '10000', '3': '8000'},
+            "IF-MIB::ifType": {'1': '6', '2': '6', '3': '24'},
+        }
+        self.session = FakeSession(self.columns)
+        self.sessions = SessionManager(session_factory=lambda *key: self.session)
+        self.router = Router(Ip('10.0.0.2'), self.sessions)
+
+    def test_get_interfaces_info(self):
+        self.router.get_interfaces_info('rocom')
+        interfaces = self.router.get_interfaces()
+        self.assertListEqual([str(interface.ip) for interface in interfaces], ['10.0.0.2', '11.0.0.1'])
+        self.assertEqual(interfaces[0].name, 'FastEthernet0/0')
+        self.assertEqual(interfaces[0].index, '1')
+        self.assertEqual(interfaces[0].network, Network(Ip('10.0.0.0'), Netmask('255.0.0.0')))
+        self.assertEqual(interfaces[0].speed, '100000000')
+        self.assertEqual(interfaces[1].speed, '10000000000')
+        self.assertEqual(self.session.requests, 6)
+
+    def test_get_interfaces_info_ragged_table(self):
+        # An address with no ipAdEntNetMask row is skipped, the others are still joined
+        self.columns["RFC1213-MIB::ipAdEntIfIndex"]['12.0.0.1'] = '4'
+        self.columns["IF-MIB::ifDescr"]['4'] = 'FastEthernet2/0'
+        self.columns["IF-MIB::ifType"]['4'] = '6'
+        del self.columns["IF-MIB::ifSpeed"]['2']
+        self.router.get_interfaces_info('rocom')
+        interfaces = self.router.get_interfaces()
+        self.assertListEqual([str(interface.ip) for interface in interfaces], ['10.0.0.2', '11.0.0.1'])
+        self.assertIsNone(interfaces[1].speed)
+
+    def test_set_routing_table(self):
+        self.columns.update({
+            "IP-FORWARD-MIB::ipCidrRouteDest": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '10.0.0.0'},
+            "IP-FORWARD-MIB::ipCidrRouteMask": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '255.0.0.0'},
+            "IP-FORWARD-MIB::ipCidrRouteNextHop": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '0.0.0.0'},
+            "IP-FORWARD-MIB::ipCidrRouteType": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '3'},
+        })
+        self.router.set_routing_table('rocom')
+        network, next_hop, route_type = self.router.get_routing_table()[0]
+        self.assertEqual(network, Network(Ip('10.0.0.0'), Netmask('255.0.0.0')))
+        self.assertEqual(next_hop, Ip('0.0.0.0'))
+        self.assertEqual(route_type, '3')
+
+    def test_set_routing_table_ragged_columns(self):
+        # 11.0.0.0/8 was withdrawn after its destination was walked, 12.0.0.0/8 added after its mask was
+        self.columns.update({
+            "IP-FORWARD-MIB::ipCidrRouteDest": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '10.0.0.0',
+                                                '11.0.0.0.255.0.0.0.0.10.0.0.1': '11.0.0.0'},
+            "IP-FORWARD-MIB::ipCidrRouteMask": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '255.0.0.0'},
+            "IP-FORWARD-MIB::ipCidrRouteNextHop": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '0.0.0.0',
+                                                   '12.0.0.0.255.0.0.0.0.10.0.0.1': '10.0.0.1'},
+            "IP-FORWARD-MIB::ipCidrRouteType": {'10.0.0.0.255.0.0.0.0.0.0.0.0': '3',
+                                                '12.0.0.0.255.0.0.0.0.10.0.0.1': '4'},
+        })
+        self.router.set_routing_table('rocom')
+        self.assertListEqual(self.router.get_routing_table(),
+                             [(Network(Ip('10.0.0.0'), Netmask('255.0.0.0')), Ip('0.0.0.0'), '3')])
+
+    def test_set_routing_table_inet_cidr(self):
+        self.columns["IP-FORWARD-MIB::inetCidrRouteType"] = {
+            '1.4.12.0.0.0.8.2.0.0.1.4.11.0.0.2': '4',
+            '2.16.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.2.0.0.0.0': '3',
+        }
+        self.router.set_routing_table('rocom')
+        self.assertEqual(len(self.router.get_routing_table()), 1)
+        network, next_hop, route_type = self.router.get_routing_table()[0]
+        self.assertEqual(network, Network(Ip('12.0.0.0'), Netmask('255.0.0.0')))
+        self.assertEqual(next_hop, Ip('11.0.0.2'))
+        self.assertEqual(route_type, '4')
+
+    def test_set_routing_table_inet_cidr_indexes(self):
+        self.columns["IP-FORWARD-MIB::inetCidrRouteType"] = {
+            'ipv4."13.0.0.0".8.zeroDotZero.ipv4."11.0.0.2"': '4',
+            'ipv4."11.0.0.0".8.zeroDotZero.unknown.""': '3',
+            '1.4.14.0.0': '4',
+        }
+        self.router.set_routing_table('rocom')
+        self.assertListEqual(self.router.get_routing_table(), [
+            (Network(Ip('13.0.0.0'), Netmask('255.0.0.0')), Ip('11.0.0.2'), '4'),
+            (Network(Ip('11.0.0.0'), Netmask('255.0.0.0')), Ip('0.0.0.0'), '3'),
+        ])
+
+    def test_get_name(self):
+        self.columns.update({"sysName": {'0': 'R1'}, "OSPF-MIB::ospfRouterId": {'0': '1.1.1.1'}})
+        self.router.get_name('rocom')
+        self.assertEqual(self.router.name, 'R1')
+        self.assertEqual(self.router.router_id, '1.1.1.1')
+        self.assertEqual(self.session.requests, 1)
+
+    def test_get_name_without_ospf(self):
+        self.columns["sysName"] = {'0': 'R1'}
+        self.router.get_name('rocom')
+        self.assertIsNone(self.router.router_id)
+
+    def test_get_known_routers(self):
+        self.columns.update({
+            "OSPF-MIB::ospfNbrIpAddr": {'11.0.0.2.0': '11.0.0.2', '10.0.0.3.0': '10.0.0.3'},
+            "OSPF-MIB::ospfNbrRtrId": {'11.0.0.2.0': '2.2.2.2', '10.0.0.3.0': '3.3.3.3'},
+            "OSPF-MIB::ospfNbrState": {'11.0.0.2.0': '8', '10.0.0.3.0': 'init'},
+        })
+        self.assertListEqual(self.router.get_known_routers('rocom'),
+                             [('11.0.0.2', '2.2.2.2'), ('10.0.0.3', '3.3.3.3')])
+        self.assertDictEqual(self.router.neighbor_states, {'11.0.0.2': 'full', '10.0.0.3': 'init'})
+        self.assertEqual(self.session.requests, 3)
+
+    def test_session_opened_once(self):
+        self.router.get_interfaces_info('rocom')
+        self.router.set_routing_table('rocom')
+        self.assertEqual(self.sessions.opened, 1)
+
+
+class TestIndicatorChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = ChangeIndicators(1000, 500, 20, 2)
+
+    def test_unchanged(self):
+        self.assertSetEqual(indicator_changes(self.previous, ChangeIndicators(2000, 500, 20, 2)), set())
+
+    def test_changes(self):
+        self.assertSetEqual(indicator_changes(self.previous, ChangeIndicators(2000, 1500, 20, 2)), {'interfaces'})
+        self.assertSetEqual(indicator_changes(self.previous, ChangeIndicators(2000, 500, 21, 3)),
+                            {'routes', 'neighbors'})
+
+    def test_unknown_counts_as_changed(self):
+        self.assertIn('routes', indicator_changes(self.previous, ChangeIndicators(2000, 500, None, 2)))
+        self.assertIn('rebooted', indicator_changes(None, ChangeIndicators(2000, 500, 20, 2)))
+
+    def test_rebooted(self):
+        self.assertSetEqual(indicator_changes(self.previous, ChangeIndicators(10, 500, 20, 2)),
+                            {'rebooted', 'interfaces', 'routes', 'neighbors'})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Network import Network
+from network.network_classes.RouteType import RouteType
+from network.network_classes.RoutingTable import RoutingTable
+from network.snapshot import load_snapshot, save_snapshot
+from tests.snapshot_test import make_router
+
+
+def route(destination, mask, next_hop, route_type):
+    return Network(Ip(destination), Netmask(mask)), Ip(next_hop), route_type
+
+
+class TestRoutingTable(unittest.TestCase):
+
+    def setUp(self):
+        self.routes = [
+            route('10.0.0.0', '255.0.0.0', '0.0.0.0', '3'),
+            route('12.0.0.0', '255.0.0.0', '11.0.0.2', '4'),
+            route('12.1.0.0', '255.255.0.0', '11.0.0.2', 'remote(4)'),
+            route('0.0.0.0', '0.0.0.0', '11.0.0.3', 'unknown'),
+        ]
+        self.table = RoutingTable(self.routes)
+
+    def test_iterates_like_a_route_list(self):
+        self.assertEqual(len(self.table), 4)
+        network, next_hop, route_type = self.table[1]
+        self.assertEqual(network, Network(Ip('12.0.0.0'), Netmask('255.0.0.0')))
+        self.assertEqual(next_hop, Ip('11.0.0.2'))
+        # Types come back as the agent sent them, like in a route list
+        self.assertEqual(route_type, '4')
+        self.assertEqual([route_type for _, _, route_type in self.table], ['3', '4', 'remote(4)', 'unknown'])
+        self.assertListEqual(self.table.type_names, ['3', '4', 'remote(4)', 'unknown'])
+
+    def test_filters(self):
+        self.assertEqual(len(self.table.with_next_hop(Ip('11.0.0.2'))), 2)
+        self.assertEqual(len(self.table.with_prefix_length(8)), 2)
+        self.assertEqual(len(self.table.with_type(RouteType.LOCAL)), 1)
+        remote = self.table.with_type(RouteType.REMOTE)
+        self.assertEqual([route_type for _, _, route_type in remote], ['4', 'remote(4)'])
+        within = self.table.within(Network(Ip('12.0.0.0'), Netmask('255.0.0.0')))
+        self.assertEqual([str(network.get_ip()) for network, _, _ in within], ['12.0.0.0', '12.1.0.0'])
+        self.assertEqual(len(RoutingTable().with_prefix_length(8)), 0)
+
+    def test_nbytes(self):
+        self.assertEqual(self.table.nbytes(), 4 * 10)
+
+    def test_router_lookup(self):
+        router = make_router('R1', '10.0.0.2', [('10.0.0.2', '255.0.0.0')], [])
+        router.routing_table = self.table
+        self.assertEqual(router.lookup_route(Ip('12.1.2.3'))[0].get_ip(), '12.1.0.0')
+        self.assertEqual(router.lookup_route(Ip('13.0.0.1'))[1], Ip('11.0.0.3'))
+
+    def test_load_snapshot_columnar(self):
+        routers = [make_router('R1', '10.0.0.2', [('10.0.0.2', '255.0.0.0')],
+                               [('10.0.0.0', '255.0.0.0', '0.0.0.0', '3'), ('12.0.0.0', '255.0.0.0', '11.0.0.2', '4')]),
+                   make_router('R2', '11.0.0.2', [('11.0.0.2', '255.0.0.0')],
+                               [('12.0.0.0', '255.0.0.0', '0.0.0.0', 'local'),
+                                ('10.0.0.0', '255.0.0.0', '11.0.0.1', '4')])]
+        handle, snapshot_file = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            save_snapshot(snapshot_file, Ip('10.0.0.2'), routers)
+            _, loaded = load_snapshot(snapshot_file, columnar_routes=True)
+        finally:
+            os.remove(snapshot_file)
+
+        self.assertIsInstance(loaded[1].get_routing_table(), RoutingTable)
+        self.assertEqual([(str(network), str(next_hop), route_type) for network, next_hop, route_type
+                          in loaded[1].get_routing_table()],
+                         [(str(Network(Ip('12.0.0.0'), Netmask('255.0.0.0'))), '0.0.0.0', 'local'),
+                          (str(Network(Ip('10.0.0.0'), Netmask('255.0.0.0'))), '11.0.0.1', '4')])
+        self.assertEqual(str(loaded[0]), str(routers[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from network.network_classes.SessionManager import SessionManager
+
+
+class TestSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = SessionManager(max_sessions=2, session_factory=lambda *key: key)
+
+    def test_get_session(self):
+        self.assertEqual(self.manager.get_session('10.0.0.1', 'rocom'), ('10.0.0.1', 'rocom', 2))
+
+    def test_session_is_cached(self):
+        session = self.manager.get_session('10.0.0.1', 'rocom')
+        self.assertIs(self.manager.get_session('10.0.0.1', 'rocom'), session)
+        self.assertEqual(self.manager.opened, 1)
+
+    def test_sessions_by_community_and_version(self):
+        self.manager.get_session('10.0.0.1', 'rocom')
+        self.manager.get_session('10.0.0.1', 'public')
+        self.manager.get_session('10.0.0.1', 'rocom', 1)
+        self.assertEqual(self.manager.opened, 3)
+
+    def test_max_sessions(self):
+        self.manager.get_session('10.0.0.1', 'rocom')
+        self.manager.get_session('10.0.0.2', 'rocom')
+        self.manager.get_session('10.0.0.1', 'rocom')
+        self.manager.get_session('10.0.0.3', 'rocom')
+        self.assertEqual(len(self.manager), 2)
+        self.assertIn(('10.0.0.1', 'rocom', 2), self.manager.sessions)
+        self.assertNotIn(('10.0.0.2', 'rocom', 2), self.manager.sessions)
+
+    def test_close_session(self):
+        self.manager.get_session('10.0.0.1', 'rocom')
+        self.manager.close_session('10.0.0.1', 'rocom')
+        self.assertEqual(len(self.manager), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
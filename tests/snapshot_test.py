@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.network_classes.Netmask import Netmask
+from network.network_classes.Network import Network
+from network.network_classes.Router import Router, RouterInterface, ChangeIndicators
+from network.network_manager import NetworkManager
+from network.snapshot import load_snapshot, save_snapshot, SnapshotError
+
+
+def make_router(name, ip, interfaces, routes=()):
+    router = Router(Ip(ip))
+    router.name = name
+    for index, (interface_ip, mask) in enumerate(interfaces, start=1):
+        netmask = Netmask(mask)
+        network = Network(Network.translate_to_net(Ip(interface_ip), netmask), netmask)
+        router.add_interface(RouterInterface(f"FastEthernet{index}/0", Ip(interface_ip), network, '100000000',
+                                             str(index)))
+    for destination, mask, next_hop, route_type in routes:
+        router.add_route((Network(Ip(destination), Netmask(mask)), Ip(next_hop), route_type))
+    return router
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.routers = [
+            make_router('R1', '10.0.0.2', [('10.0.0.2', '255.0.0.0'), ('11.0.0.1', '255.0.0.0')],
+                        [('10.0.0.0', '255.0.0.0', '0.0.0.0', '3'), ('12.0.0.0', '255.0.0.0', '11.0.0.2', '4')]),
+            make_router('R2', '11.0.0.2', [('11.0.0.2', '255.0.0.0'), ('12.0.0.1', '255.0.0.0')]),
+        ]
+        handle, self.snapshot_file = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.snapshot_file)
+
+    def test_round_trip(self):
+        save_snapshot(self.snapshot_file, Ip('10.0.0.2'), self.routers)
+        access_ip, routers = load_snapshot(self.snapshot_file)
+
+        self.assertEqual(access_ip, Ip('10.0.0.2'))
+        self.assertListEqual([router.name for router in routers], ['R1', 'R2'])
+        for loaded, original in zip(routers, self.routers):
+            self.assertEqual(loaded.ip, original.ip)
+            self.assertListEqual([str(interface) for interface in loaded.get_interfaces()],
+                                 [str(interface) for interface in original.get_interfaces()])
+            self.assertListEqual([interface.index for interface in loaded.get_interfaces()], ['1', '2'])
+            self.assertListEqual(loaded.get_routing_table(), original.get_routing_table())
+        self.assertEqual(routers[0].get_routing_table()[1][2], '4')
+
+    def test_change_indicators(self):
+        self.routers[0].indicators = ChangeIndicators(123456, 100, 2, 1)
+        self.routers[1].indicators = ChangeIndicators(654321, 200, None, 1)
+        save_snapshot(self.snapshot_file, Ip('10.0.0.2'), self.routers)
+        _, routers = load_snapshot(self.snapshot_file)
+
+        self.assertEqual(routers[0].indicators, ChangeIndicators(123456, 100, 2, 1))
+        self.assertEqual(routers[1].indicators, ChangeIndicators(654321, 200, None, 1))
+
+    def test_network_manager_from_snapshot(self):
+        save_snapshot(self.snapshot_file, Ip('10.0.0.2'), self.routers)
+        network_manager = NetworkManager.from_snapshot(self.snapshot_file, 'rocom')
+
+        self.assertEqual(len(network_manager.networks), 3)
+        path = network_manager.get_shortest_path('10.0.0.2', '12.0.0.1')
+        self.assertListEqual([router.name for router in path], ['R1', 'R2'])
+
+    def test_not_a_snapshot(self):
+        with open(self.snapshot_file, 'wb') as file:
+            file.write(b'not a snapshot at all')
+        self.assertRaises(SnapshotError, load_snapshot, self.snapshot_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
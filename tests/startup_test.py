@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from network.network_classes.Ip import Ip
+from network.snapshot import save_snapshot
+from tests.snapshot_test import make_router
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('easysnmp', 'matplotlib', 'networkx', 'numpy')
+# Importing main takes tens of milliseconds, the budget only trips when a heavy import sneaks back in
+IMPORT_BUDGET = 0.5
+
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+sys.argv = ['main.py'] + sys.argv[1:]
+if len(sys.argv) > 1:
+    main.main()
+print(json.dumps({'elapsed': elapsed, 'loaded': [name for name in %r if name in sys.modules]}))
+''' % (HEAVY_MODULES,)
+
+
+def run_startup(*arguments):
+    """Runs main in a fresh interpreter, returns how long importing it took and which heavy modules got loaded."""
+    result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, *arguments], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_loads_no_heavy_module(self):
+        startup = run_startup()
+        self.assertEqual(startup['loaded'], [])
+        self.assertLess(startup['elapsed'], IMPORT_BUDGET)
+
+    def test_snapshot_run_loads_no_heavy_module(self):
+        routers = [
+            make_router('R1', '10.0.0.2', [('10.0.0.2', '255.0.0.0'), ('11.0.0.1', '255.0.0.0')]),
+            make_router('R2', '11.0.0.2', [('11.0.0.2', '255.0.0.0'), ('12.0.0.1', '255.0.0.0')]),
+        ]
+        handle, snapshot_file = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            save_snapshot(snapshot_file, Ip('10.0.0.2'), routers)
+            startup = run_startup('--from-snapshot', snapshot_file, '--print-routers', '--path', '10.0.0.2',
+                                  '12.0.0.1')
+        finally:
+            os.remove(snapshot_file)
+        self.assertEqual(startup['loaded'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
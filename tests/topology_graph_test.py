@@ -0,0 +1,48 @@
+import unittest
+
+from network.network_manager import NetworkManager
+from tests.snapshot_test import make_router
+
+
+class TestTopologyGraph(unittest.TestCase):
+
+    def setUp(self):
+        # R1, R2 and R3 share 10.0.0.0/24, R3 - R4 over 11.0.0.0/24, R4 alone on 12.0.0.0/24
+        self.network_manager = NetworkManager('10.0.0.1', 'rocom', routers=[
+            make_router('R1', '10.0.0.1', [('10.0.0.1', '255.255.255.0')]),
+            make_router('R2', '10.0.0.2', [('10.0.0.2', '255.255.255.0')]),
+            make_router('R3', '10.0.0.3', [('10.0.0.3', '255.255.255.0'), ('11.0.0.1', '255.255.255.0')]),
+            make_router('R4', '11.0.0.2', [('11.0.0.2', '255.255.255.0'), ('12.0.0.1', '255.255.255.0')]),
+        ])
+        self.graph = self.network_manager.get_topology_graph()
+
+    def neighbor_names(self, name):
+        number = self.graph.router_number(self.network_manager.get_router_by_name(name))
+        return sorted(self.graph.routers[self.graph.neighbors[edge]].name
+                      for edge in self.graph.neighbor_edges(number))
+
+    def test_transit_networks_only(self):
+        self.assertEqual(self.graph.router_count(), 4)
+        self.assertListEqual(sorted(str(network) for network in self.graph.networks),
+                             ['Network: 10.0.0.0/24', 'Network: 11.0.0.0/24'])
+        self.assertEqual(self.graph.node_count(), 6)
+
+    def test_bipartite_edges(self):
+        switch = next(node for node in range(4, 6) if self.graph.degree(node) == 3)
+        self.assertEqual(str(self.graph.network_of(switch)), 'Network: 10.0.0.0/24')
+        self.assertListEqual(sorted(self.graph.targets[edge] for edge in self.graph.edges(switch)), [0, 1, 2])
+        self.assertEqual(self.graph.speeds[self.graph.offsets[0]], 100000)
+
+    def test_neighbors(self):
+        self.assertListEqual(self.neighbor_names('R1'), ['R2', 'R3'])
+        self.assertListEqual(self.neighbor_names('R3'), ['R1', 'R2', 'R4'])
+        self.assertListEqual(self.neighbor_names('R4'), ['R3'])
+
+    def test_nbytes(self):
+        edges = len(self.graph.targets) + len(self.graph.neighbors)
+        offsets = self.graph.node_count() + self.graph.router_count() + 2
+        self.assertLessEqual(self.graph.nbytes(), edges * 8 + offsets * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
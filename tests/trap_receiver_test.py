@@ -0,0 +1,111 @@
+import asyncio
+import io
+import json
+import socket
+import unittest
+
+from traps.pdu import (INFORM_REQUEST, RESPONSE, NULL, OCTET_STRING, OBJECT_IDENTIFIER, SNMP_TRAP_OID,
+                       SYS_UPTIME_OID, TrapDecodeError, decode_message, encode_message, encode_oid, decode_oid,
+                       ospf_nbr_state_change, to_record)
+from traps.receiver import NdjsonWriter, TrapReceiver, listen
+
+
+class TestTrapPdu(unittest.TestCase):
+
+    def test_oid_round_trip(self):
+        for oid in ('1.3.6.1.2.1.14.16.2.2', '1.3.6.1.2.1.14.10.1.6.11.0.0.2.0', '2.999.1', '1.3.6.1.4.1.9.268435455'):
+            self.assertEqual(decode_oid(encode_oid(oid)), oid)
+
+    def test_ospf_nbr_state_change(self):
+        trap = ospf_nbr_state_change('rocom', '12.0.0.1', '12.0.0.2', '12.0.0.2', 'full', uptime=110633)
+        message = decode_message(trap)
+        self.assertEqual(message.community, 'rocom')
+        self.assertDictEqual(to_record(message, '11.0.0.2', 1000.0), {
+            'time': 1000.0,
+            'source': '11.0.0.2',
+            'uptime': 1106.33,
+            'trap': 'ospfNbrStateChange',
+            'ospfRouterId': '12.0.0.1',
+            'ospfNbrIpAddr': '12.0.0.2',
+            'ospfNbrAddressLessIndex': 0,
+            'ospfNbrRtrId': '12.0.0.2',
+            'ospfNbrState': 'full',
+        })
+
+    def test_malformed_messages(self):
+        trap = ospf_nbr_state_change('rocom', '12.0.0.1', '12.0.0.2', '12.0.0.2', 'down')
+        for data in (b'', b'\x04\x00', trap[:len(trap) // 2]):
+            self.assertRaises(TrapDecodeError, decode_message, data)
+
+        # sysUpTime.0 is TimeTicks, a trap carrying something else is kept rather than lost
+        for tag, value in ((NULL, None), (OCTET_STRING, 'up')):
+            trap = encode_message('rocom', [(SYS_UPTIME_OID, tag, value),
+                                            (SNMP_TRAP_OID, OBJECT_IDENTIFIER, '1.3.6.1.2.1.14.16.2.2')])
+            writer = NdjsonWriter(io.StringIO(), batch_size=1)
+            receiver = TrapReceiver(writer)
+            receiver.datagram_received(trap, ('11.0.0.2', 65447))
+            self.assertEqual(receiver.received, 1)
+            self.assertEqual(json.loads(writer.file.getvalue())['uptime'], value)
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, address):
+        self.sent.append((data, address))
+
+
+class TestTrapReceiver(unittest.TestCase):
+
+    def setUp(self):
+        self.file = io.StringIO()
+        self.writer = NdjsonWriter(self.file, batch_size=2)
+        self.receiver = TrapReceiver(self.writer, community='rocom', clock=lambda: 1000.0)
+        self.receiver.transport = RecordingTransport()
+
+    def test_batches_records(self):
+        trap = ospf_nbr_state_change('rocom', '12.0.0.1', '12.0.0.2', '12.0.0.2', 'down')
+        self.receiver.datagram_received(trap, ('11.0.0.2', 65447))
+        self.assertEqual(self.file.getvalue(), '')
+        self.receiver.datagram_received(trap, ('11.0.0.2', 65447))
+        lines = self.file.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['ospfNbrState'], 'down')
+
+    def test_drops_other_communities_and_garbage(self):
+        self.receiver.datagram_received(ospf_nbr_state_change('public', '12.0.0.1', '12.0.0.2', '12.0.0.2', 'down'),
+                                        ('11.0.0.2', 65447))
+        self.receiver.datagram_received(b'garbage', ('11.0.0.2', 65447))
+        self.assertEqual((self.receiver.received, self.receiver.dropped), (0, 2))
+
+    def test_acknowledges_informs(self):
+        inform = ospf_nbr_state_change('rocom', '12.0.0.1', '12.0.0.2', '12.0.0.2', 'full', request_id=42,
+                                       pdu_type=INFORM_REQUEST)
+        self.receiver.datagram_received(inform, ('11.0.0.2', 65447))
+        (response, address), = self.receiver.transport.sent
+        self.assertEqual(address, ('11.0.0.2', 65447))
+        message = decode_message(response)
+        self.assertEqual((message.pdu_type, message.request_id), (RESPONSE, 42))
+
+    def test_listen_over_udp(self):
+        async def receive():
+            started = asyncio.get_running_loop().create_future()
+            listener = asyncio.create_task(listen(self.writer, '127.0.0.1', 0, flush_interval=0.01, started=started))
+            address = await started
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for state in ('init', 'twoWay', 'full'):
+                    sender.sendto(ospf_nbr_state_change('rocom', '12.0.0.1', '12.0.0.2', '12.0.0.2', state), address)
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if self.writer.written == 3:
+                    break
+            listener.cancel()
+
+        asyncio.run(receive())
+        self.assertListEqual([json.loads(line)['ospfNbrState'] for line in self.file.getvalue().splitlines()],
+                             ['init', 'twoWay', 'full'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from traps.__main__ import main
+from traps.store import INDEX_DTYPE, SUMMARY_BITS, SUMMARY_FIELDS, TrapStore
+
+
+def nbr_state_change(time, router_id, neighbor_router_id, state):
+    return {'time': time, 'source': router_id, 'uptime': time, 'trap': 'ospfNbrStateChange', 'ospfRouterId': router_id,
+            'ospfNbrIpAddr': neighbor_router_id, 'ospfNbrAddressLessIndex': 0, 'ospfNbrRtrId': neighbor_router_id,
+            'ospfNbrState': state}
+
+
+class TestTrapStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Small segments and batches, so the records spread over several segments
+        self.store = TrapStore(self.directory, segment_size=2048, batch_size=10)
+        for second in range(100):
+            self.store.write(nbr_state_change(1000.0 + second, f'12.0.0.{second % 2 + 1}', f'13.0.0.{second % 5}',
+                                              ('down', 'init', 'full')[second % 3]))
+        self.store.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rotates_segments(self):
+        segments = self.store.segments()
+        self.assertGreater(len(segments), 1)
+        for segment in segments[:-1]:
+            self.assertLess(os.path.getsize(self.store._path(segment, 'ndjson')), 2048 + 10 * 300)
+
+    def test_query(self):
+        records = list(TrapStore(self.directory).query(start=1010, end=1040, router='12.0.0.1', state='down'))
+        self.assertListEqual([record['time'] for record in records], [1012.0, 1018.0, 1024.0, 1030.0, 1036.0])
+        self.assertTrue(all(record['ospfNbrState'] == 'down' for record in records))
+
+        store = TrapStore(self.directory)
+        self.assertEqual(store.count(), 100)
+        self.assertEqual(store.count(neighbor='13.0.0.0'), 20)
+        self.assertEqual(store.count(trap='ospfIfStateChange'), 0)
+        self.assertEqual(store.count(start=2000), 0)
+
+    def test_appends_after_reopening(self):
+        store = TrapStore(self.directory, segment_size=2048, batch_size=10)
+        store.write(nbr_state_change(2000.0, '12.0.0.1', '13.0.0.9', 'exchange'))
+        store.close()
+        records = list(TrapStore(self.directory).query(state='exchange'))
+        self.assertListEqual([record['ospfNbrRtrId'] for record in records], ['13.0.0.9'])
+
+    def test_ignores_truncated_index_row(self):
+        last = self.store.segments()[-1]
+        with open(self.store._path(last, 'index'), 'ab') as index:
+            index.write(b'\0' * (INDEX_DTYPE.itemsize // 2))
+        self.assertEqual(TrapStore(self.directory).count(), 100)
+
+    def test_skips_segments_by_summary(self):
+        store = TrapStore(self.directory, segment_size=2048, batch_size=10)
+        store.write(nbr_state_change(2000.0, '12.0.0.7', '13.0.0.9', 'exchange'))
+        store.close()
+        last = store.segments()[-1]
+        self.assertEqual(store.count(router='12.0.0.7'), 1)
+
+        # A summary without the router rules its segment out, without summary the segment is scanned
+        summary_path = store._path(last, 'summary')
+        with open(summary_path, 'wb') as summary:
+            summary.write(bytes(len(SUMMARY_FIELDS) * SUMMARY_BITS))
+        self.assertEqual(store.count(router='12.0.0.7'), 0)
+        os.remove(summary_path)
+        self.assertEqual(store.count(router='12.0.0.7'), 1)
+
+        # The writer summarizes again the rows of a segment that lost its summary
+        store = TrapStore(self.directory, segment_size=2048, batch_size=10)
+        store.write(nbr_state_change(2001.0, '12.0.0.8', '13.0.0.9', 'exchange'))
+        store.close()
+        self.assertTrue(os.path.exists(summary_path))
+        self.assertEqual(store.count(router='12.0.0.7'), 1)
+        self.assertEqual(store.count(state='exchange'), 2)
+
+    def test_query_command(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(['query', '--store', self.directory, '--router', '12.0.0.2', '--neighbor', '13.0.0.1',
+                  '--state', 'full'])
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertListEqual([record['time'] for record in records], [1011.0, 1041.0, 1071.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
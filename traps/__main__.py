@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from datetime import datetime
+
+from traps.receiver import (DEFAULT_HOST, DEFAULT_PORT, DEFAULT_OUTPUT, DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL,
+                            NdjsonWriter, listen)
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def timestamp(value):
+    """Unix timestamp of a duration ago (90s, 30m, 1h, 7d) or of an ISO date."""
+    duration = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value)
+    if duration:
+        return time.time() - float(duration.group(1)) * DURATION_UNITS[duration.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is neither a duration like 1h nor an ISO date")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m traps')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    listen_parser = commands.add_parser('listen', help="Receive SNMPv2c traps and write them as NDJSON records")
+    listen_parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (Default={DEFAULT_HOST})")
+    listen_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"UDP port (Default={DEFAULT_PORT})")
+    listen_parser.add_argument('--community', '-c', help="Only accept traps sent with this community")
+    listen_parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT,
+                               help=f"File the records are appended to, - for stdout (Default={DEFAULT_OUTPUT})")
+    listen_parser.add_argument('--store', metavar='DIR', help="Write the records to a trap store instead of --output")
+    listen_parser.add_argument('--segment-size', type=int, default=64, metavar='MB',
+                               help="Size of the segments of the trap store (Default=64)")
+    listen_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, metavar='N',
+                               help=f"Records written at once (Default={DEFAULT_BATCH_SIZE})")
+    listen_parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL, metavar='SECONDS',
+                               help=f"Longest a record waits before being written (Default={DEFAULT_FLUSH_INTERVAL})")
+
+    query_parser = commands.add_parser('query', help="Print the records of a trap store matching every filter given")
+    query_parser.add_argument('--store', metavar='DIR', help="Trap store to query (Default=/tmp/traps)")
+    query_parser.add_argument('--since', type=timestamp, metavar='WHEN',
+                              help="Only records received after, a duration ago like 1h or an ISO date")
+    query_parser.add_argument('--until', type=timestamp, metavar='WHEN', help="Only records received before")
+    query_parser.add_argument('--source', metavar='IP', help="IP the traps were sent from")
+    query_parser.add_argument('--router', metavar='ROUTER_ID', help="OSPF router-id of the router sending the traps")
+    query_parser.add_argument('--neighbor', metavar='ROUTER_ID', help="OSPF router-id of the neighbor")
+    query_parser.add_argument('--trap', help="Trap name, such as ospfNbrStateChange")
+    query_parser.add_argument('--state', help="New state, such as down or full")
+    query_parser.add_argument('--count', action='store_true', help="Only print the number of records")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'listen':
+        if args.store:
+            # numpy is only needed by the store
+            from traps.store import TrapStore
+            sink = TrapStore(args.store, args.segment_size * 1024 * 1024, args.batch_size)
+        else:
+            file = sys.stdout if args.output == '-' else open(args.output, 'a', buffering=1024 * 1024)
+            sink = NdjsonWriter(file, args.batch_size)
+        try:
+            asyncio.run(listen(sink, args.host, args.port, args.community, args.flush_interval))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
+
+    elif args.command == 'query':
+        from traps.store import DEFAULT_STORE, TrapStore
+        store = TrapStore(args.store or DEFAULT_STORE)
+        filters = dict(source=args.source, router=args.router, neighbor=args.neighbor, trap=args.trap,
+                       state=args.state)
+        if args.count:
+            print(store.count(args.since, args.until, **filters))
+        else:
+            for record in store.query(args.since, args.until, **filters):
+                print(json.dumps(record, separators=(',', ':')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
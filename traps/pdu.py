@@ -0,0 +1,288 @@
+from collections import namedtuple
+
+from network.mib_states import NBR_STATES, IF_STATES, OPER_STATUSES
+
+VERSION_2C = 1
+# PDU tags of SNMPv2
+RESPONSE = 0xa2
+INFORM_REQUEST = 0xa6
+SNMPV2_TRAP = 0xa7
+
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIME_TICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+UNSIGNED_TYPES = frozenset((COUNTER32, GAUGE32, TIME_TICKS, COUNTER64))
+
+SYS_UPTIME_OID = '1.3.6.1.2.1.1.3.0'
+SNMP_TRAP_OID = '1.3.6.1.6.3.1.1.4.1.0'
+OSPF_TRAP_PREFIX = '1.3.6.1.2.1.14.16.2.'
+
+# Trap OIDs of SNMPv2-MIB and OSPF-TRAP-MIB
+TRAP_NAMES = {
+    '1.3.6.1.6.3.1.1.5.1': 'coldStart',
+    '1.3.6.1.6.3.1.1.5.2': 'warmStart',
+    '1.3.6.1.6.3.1.1.5.3': 'linkDown',
+    '1.3.6.1.6.3.1.1.5.4': 'linkUp',
+    **{OSPF_TRAP_PREFIX + str(number): name for number, name in enumerate((
+        'ospfVirtIfStateChange', 'ospfNbrStateChange', 'ospfVirtNbrStateChange', 'ospfIfConfigError',
+        'ospfVirtIfConfigError', 'ospfIfAuthFailure', 'ospfVirtIfAuthFailure', 'ospfIfRxBadPacket',
+        'ospfVirtIfRxBadPacket', 'ospfTxRetransmit', 'ospfVirtIfTxRetransmit', 'ospfOriginateLsa',
+        'ospfMaxAgeLsa', 'ospfLsdbOverflow', 'ospfLsdbApproachingOverflow', 'ospfIfStateChange'), start=1)},
+}
+
+# Objects sent in the traps, by OID without the instance
+VARBIND_NAMES = {
+    '1.3.6.1.2.1.1.3': 'sysUpTime',
+    '1.3.6.1.6.3.1.1.4.1': 'snmpTrapOID',
+    '1.3.6.1.2.1.2.2.1.1': 'ifIndex',
+    '1.3.6.1.2.1.2.2.1.7': 'ifAdminStatus',
+    '1.3.6.1.2.1.2.2.1.8': 'ifOperStatus',
+    '1.3.6.1.2.1.14.1.1': 'ospfRouterId',
+    '1.3.6.1.2.1.14.7.1.1': 'ospfIfIpAddress',
+    '1.3.6.1.2.1.14.7.1.2': 'ospfAddressLessIf',
+    '1.3.6.1.2.1.14.7.1.12': 'ospfIfState',
+    '1.3.6.1.2.1.14.9.1.1': 'ospfVirtIfAreaId',
+    '1.3.6.1.2.1.14.9.1.2': 'ospfVirtIfNeighbor',
+    '1.3.6.1.2.1.14.9.1.7': 'ospfVirtIfState',
+    '1.3.6.1.2.1.14.10.1.1': 'ospfNbrIpAddr',
+    '1.3.6.1.2.1.14.10.1.2': 'ospfNbrAddressLessIndex',
+    '1.3.6.1.2.1.14.10.1.3': 'ospfNbrRtrId',
+    '1.3.6.1.2.1.14.10.1.6': 'ospfNbrState',
+    '1.3.6.1.2.1.14.11.1.1': 'ospfVirtNbrArea',
+    '1.3.6.1.2.1.14.11.1.2': 'ospfVirtNbrRtrId',
+    '1.3.6.1.2.1.14.11.1.5': 'ospfVirtNbrState',
+}
+
+STATE_NAMES = {
+    'ospfNbrState': NBR_STATES,
+    'ospfVirtNbrState': NBR_STATES,
+    'ospfIfState': IF_STATES,
+    'ospfVirtIfState': {1: 'down', 4: 'pointToPoint'},
+    'ifAdminStatus': OPER_STATUSES,
+    'ifOperStatus': OPER_STATUSES,
+}
+
+# Decoded OIDs and varbind names, traps repeat the same few so the caches stay small, cleared past this size
+CACHE_SIZE = 65536
+
+Message = namedtuple('Message', ['version', 'community', 'pdu_type', 'request_id', 'varbinds', 'pdu_offset'])
+
+
+class TrapDecodeError(ValueError):
+    pass
+
+
+def _read_tlv(data, offset):
+    """Tag, start and end of the contents of the TLV at offset."""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        start = offset + 2
+        if length & 0x80:
+            size = length & 0x7f
+            length = int.from_bytes(data[start:start + size], 'big')
+            start += size
+    except IndexError:
+        raise TrapDecodeError(f"Truncated message at byte {offset}")
+    end = start + length
+    if end > len(data):
+        raise TrapDecodeError(f"Length of the value at byte {offset} runs past the message")
+    return tag, start, end
+
+
+_oids = {}
+
+
+def decode_oid(contents):
+    oid = _oids.get(contents)
+    if oid is not None:
+        return oid
+    subidentifiers = []
+    value = 0
+    for byte in contents:
+        value = (value << 7) | (byte & 0x7f)
+        if not byte & 0x80:
+            subidentifiers.append(value)
+            value = 0
+    if not subidentifiers:
+        raise TrapDecodeError("Empty object identifier")
+    first = subidentifiers[0]
+    head = (0, first) if first < 40 else (1, first - 40) if first < 80 else (2, first - 80)
+    oid = '.'.join(map(str, (*head, *subidentifiers[1:])))
+    if len(_oids) >= CACHE_SIZE:
+        _oids.clear()
+    _oids[bytes(contents)] = oid
+    return oid
+
+
+def decode_value(tag, contents):
+    if tag == INTEGER:
+        return int.from_bytes(contents, 'big', signed=True)
+    if tag in UNSIGNED_TYPES:
+        return int.from_bytes(contents, 'big')
+    if tag == IP_ADDRESS:
+        return '.'.join(map(str, contents))
+    if tag == OCTET_STRING:
+        try:
+            return bytes(contents).decode()
+        except UnicodeDecodeError:
+            return bytes(contents).hex()
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(contents)
+    if tag in (NULL, NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW):
+        return None
+    return bytes(contents).hex()
+
+
+def decode_message(data):
+    """Decodes an SNMPv2c message, its varbinds as (OID, value) pairs. Raises TrapDecodeError on anything else."""
+    data = memoryview(bytes(data))
+    tag, start, end = _read_tlv(data, 0)
+    if tag != SEQUENCE:
+        raise TrapDecodeError("Not an SNMP message")
+    tag, start, version_end = _read_tlv(data, start)
+    version = int.from_bytes(data[start:version_end], 'big')
+    if tag != INTEGER or version != VERSION_2C:
+        raise TrapDecodeError(f"Unsupported SNMP version {version}")
+    tag, start, community_end = _read_tlv(data, version_end)
+    community = bytes(data[start:community_end]).decode(errors='replace')
+
+    pdu_offset = community_end
+    pdu_type, start, pdu_end = _read_tlv(data, pdu_offset)
+    tag, start, request_id_end = _read_tlv(data, start)
+    request_id = int.from_bytes(data[start:request_id_end], 'big', signed=True)
+    # error-status and error-index are always 0 in traps
+    _, _, offset = _read_tlv(data, request_id_end)
+    _, _, offset = _read_tlv(data, offset)
+    tag, offset, varbinds_end = _read_tlv(data, offset)
+    if tag != SEQUENCE:
+        raise TrapDecodeError("Missing varbind list")
+
+    varbinds = []
+    while offset < varbinds_end:
+        _, start, offset = _read_tlv(data, offset)
+        tag, start, oid_end = _read_tlv(data, start)
+        if tag != OBJECT_IDENTIFIER:
+            raise TrapDecodeError(f"Varbind without OID at byte {start}")
+        oid = decode_oid(data[start:oid_end])
+        tag, start, value_end = _read_tlv(data, oid_end)
+        varbinds.append((oid, decode_value(tag, data[start:value_end])))
+    return Message(version, community, pdu_type, request_id, varbinds, pdu_offset)
+
+
+def response_to(data, message: Message):
+    """Acknowledgement of an InformRequest, the same message with the PDU tag of a Response."""
+    response = bytearray(data)
+    response[message.pdu_offset] = RESPONSE
+    return bytes(response)
+
+
+_varbind_names = {}
+
+
+def varbind_name(oid):
+    """MIB name of the object of a varbind OID, the OID itself for unknown objects."""
+    name = _varbind_names.get(oid)
+    if name is None:
+        name = oid
+        prefix = oid
+        # Instances of the OSPF tables are up to 5 subidentifiers long (an IP and an index)
+        for _ in range(6):
+            prefix = prefix.rpartition('.')[0]
+            if prefix in VARBIND_NAMES:
+                name = VARBIND_NAMES[prefix]
+                break
+        if len(_varbind_names) >= CACHE_SIZE:
+            _varbind_names.clear()
+        _varbind_names[oid] = name
+    return name
+
+
+def to_record(message: Message, source, received):
+    """Flat record of a trap: when it was received, from which IP, its name, and its varbinds by MIB name."""
+    record = {'time': received, 'source': source}
+    for oid, value in message.varbinds:
+        if oid == SYS_UPTIME_OID:
+            # TimeTicks count hundredths of a second, an agent sending anything else has it kept as sent
+            record['uptime'] = value / 100 if isinstance(value, int) else value
+        elif oid == SNMP_TRAP_OID:
+            record['trap'] = TRAP_NAMES.get(value, value)
+        else:
+            name = varbind_name(oid)
+            states = STATE_NAMES.get(name)
+            record[name] = states.get(value, value) if states is not None else value
+    return record
+
+
+def _encode_length(length):
+    if length < 0x80:
+        return bytes((length,))
+    size = (length.bit_length() + 7) // 8
+    return bytes((0x80 | size,)) + length.to_bytes(size, 'big')
+
+
+def _tlv(tag, contents):
+    return bytes((tag,)) + _encode_length(len(contents)) + contents
+
+
+def encode_oid(oid):
+    subidentifiers = [int(part) for part in oid.split('.')]
+    encoded = bytearray()
+    for subidentifier in (subidentifiers[0] * 40 + subidentifiers[1], *subidentifiers[2:]):
+        chunk = [subidentifier & 0x7f]
+        subidentifier >>= 7
+        while subidentifier:
+            chunk.append(0x80 | (subidentifier & 0x7f))
+            subidentifier >>= 7
+        encoded.extend(reversed(chunk))
+    return bytes(encoded)
+
+
+def encode_value(tag, value):
+    if tag == INTEGER:
+        return _tlv(tag, value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True))
+    if tag in UNSIGNED_TYPES:
+        return _tlv(tag, value.to_bytes((value.bit_length() + 8) // 8, 'big'))
+    if tag == IP_ADDRESS:
+        return _tlv(tag, bytes(int(octet) for octet in value.split('.')))
+    if tag == OBJECT_IDENTIFIER:
+        return _tlv(tag, encode_oid(value))
+    if tag == OCTET_STRING:
+        return _tlv(tag, value.encode() if isinstance(value, str) else value)
+    return _tlv(tag, b'')
+
+
+def encode_message(community, varbinds, request_id=0, pdu_type=SNMPV2_TRAP):
+    """Encodes an SNMPv2c message from (OID, tag, value) varbinds, what an agent sending a trap does."""
+    encoded_varbinds = b''.join(_tlv(SEQUENCE, _tlv(OBJECT_IDENTIFIER, encode_oid(oid)) + encode_value(tag, value))
+                                for oid, tag, value in varbinds)
+    pdu = (encode_value(INTEGER, request_id) + encode_value(INTEGER, 0) + encode_value(INTEGER, 0)
+           + _tlv(SEQUENCE, encoded_varbinds))
+    return _tlv(SEQUENCE, encode_value(INTEGER, VERSION_2C) + encode_value(OCTET_STRING, community)
+                + _tlv(pdu_type, pdu))
+
+
+def ospf_nbr_state_change(community, router_id, neighbor_ip, neighbor_router_id, state, uptime=0, request_id=0,
+                          pdu_type=SNMPV2_TRAP):
+    """ospfNbrStateChange trap as a router sends it, state is the name of the new neighbor state."""
+    state_number = next(number for number, name in NBR_STATES.items() if name == state)
+    return encode_message(community, [
+        (SYS_UPTIME_OID, TIME_TICKS, uptime),
+        (SNMP_TRAP_OID, OBJECT_IDENTIFIER, OSPF_TRAP_PREFIX + '2'),
+        ('1.3.6.1.2.1.14.1.1.0', IP_ADDRESS, router_id),
+        (f'1.3.6.1.2.1.14.10.1.1.{neighbor_ip}.0', IP_ADDRESS, neighbor_ip),
+        (f'1.3.6.1.2.1.14.10.1.2.{neighbor_ip}.0', INTEGER, 0),
+        (f'1.3.6.1.2.1.14.10.1.3.{neighbor_ip}.0', IP_ADDRESS, neighbor_router_id),
+        (f'1.3.6.1.2.1.14.10.1.6.{neighbor_ip}.0', INTEGER, state_number),
+    ], request_id, pdu_type)
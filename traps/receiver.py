@@ -0,0 +1,100 @@
+import asyncio
+import json
+import socket
+import sys
+import time
+
+from traps.pdu import INFORM_REQUEST, SNMPV2_TRAP, TrapDecodeError, decode_message, response_to, to_record
+
+DEFAULT_HOST = '0.0.0.0'
+DEFAULT_PORT = 162
+DEFAULT_OUTPUT = '/tmp/traps.ndjson'
+# Records written at once, and the longest a record waits in the buffer
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+# A flap storm arrives faster than the loop wakes up, the socket buffer holds it meanwhile
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+class NdjsonWriter:
+    """Writes records as one JSON object per line, batch_size lines per write."""
+
+    def __init__(self, file, batch_size=DEFAULT_BATCH_SIZE):
+        self.file = file
+        self.batch_size = batch_size
+        self.lines = []
+        self.written = 0
+
+    def write(self, record):
+        self.lines.append(json.dumps(record, separators=(',', ':')))
+        if len(self.lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.file.write('\n'.join(self.lines) + '\n')
+            self.file.flush()
+            self.written += len(self.lines)
+            self.lines.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class TrapReceiver(asyncio.DatagramProtocol):
+    """Decodes the SNMPv2c traps and informs received and hands their records to a sink with write and flush.
+
+    Informs are acknowledged. Messages that are not traps, do not decode or carry another community are dropped.
+    """
+
+    def __init__(self, sink, community=None, clock=time.time):
+        self.sink = sink
+        self.community = community
+        self.clock = clock
+        self.transport = None
+        self.received = 0
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        try:
+            transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        except (AttributeError, OSError):
+            pass
+
+    def datagram_received(self, data, address):
+        try:
+            message = decode_message(data)
+        except TrapDecodeError:
+            self.dropped += 1
+            return
+        if message.pdu_type not in (SNMPV2_TRAP, INFORM_REQUEST) or (
+                self.community is not None and message.community != self.community):
+            self.dropped += 1
+            return
+        if message.pdu_type == INFORM_REQUEST:
+            self.transport.sendto(response_to(data, message), address)
+        self.sink.write(to_record(message, address[0], self.clock()))
+        self.received += 1
+
+
+async def listen(sink, host=DEFAULT_HOST, port=DEFAULT_PORT, community=None, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 started=None):
+    """Receives traps until cancelled, flushing the sink every flush_interval.
+
+    started, if given, is a future set to the bound (host, port) once listening.
+    """
+    loop = asyncio.get_running_loop()
+    transport, receiver = await loop.create_datagram_endpoint(lambda: TrapReceiver(sink, community),
+                                                              local_addr=(host, port))
+    if started is not None:
+        started.set_result(transport.get_extra_info('sockname')[:2])
+    try:
+        while True:
+            await asyncio.sleep(flush_interval)
+            sink.flush()
+    finally:
+        transport.close()
+        sink.flush()
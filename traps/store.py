@@ -0,0 +1,238 @@
+import json
+import mmap
+import os
+import socket
+
+import numpy as np
+
+DEFAULT_STORE = '/tmp/traps'
+# A segment is closed once its records reach this size, the next batch goes to a new one
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 1000
+STRINGS_FILE = 'strings.json'
+
+# One row per record, in the order they were received. IPs are stored as integers, trap and state names
+# as ids in the strings table (0 for none), offset and length locate the record in the segment's data.
+INDEX_DTYPE = np.dtype([('time', '<f8'), ('source', '<u4'), ('router', '<u4'), ('neighbor', '<u4'),
+                        ('trap', '<u2'), ('state', '<u2'), ('offset', '<u8'), ('length', '<u4')])
+STRING_FIELDS = ('trap', 'state')
+# Record keys indexed as the neighbor and the state, the first one present is used
+NEIGHBOR_KEYS = ('ospfNbrRtrId', 'ospfVirtNbrRtrId', 'ospfVirtIfNeighbor')
+STATE_KEYS = ('ospfNbrState', 'ospfIfState', 'ospfVirtNbrState', 'ospfVirtIfState', 'ifOperStatus')
+# Each segment has a bitmap per field of the values of its rows, segments without a filtered value are skipped
+SUMMARY_FIELDS = ('source', 'router', 'neighbor', 'trap', 'state')
+SUMMARY_BITS = 1024
+
+
+def ip_value(ip):
+    try:
+        return int.from_bytes(socket.inet_aton(ip), 'big')
+    except (OSError, TypeError):
+        return 0
+
+
+def summary_bits(values):
+    """Bit of each value in a segment summary, hashed so that the IPs of a subnet spread over the bitmap."""
+    return (np.asarray(values, dtype=np.uint64) * 0x9E3779B1 & 0xFFFFFFFF) >> 22
+
+
+def _first(record, keys):
+    return next((record[key] for key in keys if key in record), None)
+
+
+class TrapStore:
+    """Append-only trap records, in segments of NDJSON data with a fixed-size index of each record.
+
+    Records are written in batches like NdjsonWriter does, so a store is a sink of a TrapReceiver. Queries
+    memory-map the indexes, find the time range by binary search, since records are appended as they are
+    received, skip the segments whose summary lacks a filtered value and filter the other fields with numpy.
+    Only the records that match are read and parsed.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE, segment_size=DEFAULT_SEGMENT_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+        self.strings = self._load_strings()
+        self.string_ids = {string: number for number, string in enumerate(self.strings)}
+        self.saved_strings = len(self.strings)
+        self.pending = []
+        self.segment = None
+        self.data_file = None
+        self.index_file = None
+        self.summary = None
+        self.written = 0
+
+    def _path(self, segment, extension):
+        return os.path.join(self.directory, f"{segment:08d}.{extension}")
+
+    def _load_strings(self):
+        try:
+            with open(os.path.join(self.directory, STRINGS_FILE)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return ['']
+
+    def _save_strings(self):
+        path = os.path.join(self.directory, STRINGS_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.strings, file)
+        os.replace(path + '.tmp', path)
+        self.saved_strings = len(self.strings)
+
+    def _string_id(self, string):
+        if string is None:
+            return 0
+        number = self.string_ids.get(string)
+        if number is None:
+            number = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return number
+
+    def segments(self):
+        return sorted(int(name.split('.')[0]) for name in os.listdir(self.directory) if name.endswith('.index'))
+
+    def _open_segment(self, segment):
+        self.close_files()
+        self.segment = segment
+        self.data_file = open(self._path(segment, 'ndjson'), 'ab')
+        index_path = self._path(segment, 'index')
+        self.index_file = open(index_path, 'ab')
+        # A row cut short by a crash is dropped, the data it pointed to stays unindexed
+        size = os.path.getsize(index_path)
+        if size % INDEX_DTYPE.itemsize:
+            self.index_file.truncate(size - size % INDEX_DTYPE.itemsize)
+        self.summary = self._load_summary(segment)
+        if self.summary is None:
+            # Segment written before summaries existed, or whose summary was lost
+            self.summary = np.zeros((len(SUMMARY_FIELDS), SUMMARY_BITS), dtype=bool)
+            index = self._index(segment)
+            if index is not None:
+                self._summarize(index)
+
+    def _load_summary(self, segment):
+        try:
+            summary = np.fromfile(self._path(segment, 'summary'), dtype=bool)
+        except FileNotFoundError:
+            return None
+        if summary.size != len(SUMMARY_FIELDS) * SUMMARY_BITS:
+            return None
+        return summary.reshape(len(SUMMARY_FIELDS), SUMMARY_BITS)
+
+    def _summarize(self, rows):
+        for number, field in enumerate(SUMMARY_FIELDS):
+            self.summary[number, summary_bits(rows[field])] = True
+
+    def _save_summary(self):
+        path = self._path(self.segment, 'summary')
+        with open(path + '.tmp', 'wb') as file:
+            file.write(self.summary.tobytes())
+        os.replace(path + '.tmp', path)
+
+    def write(self, record):
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.segment is None:
+            segments = self.segments()
+            self._open_segment(segments[-1] if segments else 1)
+        offset = self.data_file.seek(0, os.SEEK_END)
+        if offset >= self.segment_size:
+            self._open_segment(self.segment + 1)
+            offset = 0
+
+        lines = []
+        rows = []
+        for record in self.pending:
+            line = json.dumps(record, separators=(',', ':')).encode() + b'\n'
+            lines.append(line)
+            rows.append((record.get('time', 0), ip_value(record.get('source')), ip_value(record.get('ospfRouterId')),
+                         ip_value(_first(record, NEIGHBOR_KEYS)), self._string_id(record.get('trap')),
+                         self._string_id(_first(record, STATE_KEYS)), offset, len(line)))
+            offset += len(line)
+
+        # Strings, data and summary, then index: an index row never refers to something not written yet
+        if len(self.strings) > self.saved_strings:
+            self._save_strings()
+        self.data_file.write(b''.join(lines))
+        self.data_file.flush()
+        rows = np.array(rows, dtype=INDEX_DTYPE)
+        self._summarize(rows)
+        self._save_summary()
+        self.index_file.write(rows.tobytes())
+        self.index_file.flush()
+        self.written += len(self.pending)
+        self.pending.clear()
+
+    def close_files(self):
+        for file in (self.data_file, self.index_file):
+            if file is not None:
+                file.close()
+        self.data_file = self.index_file = None
+
+    def close(self):
+        self.flush()
+        self.close_files()
+
+    def _index(self, segment):
+        rows = os.path.getsize(self._path(segment, 'index')) // INDEX_DTYPE.itemsize
+        if not rows:
+            return None
+        return np.memmap(self._path(segment, 'index'), dtype=INDEX_DTYPE, mode='r', shape=(rows,))
+
+    def _selected(self, start=None, end=None, **filters):
+        """Index rows matching the filters, per segment. Times are Unix timestamps, end is excluded."""
+        # Another process may be writing the store, its strings are read again
+        strings = self._load_strings()
+        string_ids = {string: number for number, string in enumerate(strings)}
+        values = {}
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field in STRING_FIELDS:
+                if value not in string_ids:
+                    return
+                values[field] = string_ids[value]
+            else:
+                values[field] = ip_value(value)
+
+        for segment in self.segments():
+            index = self._index(segment)
+            if index is None:
+                continue
+            times = index['time']
+            if (start is not None and times[-1] < start) or (end is not None and times[0] >= end):
+                continue
+            # Read after the index, the summary covers every row mapped
+            summary = self._load_summary(segment)
+            if summary is not None and not all(summary[SUMMARY_FIELDS.index(field), summary_bits(value)]
+                                               for field, value in values.items()):
+                continue
+            low = np.searchsorted(times, start) if start is not None else 0
+            high = np.searchsorted(times, end) if end is not None else len(index)
+            rows = index[low:high]
+            if values:
+                mask = np.ones(len(rows), dtype=bool)
+                for field, value in values.items():
+                    mask &= rows[field] == value
+                rows = rows[mask]
+            if len(rows):
+                yield segment, rows
+
+    def count(self, start=None, end=None, **filters):
+        """Number of records matching, read from the indexes only."""
+        return sum(len(rows) for _, rows in self._selected(start, end, **filters))
+
+    def query(self, start=None, end=None, source=None, router=None, neighbor=None, trap=None, state=None):
+        """Records received between start and end matching every filter given, in the order they were received."""
+        for segment, rows in self._selected(start, end, source=source, router=router, neighbor=neighbor, trap=trap,
+                                            state=state):
+            with open(self._path(segment, 'ndjson'), 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset, length in zip(rows['offset'].tolist(), rows['length'].tolist()):
+                    yield json.loads(data[offset:offset + length])